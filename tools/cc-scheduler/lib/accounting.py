@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Per-run token accounting for cc-scheduler.
+
+Attributes token usage to the task that spent it, from the most exact
+source available:
+1. stream: usage reported in claude's stream-json output
+2. transcript: claude's session transcript (~/.claude/projects/*/<session>.jsonl),
+   for runs that were killed before the final result line
+3. capacity: the 5h capacity delta over the run (shared with the user's
+   own work and with concurrent runs, so only a fallback)
+4. estimate: output length / 4
+
+Budget and the learned cost models should only learn from exact sources.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .stream_events import TokenUsage
+from .log_utils import read_jsonl, estimate_tokens
+
+CLAUDE_PROJECTS_DIR = Path.home() / ".claude" / "projects"
+
+EXACT_SOURCES = ("stream", "transcript")
+
+
+@dataclass
+class TokenAccount:
+    """Tokens attributed to one run and where the number came from."""
+    tokens: int
+    source: str  # stream | transcript | capacity | estimate
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+    @property
+    def exact(self) -> bool:
+        return self.source in EXACT_SOURCES
+
+
+def transcript_path(session_id: str, projects_dir: Path = None) -> Optional[Path]:
+    """Transcript file of a claude session, if it exists."""
+    projects_dir = projects_dir or CLAUDE_PROJECTS_DIR
+    if not session_id or not projects_dir.exists():
+        return None
+    return next(projects_dir.glob(f"*/{session_id}.jsonl"), None)
+
+
+def transcript_usage(session_id: str, projects_dir: Path = None) -> Optional[TokenUsage]:
+    """
+    Sum assistant message usage from a session transcript.
+
+    Messages with several content blocks are written once per block with
+    the same usage, so the last entry per message id counts.
+    """
+    path = transcript_path(session_id, projects_dir)
+    if path is None:
+        return None
+    by_message = {}
+    for entry in read_jsonl(path):
+        message = entry.get("message")
+        if entry.get("type") != "assistant" or not isinstance(message, dict) or not message.get("usage"):
+            continue
+        by_message[message.get("id") or len(by_message)] = TokenUsage.from_api(message["usage"])
+    if not by_message:
+        return None
+    return sum(by_message.values(), TokenUsage())
+
+
+def account_run(result, capacity_tokens: Optional[int] = None, projects_dir: Path = None) -> TokenAccount:
+    """
+    Attribute token usage to a finished run (an ExecutionResult).
+
+    capacity_tokens is the capacity-delta estimate over the run, if known.
+    """
+    if result.usage and result.usage.total > 0:
+        return TokenAccount(result.usage.total, "stream", result.usage)
+
+    usage = transcript_usage(result.session_id, projects_dir) if result.session_id else None
+    if usage and usage.total > 0:
+        return TokenAccount(usage.total, "transcript", usage)
+
+    if capacity_tokens and capacity_tokens > 0:
+        return TokenAccount(capacity_tokens, "capacity")
+
+    return TokenAccount(estimate_tokens(result.output, result.output_chars), "estimate")
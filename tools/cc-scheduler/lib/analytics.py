@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Run analytics for cc-scheduler.
+
+Every run in the history stream (history.jsonl and its monthly
+segments, see log_store) is loaded into a SQLite table under
+.omc/state/, with the task's features flattened into columns. Loading
+is incremental: the hot file is read from the byte offset reached last
+time, and a segment is read again only if its size changed. Repeated
+queries therefore cost an indexed SQL query plus any new lines. Runs
+are keyed by run ID, so a run seen twice (e.g. in a segment and in the
+hot file around a rotation) is stored once.
+
+Queries:
+- summary: runs, success rate, duration and token percentiles, grouped
+  by task, project, backend, model_hint, skill, error_type or token_source
+- trend: the same per day, week or month
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .duration_model import percentile
+from .log_store import LogStore, read_jsonl, parse_jsonl_line
+
+ANALYTICS_FILENAME = "run-analytics.db"
+
+SCHEMA_VERSION = 2
+
+# The database is derived from the logs, so an older schema is dropped
+# and reloaded rather than migrated
+DROP_SCHEMA = """
+DROP TABLE IF EXISTS runs;
+DROP TABLE IF EXISTS loaded_files;
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,  -- "<task>@<started>" for runs logged before run IDs
+    task TEXT NOT NULL,
+    started TEXT NOT NULL,
+    day TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    error_type TEXT,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    token_source TEXT,
+    duration_s REAL NOT NULL DEFAULT 0,
+    project TEXT,
+    backend TEXT,
+    model_hint TEXT,
+    skill TEXT,
+    log_file TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_day ON runs(day);
+CREATE INDEX IF NOT EXISTS runs_task ON runs(task);
+
+CREATE TABLE IF NOT EXISTS loaded_files (
+    file TEXT PRIMARY KEY,
+    inode INTEGER,
+    offset INTEGER NOT NULL  -- Bytes loaded (hot file) or file size (segment)
+);
+"""
+
+GROUP_FIELDS = ("task", "project", "backend", "model_hint", "skill", "error_type", "token_source")
+
+PERIODS = {
+    "day": "day",
+    "week": "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "substr(day, 1, 7)",
+}
+
+
+@dataclass
+class GroupStats:
+    """Aggregates for one group of runs."""
+    key: str
+    runs: int
+    success_rate: float
+    duration_p50: float
+    duration_p90: float
+    tokens_p50: float
+    tokens_p90: float
+    tokens_total: int
+
+
+def _row(entry: dict) -> Optional[tuple]:
+    task = entry.get("task_id")
+    started = entry.get("timestamp")
+    if not task or not isinstance(started, str):
+        return None
+    features = entry.get("features") or {}
+    return (
+        entry.get("run_id") or f"{task}@{started}", task, started, started[:10], 1 if entry.get("success") else 0, entry.get("error_type"),
+        entry.get("tokens") or 0, entry.get("input_tokens"), entry.get("output_tokens"),
+        entry.get("token_source"), entry.get("duration_s") or 0,
+        features.get("project"), features.get("backend"), features.get("model_hint"),
+        features.get("skill"), entry.get("log_file"),
+    )
+
+
+class RunAnalytics:
+    """
+    SQLite store of all runs, loaded incrementally from the history stream.
+
+    Usage:
+        analytics = RunAnalytics(db_path, logs_dir)
+        analytics.refresh()
+        analytics.summary("backend", since=date(2026, 1, 1))
+    """
+
+    def __init__(self, path: Path, logs_dir: Path):
+        self.path = path
+        self.store = LogStore(logs_dir)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript(DROP_SCHEMA + SCHEMA + f"PRAGMA user_version = {SCHEMA_VERSION};")
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # =========================================================================
+    # Loading
+    # =========================================================================
+
+    def refresh(self) -> int:
+        """Load runs added since the last refresh. Returns rows inserted."""
+        before = self.count()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for segment in self.store.segments("history"):
+                self._load_segment(self.store.logs_dir / segment["file"])
+            self._load_hot(self.store.hot_path("history"))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return self.count() - before
+
+    def _loaded(self, path: Path) -> Optional[tuple]:
+        return self._conn.execute(
+            "SELECT inode, offset FROM loaded_files WHERE file = ?", (path.name,)
+        ).fetchone()
+
+    def _mark_loaded(self, path: Path, inode: int, offset: int):
+        self._conn.execute("INSERT OR REPLACE INTO loaded_files VALUES (?, ?, ?)", (path.name, inode, offset))
+
+    def _insert(self, entries):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO runs (run_id, task, started, day, success, error_type, tokens, input_tokens, "
+            "output_tokens, token_source, duration_s, project, backend, model_hint, skill, log_file) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (row for row in map(_row, entries) if row is not None),
+        )
+
+    def _load_segment(self, path: Path):
+        """Load a compressed segment unless it is unchanged since last time."""
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        if self._loaded(path) == (st.st_ino, st.st_size):
+            return
+        self._insert(read_jsonl(path))  # Runs already loaded are ignored by run_id
+        self._mark_loaded(path, st.st_ino, st.st_size)
+
+    def _load_hot(self, path: Path):
+        """Load lines appended to the hot file since the stored offset."""
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        loaded = self._loaded(path)
+        offset = 0
+        if loaded and loaded[0] == st.st_ino and loaded[1] <= st.st_size:
+            offset = loaded[1]
+        if offset == st.st_size:
+            return
+
+        entries = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line still being written
+                offset += len(line)
+                entry = parse_jsonl_line(line)
+                if entry is not None:
+                    entries.append(entry)
+        self._insert(entries)
+        self._mark_loaded(path, st.st_ino, offset)
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def _select(self, key_sql: str, since: Optional[date], until: Optional[date]) -> Dict[str, List[tuple]]:
+        where, params = [], []
+        if since:
+            where.append("day >= ?")
+            params.append(since.isoformat())
+        if until:
+            where.append("day <= ?")
+            params.append(until.isoformat())
+        sql = f"SELECT COALESCE({key_sql}, '-'), success, duration_s, tokens FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        groups: Dict[str, List[tuple]] = {}
+        for key, success, duration, tokens in self._conn.execute(sql, params):
+            groups.setdefault(str(key), []).append((success, duration, tokens))
+        return groups
+
+    @staticmethod
+    def _stats(key: str, rows: List[tuple]) -> GroupStats:
+        durations = [r[1] for r in rows]
+        tokens = [r[2] for r in rows]
+        return GroupStats(
+            key=key,
+            runs=len(rows),
+            success_rate=round(sum(r[0] for r in rows) / len(rows) * 100, 1),
+            duration_p50=round(percentile(durations, 50), 1),
+            duration_p90=round(percentile(durations, 90), 1),
+            tokens_p50=round(percentile(tokens, 50)),
+            tokens_p90=round(percentile(tokens, 90)),
+            tokens_total=sum(tokens),
+        )
+
+    def summary(self, group_by: str = "task", since: date = None, until: date = None) -> List[GroupStats]:
+        """Per-group stats, most runs first."""
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"Cannot group by {group_by!r}; choose from {', '.join(GROUP_FIELDS)}")
+        groups = self._select(group_by, since, until)
+        return sorted((self._stats(k, rows) for k, rows in groups.items()), key=lambda s: (-s.runs, s.key))
+
+    def trend(self, period: str = "week", since: date = None, until: date = None) -> List[GroupStats]:
+        """Stats per day, week (keyed by Monday) or month, oldest first."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period {period!r}; choose from {', '.join(PERIODS)}")
+        groups = self._select(PERIODS[period], since, until)
+        return [self._stats(k, groups[k]) for k in sorted(groups)]
+
+    def count(self) -> int:
+        """Runs loaded so far."""
+        return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def format_stats(rows: List[GroupStats], title: str) -> str:
+    """Table of group stats for display."""
+    if not rows:
+        return "No runs in range."
+    width = max(len(title), *(len(r.key) for r in rows))
+    lines = [
+        f"{title:<{width}}  {'runs':>5}  {'ok%':>5}  {'dur p50':>8}  {'dur p90':>8}  "
+        f"{'tok p50':>8}  {'tok p90':>8}  {'tokens':>10}"
+    ]
+    for r in rows:
+        lines.append(
+            f"{r.key:<{width}}  {r.runs:>5}  {r.success_rate:>5.1f}  {r.duration_p50:>7.0f}s  {r.duration_p90:>7.0f}s  "
+            f"{r.tokens_p50:>8,}  {r.tokens_p90:>8,}  {r.tokens_total:>10,}"
+        )
+    return "\n".join(lines)
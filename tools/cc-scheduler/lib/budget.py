@@ -5,23 +5,40 @@ Budget tracker for cc-scheduler.
 Manages weekly and session-level token budgets to plan Claude Pro usage
 across autonomous tasks while reserving capacity for user-directed work.
 
-Budget files stored in .omc/state/:
-- weekly-budget.json: Week allocation + actuals by day
-- session-budget.json: Current session tracking
-- cost-models.json: Learned token estimates per task type
+Budget state stored in .omc/state/:
+- weekly-budget.json: Week allocation plan by day
+- usage-ledger.db: Usage actuals, sessions and learned token estimates
+  per task type (see ledger.py)
+
+The weekly plan is read once per process; plan changes are written
+straight through. Usage goes straight to the ledger. The old
+session-budget.json and cost-models.json, and the actuals in
+weekly-budget.json, are imported into the ledger when it is created.
 """
 
 import json
+import os
+from contextlib import contextmanager
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, date, timedelta
 from typing import Optional
 
+from .ledger import UsageLedger, LEDGER_FILENAME
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
 # State file locations
 BRAIN_ROOT = Path.home() / "brain"
 STATE_DIR = BRAIN_ROOT / ".omc" / "state"
 
 WEEKLY_BUDGET_FILE = STATE_DIR / "weekly-budget.json"
+LEDGER_FILE = STATE_DIR / LEDGER_FILENAME
+
+# Legacy files, imported into the ledger when it is first created
 SESSION_BUDGET_FILE = STATE_DIR / "session-budget.json"
 COST_MODELS_FILE = STATE_DIR / "cost-models.json"
 
@@ -92,10 +109,28 @@ class SessionBudget:
         return cls(**data)
 
 
+def _atomic_write(path: Path, text: str):
+    """Write a file via temp file + fsync + rename so readers never see a partial file."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
 class BudgetTracker:
     """
     Manages weekly and session token budgets.
 
+    The weekly plan is read once per process and kept in memory. Plan
+    changes (a new week, rebalancing) are rare and written straight
+    through under a file lock, onto a fresh read so concurrent ccq
+    processes don't lose each other's updates.
+
+    Usage, sessions and cost models live in the SQLite usage ledger, so
+    recording is an append and actuals are aggregated from it on read.
+
     Default weekly allocation (can be customized in config):
     - Mon-Thu: 15% each = 60%
     - Fri-Sun: 10% each = 30%
@@ -112,9 +147,16 @@ class BudgetTracker:
         6: 10.0,  # Sunday
     }
 
-    def __init__(self, config: dict = None):
+    def __init__(self, config: dict = None, state_dir: Path = None):
         self.config = config or {}
-        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self.state_dir = state_dir or STATE_DIR
+        self.weekly_file = self.state_dir / WEEKLY_BUDGET_FILE.name
+        self.lock_file = self.state_dir / "budget.lock"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.ledger = UsageLedger(self.state_dir / LEDGER_FILENAME, legacy_dir=self.state_dir)
+        self._weekly: Optional[WeeklyBudget] = None
+        # (week_start, ledger data_version, daily percents, user-directed percent)
+        self._actuals: Optional[tuple] = None
 
     def _get_week_start(self, d: date = None) -> str:
         """Get Monday of the week containing date d."""
@@ -123,51 +165,133 @@ class BudgetTracker:
         monday = d - timedelta(days=d.weekday())
         return monday.isoformat()
 
-    def load_weekly_budget(self) -> WeeklyBudget:
-        """Load or create weekly budget for current week."""
-        current_week = self._get_week_start()
+    # =========================================================================
+    # Plan loading and persistence
+    # =========================================================================
 
-        if WEEKLY_BUDGET_FILE.exists():
-            try:
-                data = json.loads(WEEKLY_BUDGET_FILE.read_text())
-                budget = WeeklyBudget.from_dict(data)
+    @property
+    def weekly(self) -> WeeklyBudget:
+        """This week's plan, read from disk on first use (and on a new week)."""
+        if self._weekly is None or self._weekly.week_start != self._get_week_start():
+            self._weekly = self._read_weekly() or self._update_plan({})
+        return self._weekly
 
-                # Check if it's still the same week
-                if budget.week_start == current_week:
+    def _read_weekly(self) -> Optional[WeeklyBudget]:
+        """Read this week's budget from disk (None if missing or stale)."""
+        if self.weekly_file.exists():
+            try:
+                budget = WeeklyBudget.from_dict(json.loads(self.weekly_file.read_text()))
+                if budget.week_start == self._get_week_start():
                     return budget
-                # New week - create fresh budget
             except (json.JSONDecodeError, KeyError):
                 pass
+        return None
 
-        # Create new weekly budget
+    def _write_weekly(self, budget: WeeklyBudget):
+        """Write the plan part of a weekly budget; actuals live in the ledger."""
+        data = budget.to_dict()
+        data.pop("user_directed_used", None)
+        for alloc in data["daily_allocations"].values():
+            alloc.pop("actual_percent", None)
+            alloc.pop("tasks_completed", None)
+        _atomic_write(self.weekly_file, json.dumps(data, indent=2))
+
+    def _new_weekly_budget(self) -> WeeklyBudget:
+        """Create a weekly budget from config or default daily allocations."""
+        current_week = self._get_week_start()
         budget = WeeklyBudget(week_start=current_week)
-
-        # Initialize daily allocations from config or defaults
         config_daily = self.config.get("budget", {}).get("daily_allocations", {})
 
         for i in range(7):
             day = date.fromisoformat(current_week) + timedelta(days=i)
-            day_str = day.isoformat()
-
-            # Use config allocation or default
             day_name = day.strftime("%A").lower()
-            if day_name in config_daily:
-                planned = config_daily[day_name]
-            else:
-                planned = self.DEFAULT_DAILY_ALLOCATION[i]
+            planned = config_daily.get(day_name, self.DEFAULT_DAILY_ALLOCATION[i])
+            budget.daily_allocations[day.isoformat()] = DailyAllocation(planned_percent=planned)
+        return budget
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the budget files across processes."""
+        with open(self.lock_file, "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
 
-            budget.daily_allocations[day_str] = DailyAllocation(
-                planned_percent=planned
+    def _update_plan(self, planned: dict) -> WeeklyBudget:
+        """
+        Set planned percents ({day: percent}) and write the plan to disk.
+
+        Applied under the lock to a fresh read (or a new week's defaults),
+        so plan changes by other processes since our load are kept.
+        """
+        with self._locked():
+            budget = self._read_weekly() or self._new_weekly_budget()
+            for day, percent in planned.items():
+                alloc = budget.daily_allocations.get(day)
+                if isinstance(alloc, DailyAllocation):
+                    alloc.planned_percent = percent
+                elif alloc is not None:
+                    alloc["planned_percent"] = percent
+            self._write_weekly(budget)
+        self._weekly = budget
+        return budget
+
+    def reload(self):
+        """Drop the in-memory plan so the next query reads it from disk."""
+        self._weekly = None
+
+    def __enter__(self):
+        return self
+
+    def close(self):
+        """Close the ledger."""
+        self.ledger.close()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # =========================================================================
+    # Weekly budget
+    # =========================================================================
+
+    def _week_actuals(self, week_start: str) -> tuple:
+        """
+        (daily percents, user-directed percent) for a week from the ledger.
+
+        Aggregated once and reused until the ledger changes: our own
+        writes drop the cache, other processes' commits change its
+        data_version.
+        """
+        version = self.ledger.data_version()
+        if self._actuals is None or self._actuals[:2] != (week_start, version):
+            self._actuals = (
+                week_start, version,
+                self.ledger.daily_percents(week_start),
+                self.ledger.week_usage(week_start)["user_directed_percent"],
             )
+        return self._actuals[2:]
 
-        self.save_weekly_budget(budget)
+    def load_weekly_budget(self) -> WeeklyBudget:
+        """Get the weekly budget for the current week, with actuals from the ledger."""
+        budget = self.weekly
+        actuals, user_directed = self._week_actuals(budget.week_start)
+        for day_str, alloc in budget.daily_allocations.items():
+            if isinstance(alloc, DailyAllocation):
+                alloc.actual_percent = actuals.get(day_str, 0.0)
+            else:
+                alloc["actual_percent"] = actuals.get(day_str, 0.0)
+        budget.user_directed_used = user_directed
         return budget
 
     def save_weekly_budget(self, budget: WeeklyBudget):
-        """Save weekly budget to file."""
-        WEEKLY_BUDGET_FILE.write_text(
-            json.dumps(budget.to_dict(), indent=2)
-        )
+        """Replace the weekly plan and write it to disk immediately."""
+        with self._locked():
+            self._write_weekly(budget)
+        self._weekly = budget
 
     def get_today_allocation(self) -> float:
         """Get planned allocation for today."""
@@ -240,83 +364,44 @@ class BudgetTracker:
             "days_remaining": days_remaining,
         }
 
-    def record_usage(self, task_name: str, tokens_used: int, percent_used: float):
-        """Record token usage for a task."""
-        budget = self.load_weekly_budget()
-        today = date.today().isoformat()
+    def record_usage(self, task_name: str, tokens_used: int, percent_used: float, update_model: bool = True,
+                     source: str = "task"):
+        """Record token usage for a task.
 
-        if today in budget.daily_allocations:
-            alloc = budget.daily_allocations[today]
-            if isinstance(alloc, DailyAllocation):
-                alloc.actual_percent += percent_used
-                alloc.tasks_completed.append({
-                    "name": task_name,
-                    "tokens": tokens_used,
-                    "percent": percent_used,
-                    "timestamp": datetime.now().isoformat()
-                })
-            else:
-                alloc["actual_percent"] = alloc.get("actual_percent", 0) + percent_used
-                if "tasks_completed" not in alloc:
-                    alloc["tasks_completed"] = []
-                alloc["tasks_completed"].append({
-                    "name": task_name,
-                    "tokens": tokens_used,
-                    "percent": percent_used,
-                    "timestamp": datetime.now().isoformat()
-                })
-
-        self.save_weekly_budget(budget)
+        update_model=False keeps approximate numbers (capacity deltas) out
+        of the learned cost estimates. source="estimate" marks usage that is
+        only guessed from output length: it counts toward day and week
+        totals but not toward per-task stats.
+        """
+        self.ledger.record_usage(task_name, tokens_used, percent_used, source=source)
+        self._actuals = None
 
         # Update cost models
-        self._update_cost_model(task_name, tokens_used)
+        if update_model:
+            self._update_cost_model(task_name, tokens_used)
 
     def record_user_directed(self, percent_used: float):
         """Record usage from user-directed (non-scheduled) work."""
-        budget = self.load_weekly_budget()
-        budget.user_directed_used += percent_used
-        self.save_weekly_budget(budget)
+        self.ledger.record_usage(None, 0, percent_used, source="user_directed")
+        self._actuals = None
 
     def _update_cost_model(self, task_name: str, tokens_used: int):
         """Update learned cost estimates using exponential moving average."""
-        models = self._load_cost_models()
-
         # Extract task type from name (e.g., "brain-self-improvement" -> "brain")
         task_type = task_name.split("-")[0] if "-" in task_name else task_name
-
-        if task_type in models:
-            # EMA: 0.7 * old + 0.3 * new
-            old_estimate = models[task_type]["avg_tokens"]
-            models[task_type]["avg_tokens"] = int(0.7 * old_estimate + 0.3 * tokens_used)
-            models[task_type]["samples"] += 1
-        else:
-            models[task_type] = {
-                "avg_tokens": tokens_used,
-                "samples": 1
-            }
-
-        self._save_cost_models(models)
+        self.ledger.update_cost_model(task_type, tokens_used)
 
     def _load_cost_models(self) -> dict:
         """Load cost estimation models."""
-        if COST_MODELS_FILE.exists():
-            try:
-                return json.loads(COST_MODELS_FILE.read_text())
-            except json.JSONDecodeError:
-                pass
-        return {}
-
-    def _save_cost_models(self, models: dict):
-        """Save cost estimation models."""
-        COST_MODELS_FILE.write_text(json.dumps(models, indent=2))
+        return self.ledger.cost_models()
 
     def get_estimated_cost(self, task_name: str, default: int = 50000) -> int:
         """Get estimated token cost for a task type."""
-        models = self._load_cost_models()
         task_type = task_name.split("-")[0] if "-" in task_name else task_name
+        model = self.ledger.cost_model(task_type)
 
-        if task_type in models:
-            return models[task_type]["avg_tokens"]
+        if model:
+            return model["avg_tokens"]
         return default
 
     def rebalance_week(self, remaining_tasks: list):
@@ -350,14 +435,7 @@ class BudgetTracker:
         # Simple rebalancing: distribute evenly across remaining days
         per_day = remaining_week / len(future_days)
 
-        for day_str in future_days:
-            alloc = budget.daily_allocations[day_str]
-            if isinstance(alloc, DailyAllocation):
-                alloc.planned_percent = per_day
-            else:
-                alloc["planned_percent"] = per_day
-
-        self.save_weekly_budget(budget)
+        self._update_plan({day_str: per_day for day_str in future_days})
 
     # Session-level tracking
 
@@ -368,30 +446,19 @@ class BudgetTracker:
             started_at=datetime.now().isoformat(),
             daily_allocation=self.get_today_allocation()
         )
-        SESSION_BUDGET_FILE.write_text(json.dumps(session.to_dict(), indent=2))
+        self.ledger.start_session(session.session_id, session.started_at, session.daily_allocation)
         return session
 
     def load_session(self) -> Optional[SessionBudget]:
         """Load current session if exists."""
-        if SESSION_BUDGET_FILE.exists():
-            try:
-                data = json.loads(SESSION_BUDGET_FILE.read_text())
-                return SessionBudget.from_dict(data)
-            except (json.JSONDecodeError, KeyError):
-                pass
-        return None
+        data = self.ledger.latest_session()
+        return SessionBudget.from_dict(data) if data else None
 
     def update_session(self, task_name: str, percent_used: float):
         """Update current session tracking."""
         session = self.load_session()
         if session:
-            session.used_percent += percent_used
-            session.tasks_executed.append({
-                "name": task_name,
-                "percent": percent_used,
-                "timestamp": datetime.now().isoformat()
-            })
-            SESSION_BUDGET_FILE.write_text(json.dumps(session.to_dict(), indent=2))
+            self.ledger.record_session_usage(session.session_id, task_name, percent_used)
 
     def check_session_budget(self, estimated_percent: float) -> bool:
         """Check if a task fits in the session budget."""
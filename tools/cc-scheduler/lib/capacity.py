@@ -6,26 +6,47 @@ Reads OAuth credentials from ~/.claude/.credentials.json and checks
 rate limit usage via api.anthropic.com/api/oauth/usage.
 
 Based on omc's usage-api.ts pattern but simplified for Python.
+
+Samples are cached in .omc/state/capacity.json for a short TTL, shared
+by every ccq process, so planning and per-task checks don't each wait
+on the API.
 """
 
 import json
 import os
+import threading
 import requests
+from contextlib import contextmanager
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional
-from datetime import datetime
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
 
 CREDENTIALS_PATH = Path.home() / ".claude" / ".credentials.json"
 USAGE_API = "https://api.anthropic.com/api/oauth/usage"
 TIMEOUT = 10
 
+STATE_DIR = Path.home() / "brain" / ".omc" / "state"
+CACHE_FILE = STATE_DIR / "capacity.json"
+DEFAULT_TTL_S = 60
+MAX_STALE_S = 900  # Serve an old sample this long when the API is down
+
+FIVE_HOURS = timedelta(hours=5)
+SEVEN_DAYS = timedelta(days=7)
+
+
 @dataclass
 class Capacity:
     five_hour_percent: float
     weekly_percent: float
     five_hour_resets_at: Optional[datetime] = None
     weekly_resets_at: Optional[datetime] = None
+    sampled_at: Optional[datetime] = None  # When the API reported this (UTC)
 
     @property
     def is_limited(self) -> bool:
@@ -36,6 +57,65 @@ class Capacity:
         """Returns remaining capacity (lower of the two windows)."""
         return min(100 - self.five_hour_percent, 100 - self.weekly_percent)
 
+    def age_s(self, now: datetime = None) -> float:
+        """Seconds since the sample was taken (infinite if unknown)."""
+        if self.sampled_at is None:
+            return float("inf")
+        return ((now or datetime.now(timezone.utc)) - self.sampled_at).total_seconds()
+
+    def extrapolated(self, now: datetime = None) -> "Capacity":
+        """
+        Best guess for now from this sample.
+
+        Usage between samples is unknown, but a window whose reset time
+        has passed is empty again; its next reset is one period later.
+        """
+        now = now or datetime.now(timezone.utc)
+        cap = self
+        if cap.five_hour_resets_at and cap.five_hour_resets_at <= now:
+            cap = replace(cap, five_hour_percent=0, five_hour_resets_at=_roll(cap.five_hour_resets_at, FIVE_HOURS, now))
+        if cap.weekly_resets_at and cap.weekly_resets_at <= now:
+            cap = replace(cap, weekly_percent=0, weekly_resets_at=_roll(cap.weekly_resets_at, SEVEN_DAYS, now))
+        return cap
+
+    def to_dict(self) -> dict:
+        return {
+            "five_hour_percent": self.five_hour_percent,
+            "weekly_percent": self.weekly_percent,
+            "five_hour_resets_at": _iso(self.five_hour_resets_at),
+            "weekly_resets_at": _iso(self.weekly_resets_at),
+            "sampled_at": _iso(self.sampled_at),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Capacity":
+        return cls(
+            five_hour_percent=data["five_hour_percent"],
+            weekly_percent=data["weekly_percent"],
+            five_hour_resets_at=parse_date(data.get("five_hour_resets_at")),
+            weekly_resets_at=parse_date(data.get("weekly_resets_at")),
+            sampled_at=parse_date(data.get("sampled_at")),
+        )
+
+
+def _roll(resets_at: datetime, period: timedelta, now: datetime) -> datetime:
+    while resets_at <= now:
+        resets_at += period
+    return resets_at
+
+
+def _iso(d: Optional[datetime]) -> Optional[str]:
+    return d.isoformat() if d else None
+
+
+def parse_date(s: Optional[str]) -> Optional[datetime]:
+    if not s:
+        return None
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
 
 def get_access_token() -> Optional[str]:
     """Read OAuth access token from credentials file."""
@@ -51,14 +131,27 @@ def get_access_token() -> Optional[str]:
         return None
 
 
-def check_capacity() -> Optional[Capacity]:
-    """Check current rate limit usage. Returns None if unavailable."""
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _http() -> requests.Session:
+    """Shared keep-alive session, so repeated checks reuse the connection."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
+
+def fetch_capacity() -> Optional[Capacity]:
+    """Ask the usage API for current rate limit usage. Returns None if unavailable."""
     token = get_access_token()
     if not token:
         return None
 
     try:
-        response = requests.get(
+        response = _http().get(
             USAGE_API,
             headers={
                 "Authorization": f"Bearer {token}",
@@ -73,24 +166,129 @@ def check_capacity() -> Optional[Capacity]:
 
         data = response.json()
 
-        def parse_date(s: Optional[str]) -> Optional[datetime]:
-            if not s:
-                return None
-            try:
-                return datetime.fromisoformat(s.replace("Z", "+00:00"))
-            except ValueError:
-                return None
-
         return Capacity(
             five_hour_percent=data.get("five_hour", {}).get("utilization", 0),
             weekly_percent=data.get("seven_day", {}).get("utilization", 0),
             five_hour_resets_at=parse_date(data.get("five_hour", {}).get("resets_at")),
             weekly_resets_at=parse_date(data.get("seven_day", {}).get("resets_at")),
+            sampled_at=datetime.now(timezone.utc),
         )
     except (requests.RequestException, json.JSONDecodeError):
         return None
 
 
+class CapacityCache:
+    """
+    Last capacity sample, shared by threads in memory and by ccq
+    processes through a file in the state dir.
+
+    A refresh holds a thread lock and an flock on the cache file, and
+    re-checks the cache once it has them: callers that waited on a
+    refresh in progress get its result instead of asking the API again.
+    """
+
+    def __init__(
+        self,
+        path: Path = None,
+        ttl_s: float = DEFAULT_TTL_S,
+        fetch: Callable[[], Optional[Capacity]] = None,
+    ):
+        self.path = path or CACHE_FILE
+        self.ttl_s = ttl_s
+        self.fetch = fetch or fetch_capacity
+        self._lock = threading.Lock()
+        self._cap: Optional[Capacity] = None
+
+    def get(self, max_age_s: float = None) -> Optional[Capacity]:
+        """
+        Capacity no older than max_age_s (default: the TTL), extrapolated to now.
+
+        max_age_s=0 forces a new sample unless one was taken while this
+        call waited for the lock.
+        """
+        max_age_s = self.ttl_s if max_age_s is None else max_age_s
+        requested = datetime.now(timezone.utc)
+
+        def fresh(cap: Optional[Capacity]) -> bool:
+            return cap is not None and cap.sampled_at is not None and \
+                (requested - cap.sampled_at).total_seconds() <= max_age_s
+
+        if fresh(self._cap):
+            return self._cap.extrapolated()
+
+        with self._lock:
+            if fresh(self._cap):
+                return self._cap.extrapolated()
+            with self._file_lock():
+                disk = self._read()
+                if disk is not None and (self._cap is None or disk.sampled_at > self._cap.sampled_at):
+                    self._cap = disk
+                if fresh(self._cap):
+                    return self._cap.extrapolated()
+
+                cap = self.fetch()
+                if cap is not None:
+                    self._cap = cap
+                    self._write(cap)
+                    return cap.extrapolated()
+
+            # API down: an old sample is better than none for a while
+            if self._cap is not None and self._cap.age_s() <= MAX_STALE_S:
+                return self._cap.extrapolated()
+            return None
+
+    def invalidate(self):
+        """Forget the in-memory sample (the file is left for other processes)."""
+        with self._lock:
+            self._cap = None
+
+    def _read(self) -> Optional[Capacity]:
+        try:
+            cap = Capacity.from_dict(json.loads(self.path.read_text()))
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+        return cap if cap.sampled_at else None
+
+    def _write(self, cap: Capacity):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(cap.to_dict(), indent=2))
+        os.replace(tmp, self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the cache file across processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_cache: Optional[CapacityCache] = None
+
+
+def configure_capacity_cache(ttl_s: float = DEFAULT_TTL_S, path: Path = None):
+    """Set up the process-wide cache used by check_capacity (e.g. from config)."""
+    global _cache
+    _cache = CapacityCache(path=path, ttl_s=ttl_s)
+
+
+def check_capacity(max_age_s: float = None) -> Optional[Capacity]:
+    """
+    Check current rate limit usage. Returns None if unavailable.
+
+    Served from the shared cache when its sample is younger than
+    max_age_s (default: the cache TTL); max_age_s=0 asks the API.
+    """
+    if _cache is None:
+        configure_capacity_cache()
+    return _cache.get(max_age_s)
+
+
 def format_capacity(cap: Capacity) -> str:
     """Format capacity for display."""
     status = "⚠️ LIMITED" if cap.is_limited else "✓ Available"
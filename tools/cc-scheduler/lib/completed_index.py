@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Completed-task name index for cc-scheduler.
+
+Dependency resolution only needs the names of completed tasks, so instead
+of parsing every file in completed/ we keep an append-only text file with
+one task name per line next to them. move_task appends to it; a rebuild
+re-derives it from the directory when the two drift.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Set
+
+from .tasks import parse_task_file
+
+INDEX_FILENAME = ".completed-names"
+
+
+def index_path(completed_dir: Path) -> Path:
+    """Get the index file location for a completed/ directory."""
+    return completed_dir / INDEX_FILENAME
+
+
+def read_completed_names(completed_dir: Path) -> Optional[Set[str]]:
+    """Read completed task names. Returns None if there is no index yet."""
+    path = index_path(completed_dir)
+    try:
+        content = path.read_text()
+    except FileNotFoundError:
+        return None
+    return {line.strip() for line in content.splitlines() if line.strip()}
+
+
+def append_completed_name(completed_dir: Path, name: str):
+    """
+    Record a task name as completed.
+
+    Without an index yet, appending would create one holding just this
+    name, which readers would take as the complete set; build it from
+    completed/ instead (the task file is already there).
+    """
+    completed_dir.mkdir(parents=True, exist_ok=True)
+    path = index_path(completed_dir)
+    if path.exists():
+        with open(path, "a") as f:
+            f.write(name + "\n")
+        return
+    if name not in rebuild_completed_index(completed_dir):
+        with open(path, "a") as f:
+            f.write(name + "\n")
+
+
+def rebuild_completed_index(completed_dir: Path, cache=None) -> Set[str]:
+    """
+    Rebuild the index from the task files in completed/.
+
+    Uses the TaskCache if given. The new index replaces the old one
+    atomically.
+    """
+    if not completed_dir.exists():
+        return set()
+
+    if cache:
+        tasks = cache.load_dir(completed_dir)
+    else:
+        tasks = [t for t in map(parse_task_file, completed_dir.glob("*.md")) if t]
+    names = {t.name for t in tasks}
+
+    path = index_path(completed_dir)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text("".join(f"{name}\n" for name in sorted(names)))
+    os.replace(tmp_path, path)
+
+    return names
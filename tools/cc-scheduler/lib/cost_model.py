@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Learned token cost model for cc-scheduler.
+
+Predicts how many tokens a task will use from its metadata instead of
+the flat estimated_tokens default. Trained from the logs/scheduler/ streams (hot files and segments):
+- history.jsonl: tokens per run, plus the task's features when recorded
+- index.jsonl: capacity deltas for runs missing from history
+
+Once enough runs have exact token counts (token_source stream or
+transcript, see accounting), only those are used; capacity deltas and
+output-length estimates are noise by comparison.
+
+Model: ridge regression on log(tokens) over one-hot features (tags,
+skill, model_hint, mode, backend, project, name prefix) plus log body
+length and log declared estimate. Residual spread gives a log-normal
+distribution, so predictions come back as p50/p90.
+
+The fitted model is cached in .omc/state/cost-model.json and refitted
+when the log files change.
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tasks import Task, BRAIN_ROOT
+from .log_store import LogStore
+from .accounting import EXACT_SOURCES
+
+MODEL_FILE = BRAIN_ROOT / ".omc" / "state" / "cost-model.json"
+
+# Same conversion ccq uses for capacity deltas
+TOKENS_PER_PERCENT = 5000
+
+DEFAULT_RIDGE_LAMBDA = 1.0
+DEFAULT_MIN_SAMPLES = 5
+MIN_SIGMA = 0.25  # log-space spread floor, so p90 never collapses to p50
+
+Z_SCORES = {"p50": 0.0, "p75": 0.6745, "p90": 1.2816, "p95": 1.6449}
+
+
+@dataclass
+class CostEstimate:
+    """Predicted token usage for a task."""
+    p50: int
+    p90: int
+    samples: int  # Training samples behind the prediction (0 = fallback)
+
+
+def task_features(task: Task) -> dict:
+    """
+    Raw feature record for a task, as stored in history.jsonl.
+
+    Uses the body size recorded at parse time, so estimating never reads
+    (or keeps) task bodies.
+    """
+    body_chars = task.body_chars or (len(task.body) if task.body is not None else 0)
+    return {
+        "tags": list(task.tags),
+        "skill": task.skill,
+        "model_hint": task.model_hint,
+        "mode": task.mode,
+        "backend": task.backend,
+        "project": task.project,
+        "body_chars": body_chars,
+        "estimated_tokens": task.estimated_tokens,
+    }
+
+
+def encode(name: str, record: Optional[dict]) -> Dict[str, float]:
+    """Turn a feature record into sparse regression features."""
+    x = {"prefix=" + (name.split("-")[0] if "-" in name else name): 1.0}
+    if not record:
+        return x
+    for tag in record.get("tags") or []:
+        x[f"tag={tag}"] = 1.0
+    for key in ("skill", "model_hint", "mode", "backend", "project"):
+        if record.get(key):
+            x[f"{key}={record[key]}"] = 1.0
+    x["log_body_chars"] = math.log1p(record.get("body_chars") or 0)
+    x["log_estimate"] = math.log1p(record.get("estimated_tokens") or 0)
+    return x
+
+
+def _solve_linear(a: List[List[float]], b: List[float]) -> List[float]:
+    """Solve a x = b by Gaussian elimination with partial pivoting."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-12:
+            continue
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, n):
+            f = m[r][col] / m[col][col]
+            if f:
+                for c in range(col, n + 1):
+                    m[r][c] -= f * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        if abs(m[r][r]) < 1e-12:
+            continue
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+@dataclass
+class CostModel:
+    """Ridge regression over log(tokens)."""
+    weights: Dict[str, float] = field(default_factory=dict)
+    intercept: float = 0.0
+    sigma: float = 1.0
+    samples: int = 0
+    ridge_lambda: float = DEFAULT_RIDGE_LAMBDA
+    source: str = ""  # Signature of the logs the model was fitted on
+
+    def fit(self, samples: List[Tuple[Dict[str, float], float]]) -> "CostModel":
+        """Fit on (features, tokens) pairs. Non-positive token counts are ignored."""
+        samples = [(x, math.log(tokens)) for x, tokens in samples if tokens and tokens > 0]
+        self.samples = len(samples)
+        if not samples:
+            return self
+
+        names = sorted({k for x, _ in samples for k in x})
+        cols = {k: i + 1 for i, k in enumerate(names)}  # column 0 is the intercept
+        d = len(names) + 1
+
+        # Normal equations (X'X + lambda I) w = X'y, intercept unpenalized
+        xtx = [[0.0] * d for _ in range(d)]
+        xty = [0.0] * d
+        for x, y in samples:
+            row = [(0, 1.0)] + [(cols[k], v) for k, v in x.items()]
+            for i, vi in row:
+                xty[i] += vi * y
+                for j, vj in row:
+                    xtx[i][j] += vi * vj
+        for i in range(1, d):
+            xtx[i][i] += self.ridge_lambda
+
+        w = _solve_linear(xtx, xty)
+        self.intercept = w[0]
+        self.weights = {k: w[i] for k, i in cols.items()}
+
+        residuals = [y - self._predict_log(x) for x, y in samples]
+        dof = max(1, len(samples) - 1)
+        self.sigma = max(MIN_SIGMA, math.sqrt(sum(r * r for r in residuals) / dof))
+        return self
+
+    def _predict_log(self, x: Dict[str, float]) -> float:
+        return self.intercept + sum(self.weights.get(k, 0.0) * v for k, v in x.items())
+
+    def predict(self, name: str, record: Optional[dict]) -> CostEstimate:
+        """Predict p50/p90 tokens for a feature record."""
+        mu = self._predict_log(encode(name, record))
+        return CostEstimate(
+            p50=round(math.exp(mu)),
+            p90=round(math.exp(mu + Z_SCORES["p90"] * self.sigma)),
+            samples=self.samples,
+        )
+
+    def quantile(self, task: Task, q: str = "p50") -> int:
+        """Predicted tokens for a task at a quantile (p50, p75, p90, p95)."""
+        mu = self._predict_log(encode(task.name, task_features(task)))
+        return round(math.exp(mu + Z_SCORES[q] * self.sigma))
+
+    def to_dict(self) -> dict:
+        return {
+            "weights": self.weights,
+            "intercept": self.intercept,
+            "sigma": self.sigma,
+            "samples": self.samples,
+            "ridge_lambda": self.ridge_lambda,
+            "source": self.source,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CostModel":
+        return cls(**data)
+
+
+def load_training_samples(
+    logs_dir: Path,
+    tasks: Dict[str, Task] = None,
+) -> List[Tuple[Dict[str, float], float]]:
+    """
+    Build (features, tokens) samples from history.jsonl and index.jsonl.
+
+    History entries without recorded features are joined to task files
+    by name through tasks (pending/completed/failed tasks by name).
+
+    With at least DEFAULT_MIN_SAMPLES exact entries, only exact entries
+    are returned. Otherwise output-length estimates are dropped and
+    everything else is used.
+    """
+    tasks = tasks or {}
+    samples = []
+    seen = set()
+    store = LogStore(logs_dir)
+    history = list(store.read("history"))
+    exact = [e for e in history if e.get("token_source") in EXACT_SOURCES]
+
+    def record_for(name: str, entry: dict) -> Optional[dict]:
+        if entry.get("features"):
+            return entry["features"]
+        task = tasks.get(name)
+        return task_features(task) if task else None
+
+    if len(exact) >= DEFAULT_MIN_SAMPLES:
+        return [(encode(e.get("task_id", ""), record_for(e.get("task_id", ""), e)), e.get("tokens", 0))
+                for e in exact]
+
+    for entry in history:
+        name = entry.get("task_id", "")
+        seen.add((name, entry.get("timestamp")))
+        if entry.get("token_source") == "estimate":
+            continue
+        samples.append((encode(name, record_for(name, entry)), entry.get("tokens", 0)))
+
+    # Runs that never made it into history: use the capacity delta
+    for entry in store.read("index"):
+        name = entry.get("task", "")
+        if (name, entry.get("started")) in seen:
+            continue
+        before, after = entry.get("capacity_before_5h"), entry.get("capacity_after_5h")
+        if before is None or after is None:
+            continue
+        samples.append((encode(name, record_for(name, entry)), (after - before) * TOKENS_PER_PERCENT))
+
+    return samples
+
+
+def load_cost_model(
+    logs_dir: Path,
+    load_tasks: Callable[[], Iterable[Task]] = None,
+    model_file: Path = None,
+    ridge_lambda: float = DEFAULT_RIDGE_LAMBDA,
+) -> CostModel:
+    """
+    Load the cached model, refitting it if the logs changed since.
+
+    load_tasks is only called when refitting, to join history entries
+    without recorded features to their task files.
+    """
+    model_file = model_file or MODEL_FILE
+    signature = f"{LogStore(logs_dir).signature()}|lambda={ridge_lambda}"
+
+    if model_file.exists():
+        try:
+            model = CostModel.from_dict(json.loads(model_file.read_text()))
+            if model.source == signature:
+                return model
+        except (json.JSONDecodeError, TypeError):
+            pass
+
+    by_name = {t.name: t for t in load_tasks()} if load_tasks else {}
+    model = CostModel(ridge_lambda=ridge_lambda, source=signature)
+    model.fit(load_training_samples(logs_dir, by_name))
+
+    model_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = model_file.with_name(model_file.name + ".tmp")
+    tmp.write_text(json.dumps(model.to_dict(), indent=2))
+    tmp.replace(model_file)
+    return model
+
+
+if __name__ == "__main__":
+    from .log_utils import LOGS_DIR
+    from .task_queue import TaskQueue
+
+    queue = TaskQueue()
+    model = load_cost_model(LOGS_DIR, queue.load_finished_tasks)
+    print(f"Samples: {model.samples}, sigma: {model.sigma:.2f}")
+    for task in queue.load_all():
+        est = model.predict(task.name, task_features(task))
+        print(f"  {task.name}: p50 {est.p50:,} / p90 {est.p90:,} (declared {task.estimated_tokens:,})")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Resident scheduler support for `ccq daemon`.
+
+Instead of a cold start per trigger (Python startup, yaml, config,
+capacity HTTP call, full task rescan), the daemon keeps queue, budget
+and capacity state in memory and sleeps until something changes:
+- task files: watched with inotify (through ctypes, no extra package),
+  or by rescanning the directories where inotify is unavailable
+- the schedule phase: it wakes when the current phase ends
+- capacity: re-checked every poll interval (through the capacity cache)
+
+`ccq status` asks a running daemon over a Unix socket in the state dir
+and gets its last snapshot back without touching the API or the disk.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SOCKET_FILENAME = "ccq.sock"
+DEFAULT_POLL_S = 60  # Re-check capacity and schedule at least this often
+DEFAULT_WATCH_POLL_S = 5  # Directory rescan interval without inotify
+SETTLE_S = 0.2  # Let a burst of file events finish before reloading
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+
+
+# =============================================================================
+# Task directory watchers
+# =============================================================================
+
+class PollingWatcher:
+    """Detects changes by comparing (mtime, size) of directory entries."""
+
+    kind = "polling"
+
+    def __init__(self, dirs: List[Path], interval_s: float = DEFAULT_WATCH_POLL_S):
+        self.dirs = [Path(d) for d in dirs]
+        self.interval_s = interval_s
+        self._state = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for directory in self.dirs:
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        state[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return state
+
+    def wait(self, timeout_s: float) -> bool:
+        """Block until a watched directory changes (True) or timeout_s passes (False)."""
+        deadline = time.monotonic() + max(0.0, timeout_s)
+        while True:
+            state = self._snapshot()
+            if state != self._state:
+                self._state = state
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval_s, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux inotify watcher on a set of directories.
+
+    Directories that do not exist yet are retried on every wait, and one
+    that appears counts as a change.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, dirs: List[Path], libc=None):
+        self._libc = libc or _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = [Path(d) for d in dirs]
+        self._watches: Dict[int, Path] = {}
+        self._add_missing()
+
+    def _add_missing(self) -> bool:
+        """Watch directories not watched yet; True if any was added."""
+        watched = set(self._watches.values())
+        added = False
+        for directory in self.dirs:
+            if directory in watched or not directory.is_dir():
+                continue
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+                added = True
+        return added
+
+    def _drain(self) -> bool:
+        """Read pending events; True if any of them is a change."""
+        changed = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not buf:
+                return changed
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size + length
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)  # Directory gone; retried by _add_missing
+                changed = True
+
+    def wait(self, timeout_s: float) -> bool:
+        """Block until a watched directory changes (True) or timeout_s passes (False)."""
+        if self._add_missing():
+            return True
+        deadline = time.monotonic() + max(0.0, timeout_s)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Missing directories are only noticed on wakeup, so wake now and then
+            step = remaining if len(self._watches) == len(self.dirs) else min(remaining, DEFAULT_WATCH_POLL_S)
+            readable, _, _ = select.select([self.fd], [], [], step)
+            if readable and self._drain():
+                # Writers touch several files in a row; report once
+                while select.select([self.fd], [], [], SETTLE_S)[0]:
+                    self._drain()
+                return True
+            if self._add_missing():
+                return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _load_libc():
+    """libc with the inotify calls, or None (not Linux, or no libc found)."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def watch_dirs(dirs: List[Path], poll_s: float = DEFAULT_WATCH_POLL_S):
+    """Watcher for task directories: inotify where available, else polling."""
+    try:
+        return InotifyWatcher(dirs)
+    except OSError:
+        return PollingWatcher(dirs, poll_s)
+
+
+# =============================================================================
+# Status socket
+# =============================================================================
+
+class _StatusHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.rfile.readline()  # Request line; only "status" is served
+        snapshot = self.server.snapshot()
+        self.wfile.write(json.dumps(snapshot, default=str).encode() + b"\n")
+
+
+class StatusServer:
+    """
+    Serves snapshot() as one JSON line per connection on a Unix socket,
+    from a background thread.
+
+    Usage:
+        server = StatusServer(path, lambda: {...})
+        ...
+        server.close()
+    """
+
+    def __init__(self, path: Path, snapshot: Callable[[], dict]):
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()  # Stale socket of a daemon that did not exit cleanly
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.path), _StatusHandler)
+        self._server.daemon_threads = True
+        self._server.snapshot = snapshot
+        os.chmod(self.path, 0o600)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ccq-status", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def query_status(path: Path, timeout_s: float = 1.0) -> Optional[dict]:
+    """Snapshot from a running daemon, or None if none answers."""
+    if not hasattr(socket, "AF_UNIX") or not Path(path).exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout_s)
+            sock.connect(str(path))
+            sock.sendall(b"status\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(64 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+
+
+def format_daemon_status(snapshot: dict) -> str:
+    """Render a daemon snapshot like `ccq status` output."""
+    lines = [
+        f"=== CC Scheduler Status (daemon pid {snapshot.get('pid')}, "
+        f"updated {snapshot.get('updated', '?')}) ===",
+        "",
+    ]
+
+    cap = snapshot.get("capacity")
+    if cap:
+        lines.append(f"Capacity: {cap['text']}")
+        lines.append(f"  Available: ~{cap['available_tokens']:,} tokens")
+        if cap.get("five_hour_resets"):
+            lines.append(f"  5h resets: {cap['five_hour_resets']}")
+    else:
+        lines.append("Capacity: Unable to check (no credentials or API error)")
+    lines.append("")
+
+    lines.append(f"Schedule Phase: {snapshot.get('phase', '?').upper()}")
+    lines.append(f"  Can run: {'Yes' if snapshot.get('can_run') else 'No'} - {snapshot.get('reason', '')}")
+    if snapshot.get("paused"):
+        lines.append(f"  Paused: {snapshot['paused']}")
+    lines.append("")
+
+    budget = snapshot.get("budget")
+    if budget:
+        lines.append(f"Budget (today): {budget['remaining_today']:.1f}% remaining")
+        lines.append(f"Budget (week):  {budget['remaining_week']:.1f}% remaining")
+        lines.append("")
+
+    queue = snapshot.get("queue") or {}
+    lines.append(f"Queue: {queue.get('total', 0)} pending, {queue.get('runnable', 0)} runnable, "
+                 f"{queue.get('blocked', 0)} blocked")
+    for cycle in queue.get("cycles", []):
+        lines.append(f"  ⚠️ Dependency cycle: {' -> '.join(cycle)}")
+    top = snapshot.get("top_tasks") or []
+    if top:
+        lines.append("\nTop tasks:")
+        for t in top:
+            lines.append(f"  [{t['priority']}] {t['name']} (score: {t['score']:.1f}, {t['tokens']:,} tokens)")
+    lines.append("")
+
+    planned = snapshot.get("planned_today") or []
+    if planned:
+        lines.append(f"Planned today: {', '.join(planned)}")
+    running = snapshot.get("running") or []
+    lines.append(f"Running: {', '.join(running) if running else 'nothing'}")
+    last = snapshot.get("last_session")
+    if last:
+        lines.append(f"Last session: {last['ended']} ({last['tasks']} tasks)")
+    lines.append(f"Next check: {snapshot.get('next_check', '?')} (watching tasks via {snapshot.get('watcher', '?')})")
+
+    stats = snapshot.get("stats") or {}
+    if stats.get("total", 0) > 0:
+        lines.append("")
+        lines.append(f"Stats: {stats['runs']} runs, {stats['success_rate']}% success rate (last {stats['total']})")
+    return "\n".join(lines)
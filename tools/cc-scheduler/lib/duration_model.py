@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Duration model for cc-scheduler.
+
+Predicts how long a task will run from the duration_s of past runs in
+history.jsonl, and proposes timeouts from that instead of the static
+task.timeout string.
+
+Runs are grouped into classes from most to least specific:
+- task: re-runs of the same task name
+- class: skill (or first tag) + model_hint
+- model: model_hint
+- global: every run
+
+A prediction uses the most specific level with at least min_samples
+runs. Adaptive timeouts replace a task's declared timeout only when the
+prediction comes from its own runs or its class (TIMEOUT_LEVELS). Other
+tasks' runtimes say too little to kill this one early. Successful and timed-out runs are used; timeouts count at the
+duration they were killed at, so the model errs on the long side.
+Runs that crashed early (exit errors) say nothing about runtime and are
+skipped.
+"""
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tasks import Task
+from .log_store import LogStore
+
+DEFAULT_MIN_SAMPLES = 3
+DEFAULT_MARGIN = 1.5
+DEFAULT_MIN_TIMEOUT_S = 300
+DEFAULT_MAX_TIMEOUT_S = 4 * 3600
+
+# Prediction levels specific enough to override a task's declared timeout
+TIMEOUT_LEVELS = ("task", "class")
+
+
+@dataclass
+class DurationEstimate:
+    """Predicted runtime of a task in seconds."""
+    p50: float
+    p95: float
+    samples: int
+    level: str  # task | class | model | global
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _class_keys(name: str, record: Optional[dict]) -> List[Tuple[str, str]]:
+    """(level, key) pairs for a run, most specific first."""
+    record = record or {}
+    model_hint = record.get("model_hint") or "sonnet"
+    tags = record.get("tags") or []
+    kind = record.get("skill") or (tags[0] if tags else (name.split("-")[0] if "-" in name else name))
+    return [
+        ("task", name),
+        ("class", f"{kind}/{model_hint}"),
+        ("model", model_hint),
+        ("global", ""),
+    ]
+
+
+def _task_record(task: Task) -> dict:
+    return {"tags": list(task.tags), "skill": task.skill, "model_hint": task.model_hint}
+
+
+class DurationModel:
+    """Empirical duration quantiles per task class with backoff."""
+
+    def __init__(self, min_samples: int = DEFAULT_MIN_SAMPLES):
+        self.min_samples = max(1, min_samples)
+        self._durations: Dict[Tuple[str, str], List[float]] = {}
+
+    @property
+    def samples(self) -> int:
+        return len(self._durations.get(("global", ""), []))
+
+    def add(self, name: str, record: Optional[dict], duration_s: float):
+        """Add one observed run."""
+        for key in _class_keys(name, record):
+            self._durations.setdefault(key, []).append(duration_s)
+
+    def predict(self, task: Task) -> Optional[DurationEstimate]:
+        """Predict runtime, or None if there is too little history."""
+        for level, key in _class_keys(task.name, _task_record(task)):
+            durations = self._durations.get((level, key), [])
+            if len(durations) >= self.min_samples:
+                return DurationEstimate(
+                    p50=percentile(durations, 50),
+                    p95=percentile(durations, 95),
+                    samples=len(durations),
+                    level=level,
+                )
+        return None
+
+    def timeout_for(
+        self,
+        task: Task,
+        margin: float = DEFAULT_MARGIN,
+        min_s: int = DEFAULT_MIN_TIMEOUT_S,
+        max_s: int = DEFAULT_MAX_TIMEOUT_S,
+    ) -> Optional[int]:
+        """
+        Adaptive timeout (p95 x margin, clamped), or None to keep the
+        task's declared timeout (too little history at task or class level).
+        """
+        estimate = self.predict(task)
+        if estimate is None or estimate.level not in TIMEOUT_LEVELS:
+            return None
+        return int(min(max_s, max(min_s, estimate.p95 * margin)))
+
+    @classmethod
+    def from_history(
+        cls,
+        logs_dir: Path,
+        load_tasks: Callable[[], Iterable[Task]] = None,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+    ) -> "DurationModel":
+        """
+        Build a model from the history stream (history.jsonl and its segments).
+
+        Entries without recorded features are matched to task files by
+        name through load_tasks (called only if such entries exist).
+        """
+        model = cls(min_samples)
+        tasks = None
+        for entry in LogStore(logs_dir).read("history"):
+            if not entry.get("success") and entry.get("error_type") != "timeout":
+                continue
+            duration = entry.get("duration_s")
+            if not duration or duration <= 0:
+                continue
+
+            name = entry.get("task_id", "")
+            record = entry.get("features")
+            if record is None and load_tasks is not None:
+                if tasks is None:
+                    tasks = {t.name: t for t in load_tasks()}
+                task = tasks.get(name)
+                record = _task_record(task) if task else None
+            model.add(name, record, duration)
+        return model
+
+
+if __name__ == "__main__":
+    from .log_utils import LOGS_DIR
+    from .executor import parse_timeout
+    from .task_queue import TaskQueue
+
+    queue = TaskQueue()
+    model = DurationModel.from_history(LOGS_DIR, queue.load_finished_tasks)
+    print(f"Runs: {model.samples}")
+    for task in queue.load_all():
+        est = model.predict(task)
+        if est:
+            print(f"  {task.name}: p50 {est.p50:.0f}s / p95 {est.p95:.0f}s ({est.level}, n={est.samples}), "
+                  f"timeout {model.timeout_for(task)}s vs {parse_timeout(task.timeout)}s")
@@ -3,23 +3,44 @@
 Task executor for cc-scheduler.
 
 Wraps omc/claude invocation with timeout handling and output capture.
-Delegates actual execution to claude CLI or omc skills.
+Delegates actual execution to claude CLI or omc skills. Processes are
+driven by asyncio, so several tasks can share one event loop.
 """
 
-import subprocess
+import asyncio
+import codecs
 import shutil
 import os
+import signal
+import threading
 import time
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 
 import requests
 
 from .tasks import Task, TASKS_DIR
+from .completed_index import append_completed_name
+from .log_utils import LOGS_DIR, run_log_path
+from .output_capture import OutputCapture
+from .run_id import is_run_id, new_run_id, run_id_time
+from .stream_events import LineParser, StreamEvent, TokenUsage, format_event, parser_for
 
 DESKTOP_CHECK_URL = "http://127.0.0.1:9229/json"
+WORKING_DIR = Path.home() / "brain"
+
+READ_CHUNK = 64 * 1024
+KILL_GRACE_S = 10  # Seconds between SIGTERM and SIGKILL on timeout
+
+# Serializes task file moves when tasks run concurrently (see run_pool)
+_MOVE_LOCK = threading.Lock()
+
+# Process groups of running tasks (leader pid -> stopped by terminate_running).
+# Each runs in its own session, so a terminal Ctrl-C does not reach it.
+_LIVE_GROUPS: Dict[int, bool] = {}
+_LIVE_LOCK = threading.Lock()
 
 @dataclass
 class ExecutionResult:
@@ -32,6 +53,14 @@ class ExecutionResult:
     ended_at: datetime
     duration_seconds: float
     error: Optional[str] = None
+    output_path: Optional[Path] = None  # Full output on disk (output is head/tail only)
+    output_chars: Optional[int] = None  # Size of the full output
+    usage: Optional[TokenUsage] = None  # Reported by the CLI stream, if any
+    cost_usd: Optional[float] = None
+    session_id: Optional[str] = None
+    tool_calls: int = 0
+    quota_exhausted: bool = False  # Backend quota hit; further tasks will fail too
+    run_id: Optional[str] = None
 
 
 def check_desktop_availability() -> bool:
@@ -57,7 +86,7 @@ def parse_timeout(timeout_str: str) -> int:
 
 def build_prompt(task: Task, backend: str = "code") -> str:
     """Build execution prompt from task with skill prefix."""
-    prompt = task.body
+    prompt = task.load_body()
 
     # Add mode-specific instructions
     if task.mode == "read-only":
@@ -119,7 +148,9 @@ def build_command(task: Task, prompt: str, backend: str = "code") -> list[str]:
         return cmd
 
     # Default: Claude Code CLI
-    cmd = ["claude", "-p", prompt, "--verbose", "--dangerously-skip-permissions"]
+    # stream-json (needs --verbose) gives usage, tool calls and errors as they happen
+    cmd = ["claude", "-p", prompt, "--verbose", "--output-format", "stream-json",
+           "--dangerously-skip-permissions"]
 
     # Model routing based on task.model_hint
     model_hint = getattr(task, 'model_hint', 'sonnet')
@@ -138,33 +169,24 @@ def build_command(task: Task, prompt: str, backend: str = "code") -> list[str]:
 
 def move_task(task: Task, from_status: str, to_status: str) -> Path:
     """Move task file between status directories."""
-    from_dir = TASKS_DIR / from_status
     to_dir = TASKS_DIR / to_status
-    to_dir.mkdir(parents=True, exist_ok=True)
-
     new_path = to_dir / task.path.name
 
-    # Idempotency: if source is already gone but destination exists, treat as success
-    if not task.path.exists() and new_path.exists():
-        return new_path
+    with _MOVE_LOCK:
+        to_dir.mkdir(parents=True, exist_ok=True)
 
-    shutil.move(str(task.path), str(new_path))
-    return new_path
+        # Idempotency: if source is already gone but destination exists, skip the move
+        if task.path.exists() or not new_path.exists():
+            shutil.move(str(task.path), str(new_path))
 
+        if to_status == "completed":
+            append_completed_name(to_dir, task.name)
 
-def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file: str = None, force_backend: str = None) -> ExecutionResult:
-    """
-    Execute a task using claude CLI or Gemini Desktop wrapper.
+    return new_path
 
-    Execution modes:
-    - autonomous: claude -p "prompt" --allowedTools ...
-    - plan-first: claude -p "prompt" (with planning instruction)
-    - read-only: claude -p "prompt" --allowedTools Read,Glob,Grep,WebSearch
-    """
-    started_at = datetime.now()
-    timeout_secs = parse_timeout(task.timeout)
 
-    # Determine backend
+def resolve_backend(task: Task, force_backend: str = None) -> str:
+    """Pick the backend for a run, falling back to code if Desktop is down."""
     backend = force_backend or getattr(task, 'backend', 'code')
 
     if backend == "auto":
@@ -178,12 +200,151 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
         print("Warning: Desktop backend requested but unavailable. Falling back to code.")
         backend = "code"
 
+    return backend
+
+
+async def _read_output(process: asyncio.subprocess.Process, capture: OutputCapture, parser: LineParser,
+                       stream_output: bool, on_event: Callable[[StreamEvent], None] = None):
+    """
+    Read process output until EOF, parsing events as lines complete.
+
+    The raw stream goes to the capture file; the excerpt kept in memory
+    (log and token estimates) is the rendered events (format_event).
+    A fatal event (quota exhausted) terminates the process group right
+    away; reading continues until the pipe closes.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    stopping = None
+
+    def handle(events):
+        nonlocal stopping
+        for event in events:
+            line = format_event(event)
+            if line is not None:
+                capture.add_text(line + "\n")
+                if stream_output:
+                    print(line, flush=True)
+            if on_event:
+                on_event(event)
+            if event.fatal and stopping is None:
+                stopping = asyncio.ensure_future(terminate_process(process))
+
+    while True:
+        data = await process.stdout.read(READ_CHUNK)
+        if not data:
+            break
+        chunk = decoder.decode(data)
+        capture.write_raw(chunk)
+        handle(parser.feed(chunk))
+    tail = decoder.decode(b"", final=True)
+    capture.write_raw(tail)
+    handle(parser.feed(tail) + parser.close())
+    if stopping:
+        await stopping
+
+
+def _stream_fields(parser: LineParser) -> dict:
+    """ExecutionResult fields taken from the parsed stream."""
+    summary = parser.summary
+    return {
+        "usage": summary.usage,
+        "cost_usd": summary.cost_usd,
+        "session_id": summary.session_id,
+        "tool_calls": sum(summary.tools.values()),
+        "quota_exhausted": summary.fatal,
+    }
+
+
+def _signal_group(pid: int, sig: int):
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def terminate_process(process: asyncio.subprocess.Process, grace_s: float = None):
+    """SIGTERM the process group, then SIGKILL it if it outlives the grace period."""
+    grace_s = KILL_GRACE_S if grace_s is None else grace_s
+    _signal_group(process.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), grace_s)
+    except asyncio.TimeoutError:
+        _signal_group(process.pid, signal.SIGKILL)
+        await process.wait()
+
+
+def terminate_running(grace_s: float = None):
+    """
+    Stop every running task (on an interrupt, from any thread).
+
+    SIGTERMs each task's process group, then SIGKILLs the groups whose
+    runs have not wrapped up after the grace period. The runs themselves
+    still finish normally, as failed with error "Interrupted".
+    """
+    grace_s = KILL_GRACE_S if grace_s is None else grace_s
+    with _LIVE_LOCK:
+        pids = list(_LIVE_GROUPS)
+        for pid in pids:
+            _LIVE_GROUPS[pid] = True
+    for pid in pids:
+        _signal_group(pid, signal.SIGTERM)
+
+    deadline = time.monotonic() + grace_s
+    while True:
+        with _LIVE_LOCK:
+            left = [pid for pid in pids if pid in _LIVE_GROUPS]
+        if not left or time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
+    for pid in left:
+        _signal_group(pid, signal.SIGKILL)
+
+
+async def execute_task_async(task: Task, dry_run: bool = False, run_id: str = None, log_file: str = None,
+                             force_backend: str = None, timeout_s: int = None,
+                             stream_output: bool = True, output_path: Path = None,
+                             on_event: Callable[[StreamEvent], None] = None) -> ExecutionResult:
+    """
+    Execute a task using claude CLI or Gemini Desktop wrapper.
+
+    Execution modes:
+    - autonomous: claude -p "prompt" --allowedTools ...
+    - plan-first: claude -p "prompt" (with planning instruction)
+    - read-only: claude -p "prompt" --allowedTools Read,Glob,Grep,WebSearch
+
+    timeout_s overrides the task's own timeout (e.g. an adaptive timeout
+    from the duration model). stream_output=False keeps output off the
+    terminal, for runs sharing it with other tasks.
+
+    Output is streamed to output_path when given; only its head and tail
+    are kept in memory and returned in ExecutionResult.output. It is
+    parsed as it arrives (see stream_events): on_event gets every event,
+    called from the thread running the event loop, and a quota error
+    stops the run early.
+
+    The process runs in its own session; on timeout its whole process
+    group gets SIGTERM, then SIGKILL after KILL_GRACE_S. Since a terminal
+    interrupt does not reach that session, callers stop running tasks
+    with terminate_running().
+
+    run_id defaults to a new one (see run_id), and log_file to the log
+    path derived from it.
+    """
+    started_at = datetime.now()
+    run_id = run_id or new_run_id()
+    log_file = log_file or str(run_log_path(run_id, task.name, LOGS_DIR))
+    timeout_secs = timeout_s or parse_timeout(task.timeout)
+
+    # Desktop probe is a blocking HTTP call
+    backend = await asyncio.to_thread(resolve_backend, task, force_backend)
+
     prompt = build_prompt(task, backend=backend)
 
     if dry_run:
         cmd = build_command(task, prompt, backend)
         return ExecutionResult(
             task_name=task.name,
+            run_id=run_id,
             success=True,
             exit_code=0,
             output=f"[DRY RUN] Would execute: {task.name}\nBackend: {backend}\nCommand: {' '.join(cmd[:6])}...\nSkill: {getattr(task, 'skill', None)}\nModel: {getattr(task, 'model_hint', 'sonnet')}\nPrompt: {prompt[:200]}...",
@@ -198,6 +359,7 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
     except Exception as e:
         return ExecutionResult(
             task_name=task.name,
+            run_id=run_id,
             success=False,
             exit_code=-1,
             output="",
@@ -209,19 +371,20 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
 
     # Build command with skill/model routing
     cmd = build_command(task, prompt, backend)
+    capture = OutputCapture(output_path)
+    parser = parser_for(backend)
+    process = None
 
     try:
         tool_name = "gemini" if backend == "desktop" else "claude"
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting {tool_name} process...")
-        
-        # Use Popen to stream output
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,  # Merge stderr into stdout
-            text=True,
-            bufsize=1,  # Line buffered
-            cwd=str(Path.home() / "brain"),
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting {tool_name} process for {task.name}...")
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,  # Merge stderr into stdout
+            cwd=str(WORKING_DIR),
+            start_new_session=True,  # Own process group, so timeouts reach grandchildren
             env={
                 **os.environ,
                 "CLAUDE_CODE_ENTRYPOINT": "ccq-scheduler",
@@ -232,55 +395,42 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
                 "CCQ_TASK_FILE": str(task.path),
             }
         )
+        with _LIVE_LOCK:
+            _LIVE_GROUPS[process.pid] = False
 
-        captured_output = []
-        
-        # Stream output while checking for timeout
-        start_time = time.time()
-        
-        # Set stdout to non-blocking
-        os.set_blocking(process.stdout.fileno(), False)
-        
-        while True:
-            # Check for timeout
-            if time.time() - start_time > timeout_secs:
-                process.kill()
-                raise subprocess.TimeoutExpired(cmd, timeout_secs, output="".join(captured_output).encode())
-            
-            # Check if process is still running
-            retcode = process.poll()
-            
-            # Read available output
+        reader = asyncio.ensure_future(_read_output(process, capture, parser, stream_output, on_event))
+        try:
+            await asyncio.wait_for(process.wait(), timeout_secs)
+        except asyncio.TimeoutError:
+            await terminate_process(process)
+            raise
+        finally:
+            # Drain what the process printed, even if it was killed
             try:
-                # Read up to 1KB
-                chunk = process.stdout.read(1024)
-                if chunk:
-                    print(chunk, end='', flush=True)
-                    captured_output.append(chunk)
-                elif retcode is not None:
-                    # Process finished and no more output
-                    break
-                else:
-                    # No output yet, sleep briefly
-                    time.sleep(0.1)
-            except Exception:
-                # Should not happen with os.set_blocking, but safe fallback
-                time.sleep(0.1)
+                await asyncio.wait_for(reader, KILL_GRACE_S)
+            except asyncio.TimeoutError:
+                pass
 
         result_code = process.returncode
         ended_at = datetime.now()
         success = result_code == 0
-        output = "".join(captured_output)
+        capture.close()
+        output = capture.text
+        with _LIVE_LOCK:
+            interrupted = _LIVE_GROUPS.get(process.pid, False)
 
-        # Detect Gemini quota exhaustion — fail fast, don't retry
+        # Quota exhaustion was caught in the stream — fail fast, don't retry
+        summary = parser.summary
         error_msg = None
-        if backend == "desktop" and "TerminalQuotaError" in output:
-            import re
-            reset_match = re.search(r'reset after (\d+h\d+m)', output)
-            reset_time = reset_match.group(1) if reset_match else "unknown"
-            print(f"\n[QUOTA EXHAUSTED] Gemini quota exhausted. Resets in {reset_time}. Stopping further tasks.")
+        if summary.fatal:
+            print(f"\n[QUOTA EXHAUSTED] {summary.error}. Stopping further tasks.")
+            success = False
+            error_msg = summary.error
+        elif interrupted:
             success = False
-            error_msg = f"Gemini quota exhausted. Resets in {reset_time}"
+            error_msg = "Interrupted"
+        elif not success and summary.error:
+            error_msg = summary.error
 
         # Move to completed or failed
         final_status = "completed" if success else "failed"
@@ -289,6 +439,7 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
 
         return ExecutionResult(
             task_name=task.name,
+            run_id=run_id,
             success=success,
             exit_code=result_code,
             output=output,
@@ -296,22 +447,29 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
             ended_at=ended_at,
             duration_seconds=(ended_at - started_at).total_seconds(),
             error=error_msg,
+            output_path=capture.path,
+            output_chars=capture.chars,
+            **_stream_fields(parser),
         )
 
-    except subprocess.TimeoutExpired as e:
+    except asyncio.TimeoutError:
         ended_at = datetime.now()
         task.path = TASKS_DIR / "active" / task.path.name
         move_task(task, "active", "failed")
 
         return ExecutionResult(
             task_name=task.name,
+            run_id=run_id,
             success=False,
             exit_code=-1,
-            output=e.stdout.decode() if e.stdout else "",
+            output=capture.text,
             started_at=started_at,
             ended_at=ended_at,
             duration_seconds=(ended_at - started_at).total_seconds(),
-            error=f"Task timed out after {timeout_secs}s"
+            error=f"Task timed out after {timeout_secs}s",
+            output_path=capture.path,
+            output_chars=capture.chars,
+            **_stream_fields(parser),
         )
 
     except Exception as e:
@@ -324,15 +482,68 @@ def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file
 
         return ExecutionResult(
             task_name=task.name,
+            run_id=run_id,
             success=False,
             exit_code=-1,
-            output="",
+            output=capture.text,
             started_at=started_at,
             ended_at=ended_at,
             duration_seconds=(ended_at - started_at).total_seconds(),
-            error=str(e)
+            error=str(e),
+            output_path=capture.path,
+            output_chars=capture.chars,
+            **_stream_fields(parser),
         )
 
+    finally:
+        capture.close()
+        if process is not None:
+            with _LIVE_LOCK:
+                _LIVE_GROUPS.pop(process.pid, None)
+
+
+def interrupted_result(task: Task, run_id: str = None) -> ExecutionResult:
+    """
+    Failed result for a run abandoned on an interrupt before it reported.
+
+    The task file is moved to failed from wherever the run left it
+    (pending, or active once the process had started).
+    """
+    started_at = run_id_time(run_id) if is_run_id(run_id) else datetime.now()
+    active_path = TASKS_DIR / "active" / task.path.name
+    if not task.path.exists() and active_path.exists():
+        task.path = active_path
+    if task.path.exists():
+        move_task(task, "active" if task.path == active_path else "pending", "failed")
+
+    ended_at = datetime.now()
+    return ExecutionResult(
+        task_name=task.name,
+        run_id=run_id,
+        success=False,
+        exit_code=-1,
+        output="",
+        started_at=started_at,
+        ended_at=ended_at,
+        duration_seconds=(ended_at - started_at).total_seconds(),
+        error="Interrupted",
+    )
+
+
+def execute_task(task: Task, dry_run: bool = False, run_id: str = None, log_file: str = None, force_backend: str = None,
+                 timeout_s: int = None, stream_output: bool = True, output_path: Path = None,
+                 on_event: Callable[[StreamEvent], None] = None) -> ExecutionResult:
+    """Blocking wrapper around execute_task_async (one event loop per call)."""
+    return asyncio.run(execute_task_async(
+        task, dry_run=dry_run, run_id=run_id, log_file=log_file, force_backend=force_backend,
+        timeout_s=timeout_s, stream_output=stream_output, output_path=output_path, on_event=on_event,
+    ))
+
+
+async def execute_tasks_async(tasks: List[Task], **kwargs) -> List[ExecutionResult]:
+    """Run several tasks concurrently in one event loop; results in task order."""
+    return list(await asyncio.gather(*(execute_task_async(task, **kwargs) for task in tasks)))
+
 
 if __name__ == "__main__":
     from .tasks import load_pending_tasks
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+YAML frontmatter parser for cc-scheduler task files.
+
+Reads only the header of a file (up to the closing ---), so scanning a
+queue never loads task bodies. Supports the YAML subset used in task
+files:
+- scalars: strings (plain, 'single', "double"), ints, floats, booleans,
+  null, ISO dates and datetimes
+- flow lists and maps: [a, "b, c"], {key: value}
+- block lists and nested maps by indentation, including lists of maps
+- block scalars (| and >)
+- comments
+"""
+
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+DELIMITER = "---"
+
+_INT_RE = re.compile(r"^[-+]?\d+$")
+_FLOAT_RE = re.compile(r"^[-+]?(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+# key: value, where the colon is followed by whitespace or end of line
+_KEY_RE = re.compile(r"^([^\s#'\"][^:]*?|'[^']*'|\"[^\"]*\")\s*:(?:\s+|$)(.*)$")
+_COMMENT_RE = re.compile(r"\s+#.*$")
+
+_NULLS = {"", "~", "null", "Null", "NULL"}
+_TRUE = {"true", "True", "TRUE"}
+_FALSE = {"false", "False", "FALSE"}
+
+
+class FrontmatterError(ValueError):
+    """Raised for frontmatter the subset parser cannot handle."""
+
+
+# =============================================================================
+# File access
+# =============================================================================
+
+def read_header(path: Path) -> Tuple[dict, int]:
+    """
+    Parse the frontmatter of a file without reading its body.
+
+    Returns (metadata, body_offset). A file without frontmatter (or with
+    an unterminated header) yields ({}, 0).
+    """
+    with open(path, "rb") as f:
+        first = f.readline()
+        if first.strip() != DELIMITER.encode():
+            return {}, 0
+
+        header = []
+        for line in f:
+            if line.strip() == DELIMITER.encode():
+                return parse_yaml(b"".join(header).decode("utf-8")), f.tell()
+            header.append(line)
+
+    return {}, 0
+
+
+def read_body(path: Path) -> str:
+    """Read the body of a task file (everything after the frontmatter)."""
+    _, offset = read_header(path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read().decode("utf-8").strip()
+
+
+def split_frontmatter(content: str) -> Tuple[dict, str]:
+    """Split already-loaded file content into (metadata, body)."""
+    lines = content.split("\n")
+    if not lines or lines[0].strip() != DELIMITER:
+        return {}, content
+
+    for i in range(1, len(lines)):
+        if lines[i].strip() == DELIMITER:
+            meta = parse_yaml("\n".join(lines[1:i]))
+            return meta, "\n".join(lines[i + 1:]).strip()
+
+    return {}, content
+
+
+# =============================================================================
+# YAML subset
+# =============================================================================
+
+def parse_yaml(text: str) -> dict:
+    """Parse a YAML mapping in the supported subset."""
+    parser = _BlockParser(text)
+    result = parser.parse_block(0)
+    if result is None:
+        return {}
+    if not isinstance(result, dict):
+        raise FrontmatterError("Frontmatter must be a mapping")
+    return result
+
+
+def parse_scalar(raw: str) -> Any:
+    """Parse a single inline value (scalar or flow collection)."""
+    value = raw.strip()
+    if not value:
+        return None
+
+    if value[0] in "[{":
+        # Text that only looks like a flow collection (e.g. "[Errno 2] ...")
+        # is kept as a plain string rather than failing the whole header
+        try:
+            parsed, end = _parse_flow(value, 0)
+        except FrontmatterError:
+            return value
+        if value[end:].strip() and not value[end:].strip().startswith("#"):
+            return value
+        return parsed
+
+    if value[0] in "'\"":
+        parsed, end = _parse_quoted(value, 0)
+        return parsed
+
+    value = _COMMENT_RE.sub("", value)
+    return _resolve_plain(value)
+
+
+def _resolve_plain(value: str) -> Any:
+    if value in _NULLS:
+        return None
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    if _INT_RE.match(value):
+        return int(value)
+    if _FLOAT_RE.match(value):
+        return float(value)
+    if _DATE_RE.match(value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    if _DATETIME_RE.match(value):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _parse_quoted(text: str, pos: int) -> Tuple[str, int]:
+    """Parse a quoted string starting at text[pos]. Returns (value, end)."""
+    quote = text[pos]
+    out = []
+    i = pos + 1
+    while i < len(text):
+        ch = text[i]
+        if quote == "'" and ch == "'":
+            if text[i + 1:i + 2] == "'":
+                out.append("'")
+                i += 2
+                continue
+            return "".join(out), i + 1
+        if quote == '"' and ch == "\\" and i + 1 < len(text):
+            nxt = text[i + 1]
+            out.append({"n": "\n", "t": "\t", '"': '"', "\\": "\\"}.get(nxt, "\\" + nxt))
+            i += 2
+            continue
+        if quote == '"' and ch == '"':
+            return "".join(out), i + 1
+        out.append(ch)
+        i += 1
+    raise FrontmatterError(f"Unterminated quoted string: {text[pos:]!r}")
+
+
+def _parse_flow(text: str, pos: int) -> Tuple[Any, int]:
+    """Parse a flow list/map starting at text[pos]. Returns (value, end)."""
+    opener = text[pos]
+    closer = "]" if opener == "[" else "}"
+    items: List[Any] = []
+    mapping = {}
+    i = pos + 1
+
+    while True:
+        while i < len(text) and text[i] in " \t":
+            i += 1
+        if i >= len(text):
+            raise FrontmatterError(f"Unterminated flow collection: {text[pos:]!r}")
+        if text[i] == closer:
+            return (items if opener == "[" else mapping), i + 1
+
+        # One entry: nested flow, quoted, or plain up to , or closer
+        if text[i] in "[{":
+            value, i = _parse_flow(text, i)
+        elif text[i] in "'\"":
+            value, i = _parse_quoted(text, i)
+        else:
+            start = i
+            while i < len(text) and text[i] not in ",]}":
+                if opener == "{" and text[i] == ":" and text[i + 1:i + 2] in (" ", ""):
+                    break
+                i += 1
+            value = _resolve_plain(text[start:i].strip())
+
+        while i < len(text) and text[i] in " \t":
+            i += 1
+
+        if opener == "{":
+            if i >= len(text) or text[i] != ":":
+                raise FrontmatterError(f"Expected ':' in flow map: {text[pos:]!r}")
+            key = str(value)
+            i += 1
+            while i < len(text) and text[i] in " \t":
+                i += 1
+            if i >= len(text):
+                raise FrontmatterError(f"Unterminated flow collection: {text[pos:]!r}")
+            if text[i] in "[{":
+                value, i = _parse_flow(text, i)
+            elif text[i] in "'\"":
+                value, i = _parse_quoted(text, i)
+            else:
+                start = i
+                while i < len(text) and text[i] not in ",}":
+                    i += 1
+                value = _resolve_plain(text[start:i].strip())
+            mapping[key] = value
+            while i < len(text) and text[i] in " \t":
+                i += 1
+        else:
+            items.append(value)
+
+        if i < len(text) and text[i] == ",":
+            i += 1
+
+
+class _BlockParser:
+    """Indentation-based parser for block mappings and lists."""
+
+    def __init__(self, text: str):
+        self.lines = text.replace("\t", "    ").split("\n")
+        self.i = 0
+
+    def _peek(self) -> Optional[Tuple[int, str]]:
+        """Skip blank/comment lines; return (indent, content) of the next line."""
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                return len(line) - len(line.lstrip(" ")), stripped
+            self.i += 1
+        return None
+
+    def parse_block(self, indent: int) -> Any:
+        nxt = self._peek()
+        if nxt is None or nxt[0] < indent:
+            return None
+        block_indent, content = nxt
+        if content == "-" or content.startswith("- "):
+            return self._parse_list(block_indent)
+        return self._parse_map(block_indent)
+
+    def _parse_map(self, indent: int) -> dict:
+        result = {}
+        while True:
+            nxt = self._peek()
+            if nxt is None or nxt[0] < indent:
+                return result
+            line_indent, content = nxt
+            if line_indent > indent:
+                raise FrontmatterError(f"Unexpected indentation: {content!r}")
+            if content == "-" or content.startswith("- "):
+                return result
+
+            match = _KEY_RE.match(content)
+            if not match:
+                raise FrontmatterError(f"Expected 'key: value': {content!r}")
+            key = match.group(1).strip()
+            if key[0] in "'\"":
+                key = _parse_quoted(key, 0)[0]
+            rest = match.group(2).strip()
+            self.i += 1
+
+            if rest[:1] in ("|", ">"):
+                result[key] = self._parse_block_scalar(indent, rest)
+            elif rest and not rest.startswith("#"):
+                result[key] = parse_scalar(rest)
+            else:
+                # Nested block: deeper indent, or a list at the same indent
+                nested = self._peek()
+                if nested and (
+                    nested[0] > indent
+                    or (nested[0] == indent and (nested[1] == "-" or nested[1].startswith("- ")))
+                ):
+                    result[key] = self.parse_block(nested[0])
+                else:
+                    result[key] = None
+
+    def _parse_list(self, indent: int) -> list:
+        result = []
+        while True:
+            nxt = self._peek()
+            if nxt is None or nxt[0] != indent:
+                return result
+            _, content = nxt
+            if not (content == "-" or content.startswith("- ")):
+                return result
+
+            item = content[1:].strip()
+            if not item or item.startswith("#"):
+                self.i += 1
+                result.append(self.parse_block(indent + 1))
+            elif item[0] not in "'\"[{" and _KEY_RE.match(item):
+                # "- key: value" starts a map; re-read it as a map line
+                self.lines[self.i] = " " * (indent + 2) + item
+                result.append(self._parse_map(indent + 2))
+            else:
+                self.i += 1
+                result.append(parse_scalar(item))
+
+    def _parse_block_scalar(self, indent: int, header: str) -> str:
+        folded = header.startswith(">")
+        keep_trailing = "+" in header
+        strip_trailing = "-" in header
+
+        block = []
+        block_indent = None
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if line.strip():
+                line_indent = len(line) - len(line.lstrip(" "))
+                if line_indent <= indent:
+                    break
+                if block_indent is None:
+                    block_indent = line_indent
+                block.append(line[block_indent:])
+            else:
+                block.append("")
+            self.i += 1
+
+        while block and not block[-1] and not keep_trailing:
+            block.pop()
+
+        if folded:
+            text = ""
+            for line in block:
+                if not line:
+                    text += "\n"
+                elif text and not text.endswith("\n"):
+                    text += " " + line
+                else:
+                    text += line
+        else:
+            text = "\n".join(block)
+
+        return text if strip_trailing else text + "\n"
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Usage ledger for cc-scheduler.
+
+Append-only record of token usage in a SQLite database (WAL mode) under
+.omc/state/. Budget queries are indexed aggregations over the ledger
+instead of rewrites of JSON files, and concurrent ccq processes can
+record usage safely.
+
+Tables:
+- usage: one row per recorded task run or user-directed usage
+- sessions / session_usage: scheduler sessions and what they ran
+- cost_models: learned token estimates per task type
+
+Views: daily_usage, weekly_usage, task_usage.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+LEDGER_FILENAME = "usage-ledger.db"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    day TEXT NOT NULL,
+    week_start TEXT NOT NULL,
+    task TEXT,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    percent REAL NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'task'  -- task | estimate | user_directed | legacy
+);
+CREATE INDEX IF NOT EXISTS usage_day ON usage(day);
+CREATE INDEX IF NOT EXISTS usage_week ON usage(week_start);
+CREATE INDEX IF NOT EXISTS usage_task ON usage(task);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    daily_allocation REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS session_usage (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    task TEXT,
+    percent REAL NOT NULL DEFAULT 0,
+    ts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_usage_session ON session_usage(session_id);
+
+CREATE TABLE IF NOT EXISTS cost_models (
+    task_type TEXT PRIMARY KEY,
+    avg_tokens INTEGER NOT NULL,
+    samples INTEGER NOT NULL
+);
+
+CREATE VIEW IF NOT EXISTS daily_usage AS
+    SELECT day,
+           SUM(CASE WHEN source != 'user_directed' THEN percent ELSE 0 END) AS percent,
+           SUM(tokens) AS tokens,
+           SUM(CASE WHEN source = 'task' THEN 1 ELSE 0 END) AS runs
+    FROM usage GROUP BY day;
+
+CREATE VIEW IF NOT EXISTS weekly_usage AS
+    SELECT week_start,
+           SUM(CASE WHEN source != 'user_directed' THEN percent ELSE 0 END) AS scheduled_percent,
+           SUM(CASE WHEN source = 'user_directed' THEN percent ELSE 0 END) AS user_directed_percent,
+           SUM(tokens) AS tokens
+    FROM usage GROUP BY week_start;
+
+CREATE VIEW IF NOT EXISTS task_usage AS
+    SELECT task,
+           COUNT(*) AS runs,
+           SUM(tokens) AS tokens,
+           SUM(percent) AS percent,
+           MAX(ts) AS last_run
+    FROM usage WHERE source = 'task' GROUP BY task;
+"""
+
+
+def week_start_of(d: date) -> str:
+    """ISO date of the Monday of the week containing d."""
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+class UsageLedger:
+    """
+    SQLite-backed usage ledger.
+
+    Usage:
+        ledger = UsageLedger(path)
+        ledger.record_usage("task-name", 5000, 1.0)
+        ledger.day_percent("2026-03-02")
+    """
+
+    def __init__(self, path: Path, legacy_dir: Path = None):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; transactions are opened explicitly where needed
+        self._conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._init_schema(legacy_dir)
+
+    def _init_schema(self, legacy_dir: Optional[Path]):
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have created it while we waited for the lock
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for statement in SCHEMA.split(";"):
+                    if statement.strip():
+                        self._conn.execute(statement)
+                if legacy_dir is not None:
+                    self._import_legacy(legacy_dir)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _import_legacy(self, state_dir: Path):
+        """Import actuals, sessions and cost models from the old JSON files."""
+        weekly_file = state_dir / "weekly-budget.json"
+        if weekly_file.exists():
+            try:
+                weekly = json.loads(weekly_file.read_text())
+            except json.JSONDecodeError:
+                weekly = {}
+            week = weekly.get("week_start")
+            for day, alloc in weekly.get("daily_allocations", {}).items():
+                if not isinstance(alloc, dict):
+                    continue
+                entries = alloc.get("tasks_completed", [])
+                for entry in entries:
+                    self._insert_usage(
+                        entry.get("timestamp") or f"{day}T00:00:00", day, week_start_of(date.fromisoformat(day)),
+                        entry.get("name"), entry.get("tokens", 0), entry.get("percent", 0.0), "task",
+                    )
+                # Actuals not itemized in tasks_completed
+                untracked = alloc.get("actual_percent", 0) - sum(e.get("percent", 0) for e in entries)
+                if untracked > 1e-9:
+                    self._insert_usage(f"{day}T00:00:00", day, week_start_of(date.fromisoformat(day)),
+                                       None, 0, untracked, "legacy")
+            if week and weekly.get("user_directed_used"):
+                self._insert_usage(f"{week}T00:00:00", week, week, None, 0,
+                                   weekly["user_directed_used"], "user_directed")
+
+        session_file = state_dir / "session-budget.json"
+        if session_file.exists():
+            try:
+                session = json.loads(session_file.read_text())
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)",
+                    (session["session_id"], session["started_at"], session["daily_allocation"]),
+                )
+                for entry in session.get("tasks_executed", []):
+                    self._conn.execute(
+                        "INSERT INTO session_usage (session_id, task, percent, ts) VALUES (?, ?, ?, ?)",
+                        (session["session_id"], entry.get("name"), entry.get("percent", 0.0), entry.get("timestamp", "")),
+                    )
+            except (json.JSONDecodeError, KeyError):
+                pass
+
+        cost_file = state_dir / "cost-models.json"
+        if cost_file.exists():
+            try:
+                models = json.loads(cost_file.read_text())
+            except json.JSONDecodeError:
+                models = {}
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cost_models VALUES (?, ?, ?)",
+                [(k, v["avg_tokens"], v["samples"]) for k, v in models.items() if isinstance(v, dict)],
+            )
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # =========================================================================
+    # Recording
+    # =========================================================================
+
+    def _insert_usage(self, ts: str, day: str, week_start: str, task: Optional[str],
+                      tokens: int, percent: float, source: str):
+        self._conn.execute(
+            "INSERT INTO usage (ts, day, week_start, task, tokens, percent, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (ts, day, week_start, task, tokens, percent, source),
+        )
+
+    def record_usage(self, task_name: Optional[str], tokens: int, percent: float,
+                     source: str = "task", when: datetime = None):
+        """Append a usage row."""
+        when = when or datetime.now()
+        self._insert_usage(when.isoformat(), when.date().isoformat(), week_start_of(when.date()),
+                           task_name, tokens, percent, source)
+
+    def update_cost_model(self, task_type: str, tokens_used: int):
+        """Fold a sample into a task type's estimate (EMA: 0.7 * old + 0.3 * new)."""
+        self._conn.execute(
+            """
+            INSERT INTO cost_models (task_type, avg_tokens, samples) VALUES (?, ?, 1)
+            ON CONFLICT(task_type) DO UPDATE SET
+                avg_tokens = CAST(0.7 * avg_tokens + 0.3 * excluded.avg_tokens AS INTEGER),
+                samples = samples + 1
+            """,
+            (task_type, tokens_used),
+        )
+
+    def start_session(self, session_id: str, started_at: str, daily_allocation: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (session_id, started_at, daily_allocation)
+        )
+
+    def record_session_usage(self, session_id: str, task_name: str, percent: float, when: datetime = None):
+        self._conn.execute(
+            "INSERT INTO session_usage (session_id, task, percent, ts) VALUES (?, ?, ?, ?)",
+            (session_id, task_name, percent, (when or datetime.now()).isoformat()),
+        )
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (in any process) commits to the ledger."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def day_percent(self, day: str) -> float:
+        """Scheduled usage on a day, in percent."""
+        row = self._conn.execute("SELECT percent FROM daily_usage WHERE day = ?", (day,)).fetchone()
+        return row[0] if row and row[0] else 0.0
+
+    def daily_percents(self, week_start: str) -> Dict[str, float]:
+        """Scheduled usage per day of a week."""
+        end = (date.fromisoformat(week_start) + timedelta(days=7)).isoformat()
+        return {
+            day: percent or 0.0
+            for day, percent in self._conn.execute(
+                "SELECT day, percent FROM daily_usage WHERE day >= ? AND day < ?", (week_start, end)
+            )
+        }
+
+    def week_usage(self, week_start: str) -> Dict[str, float]:
+        """Scheduled and user-directed usage for a week, in percent."""
+        row = self._conn.execute(
+            "SELECT scheduled_percent, user_directed_percent, tokens FROM weekly_usage WHERE week_start = ?",
+            (week_start,),
+        ).fetchone()
+        scheduled, user_directed, tokens = row or (0.0, 0.0, 0)
+        return {
+            "scheduled_percent": scheduled or 0.0,
+            "user_directed_percent": user_directed or 0.0,
+            "tokens": tokens or 0,
+        }
+
+    def day_entries(self, day: str) -> List[dict]:
+        """Task usage rows for a day, oldest first."""
+        return [
+            {"name": task, "tokens": tokens, "percent": percent, "timestamp": ts}
+            for task, tokens, percent, ts in self._conn.execute(
+                "SELECT task, tokens, percent, ts FROM usage WHERE day = ? AND source = 'task' ORDER BY id",
+                (day,),
+            )
+        ]
+
+    def task_usage(self, task_name: str) -> Optional[dict]:
+        """Aggregate usage for one task."""
+        row = self._conn.execute(
+            "SELECT runs, tokens, percent, last_run FROM task_usage WHERE task = ?", (task_name,)
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("runs", "tokens", "percent", "last_run"), row))
+
+    def cost_models(self) -> Dict[str, dict]:
+        """All learned cost estimates."""
+        return {
+            task_type: {"avg_tokens": avg, "samples": samples}
+            for task_type, avg, samples in self._conn.execute("SELECT task_type, avg_tokens, samples FROM cost_models")
+        }
+
+    def cost_model(self, task_type: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT avg_tokens, samples FROM cost_models WHERE task_type = ?", (task_type,)
+        ).fetchone()
+        return {"avg_tokens": row[0], "samples": row[1]} if row else None
+
+    def latest_session(self) -> Optional[dict]:
+        """Most recently started session with its usage."""
+        row = self._conn.execute(
+            "SELECT session_id, started_at, daily_allocation FROM sessions ORDER BY started_at DESC LIMIT 1"
+        ).fetchone()
+        if not row:
+            return None
+        session_id, started_at, daily_allocation = row
+        executed = [
+            {"name": task, "percent": percent, "timestamp": ts}
+            for task, percent, ts in self._conn.execute(
+                "SELECT task, percent, ts FROM session_usage WHERE session_id = ? ORDER BY id", (session_id,)
+            )
+        ]
+        return {
+            "session_id": session_id,
+            "started_at": started_at,
+            "daily_allocation": daily_allocation,
+            "used_percent": sum(e["percent"] for e in executed),
+            "tasks_executed": executed,
+        }
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Scheduler log storage.
+
+logs/scheduler/ layout:
+- YYYY/MM/<timestamp>-<task>-<run_id>.md: one markdown log per run (plus its
+  .output.log), partitioned by month so no directory grows forever
+- index.jsonl, history.jsonl: the current month's entries (hot files)
+- segments/<stream>-YYYY-MM.jsonl.gz: older months, gzip-compressed
+- manifest.json: per segment, entry count, time span, task names and
+  status counts, so queries skip segments that cannot match
+
+The hot file of a stream is rolled into segments by the first append
+of a new month. A flat pre-partitioning index/history is split into
+monthly segments the same way. Readers (read, tail, count) span the
+segments and the hot file, oldest first.
+"""
+
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+from .run_id import run_id_time
+
+TAIL_BLOCK = 64 * 1024  # Bytes read per step when reading a file backwards
+
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "segments"
+
+# stream -> (timestamp field, task field)
+STREAMS = {
+    "index": ("started", "task"),
+    "history": ("timestamp", "task_id"),
+}
+
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    """Yield entries of a .jsonl (or .jsonl.gz) file, skipping blank and corrupt lines."""
+    if not path.exists():
+        return
+    with (gzip.open(path, "rt") if path.suffix == ".gz" else open(path)) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def read_jsonl_tail(path: Path, n: int) -> List[dict]:
+    """
+    Last n entries of a .jsonl file, in file order.
+
+    Reads blocks backwards from the end until n entries are found, so the
+    cost depends on n, not on how long the file has grown.
+    """
+    if n <= 0 or not path.exists():
+        return []
+    entries = []
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        rest = b""  # Start of the line cut by the previous block
+        while pos > 0 and len(entries) < n:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b"\n")
+            # The first piece may be a partial line unless we reached the start
+            rest = lines.pop(0) if pos > 0 else b""
+            for line in reversed(lines):
+                entry = parse_jsonl_line(line)
+                if entry is not None:
+                    entries.append(entry)
+                    if len(entries) == n:
+                        break
+    entries.reverse()
+    return entries
+
+
+def parse_jsonl_line(line: bytes) -> Optional[dict]:
+    """Entry on one raw .jsonl line, or None for blank or corrupt lines."""
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def jsonl_offsets(path: Path) -> dict:
+    """
+    Entry count of a .jsonl file, kept in its .offsets sidecar.
+
+    The sidecar remembers the byte offset it has counted up to; only
+    lines appended since are scanned. A file that shrank or was replaced
+    is counted again from the start.
+    """
+    sidecar = path.with_name(path.name + ".offsets")
+    if not path.exists():
+        return {"size": 0, "inode": None, "count": 0}
+    st = path.stat()
+    try:
+        index = json.loads(sidecar.read_text())
+        if index.get("inode") != st.st_ino or index.get("size", 0) > st.st_size:
+            raise ValueError("file replaced")
+    except (OSError, ValueError):
+        index = {"size": 0, "inode": st.st_ino, "count": 0}
+
+    if index["size"] == st.st_size:
+        return index
+
+    with open(path, "rb") as f:
+        f.seek(index["size"])
+        pos = index["size"]
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Partial line still being written
+            if parse_jsonl_line(line) is not None:
+                index["count"] += 1
+            pos += len(line)
+    index["size"] = pos
+
+    try:
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        tmp.write_text(json.dumps(index))
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass  # Read-only logs dir: still correct, just not cached
+    return index
+
+
+def count_jsonl(path: Path) -> int:
+    """Number of entries in a .jsonl file (see jsonl_offsets)."""
+    return jsonl_offsets(path)["count"]
+
+
+def run_log_path(run_id: str, task_name: str, logs_dir: Path) -> Path:
+    """
+    Markdown log path of a run: YYYY/MM/<YYYY-MM-DD-HHMM>-<task>-<run_id>.md.
+
+    Derived from the run ID alone (its start time picks the partition),
+    so any process holding the ID finds the same file.
+    """
+    started_at = run_id_time(run_id)
+    return logs_dir / started_at.strftime("%Y") / started_at.strftime("%m") / \
+        f"{started_at.strftime('%Y-%m-%d-%H%M')}-{task_name}-{run_id}.md"
+
+
+def _month_of(entry: dict, stream: str) -> Optional[str]:
+    stamp = entry.get(STREAMS[stream][0])
+    return stamp[:7] if isinstance(stamp, str) and len(stamp) >= 7 else None
+
+
+def _status_of(entry: dict, stream: str) -> str:
+    if stream == "index":
+        return entry.get("status", "unknown")
+    return "completed" if entry.get("success") else "failed"
+
+
+def _bound(value: Union[str, date, datetime, None], end: bool = False) -> Optional[str]:
+    """ISO string bound for comparing against entry timestamps.
+
+    A date as upper bound covers the whole day (exclusive next-day bound).
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return (value + timedelta(days=1)).isoformat() if end else value.isoformat()
+    return value
+
+
+class LogStore:
+    """Month-partitioned index/history streams with compressed cold segments."""
+
+    def __init__(self, logs_dir: Path):
+        self.logs_dir = Path(logs_dir)
+
+    def hot_path(self, stream: str) -> Path:
+        return self.logs_dir / f"{stream}.jsonl"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.logs_dir / MANIFEST_FILE
+
+    def load_manifest(self) -> dict:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {"hot_month": {}, "segments": []}
+
+    def _save_manifest(self, manifest: dict):
+        tmp = self.manifest_path.with_name(MANIFEST_FILE + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.manifest_path)
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the streams across processes."""
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.logs_dir / ".store.lock", "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def segments(self, stream: str) -> List[dict]:
+        """Manifest records of a stream's segments, oldest first."""
+        return sorted(
+            (s for s in self.load_manifest()["segments"] if s["stream"] == stream),
+            key=lambda s: s["month"],
+        )
+
+    # -- Writing ---------------------------------------------------------
+
+    def append(self, stream: str, entry: dict, now: datetime = None):
+        """Append an entry, rolling the hot file first if a new month started."""
+        month = (now or datetime.now()).strftime("%Y-%m")
+        with self._locked():
+            manifest = self.load_manifest()
+            if manifest["hot_month"].get(stream) != month:
+                self._rotate(stream, month, manifest)
+            with open(self.hot_path(stream), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _rotate(self, stream: str, month: str, manifest: dict):
+        """Move hot entries from months other than month into segments."""
+        hot = self.hot_path(stream)
+        keep, old = [], {}
+        for entry in read_jsonl(hot):
+            entry_month = _month_of(entry, stream) or manifest["hot_month"].get(stream) or month
+            if entry_month == month:
+                keep.append(entry)
+            else:
+                old.setdefault(entry_month, []).append(entry)
+
+        for entry_month, entries in sorted(old.items()):
+            self._write_segment(stream, entry_month, entries, manifest)
+
+        if old:
+            tmp = hot.with_name(hot.name + ".tmp")
+            with open(tmp, "w") as f:
+                for entry in keep:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp, hot)
+
+        manifest["hot_month"][stream] = month
+        self._save_manifest(manifest)
+
+    def _write_segment(self, stream: str, month: str, entries: List[dict], manifest: dict):
+        """Add entries to a month's segment (a new gzip member if it exists)."""
+        name = f"{SEGMENTS_DIR}/{stream}-{month}.jsonl.gz"
+        path = self.logs_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "at") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+        record = next((s for s in manifest["segments"] if s["file"] == name), None)
+        if record is None:
+            record = {"stream": stream, "month": month, "file": name, "count": 0,
+                      "start": None, "end": None, "tasks": [], "statuses": {}}
+            manifest["segments"].append(record)
+
+        ts_field, task_field = STREAMS[stream]
+        stamps = [e[ts_field] for e in entries if isinstance(e.get(ts_field), str)]
+        if record["start"]:
+            stamps.append(record["start"])
+        if record["end"]:
+            stamps.append(record["end"])
+        tasks = set(record["tasks"])
+        for entry in entries:
+            if entry.get(task_field):
+                tasks.add(entry[task_field])
+            status = _status_of(entry, stream)
+            record["statuses"][status] = record["statuses"].get(status, 0) + 1
+        record["count"] += len(entries)
+        record["start"] = min(stamps) if stamps else None
+        record["end"] = max(stamps) if stamps else None
+        record["tasks"] = sorted(tasks)
+
+    # -- Reading ---------------------------------------------------------
+
+    def read(
+        self,
+        stream: str,
+        task: str = None,
+        status: str = None,
+        since: Union[str, date, datetime] = None,
+        until: Union[str, date, datetime] = None,
+    ) -> Iterator[dict]:
+        """Entries of a stream, oldest first, optionally filtered."""
+        ts_field, task_field = STREAMS[stream]
+        lo, hi = _bound(since), _bound(until, end=True)
+        exclusive_hi = isinstance(until, date) and not isinstance(until, datetime)
+
+        def matches(entry: dict) -> bool:
+            if task is not None and entry.get(task_field) != task:
+                return False
+            if status is not None and _status_of(entry, stream) != status:
+                return False
+            stamp = entry.get(ts_field) or ""
+            if lo is not None and stamp < lo:
+                return False
+            if hi is not None and (stamp >= hi if exclusive_hi else stamp > hi):
+                return False
+            return True
+
+        for segment in self.segments(stream):
+            if task is not None and task not in segment["tasks"]:
+                continue
+            if status is not None and not segment["statuses"].get(status):
+                continue
+            if lo is not None and segment["end"] and segment["end"] < lo:
+                continue
+            if hi is not None and segment["start"] and segment["start"] > hi:
+                continue
+            for entry in read_jsonl(self.logs_dir / segment["file"]):
+                if matches(entry):
+                    yield entry
+
+        for entry in read_jsonl(self.hot_path(stream)):
+            if matches(entry):
+                yield entry
+
+    def tail(self, stream: str, n: int) -> List[dict]:
+        """Last n entries of a stream, reaching into segments if the hot file is short."""
+        entries = read_jsonl_tail(self.hot_path(stream), n)
+        for segment in reversed(self.segments(stream)):
+            if len(entries) >= n:
+                break
+            older = list(read_jsonl(self.logs_dir / segment["file"]))
+            entries = older[-(n - len(entries)):] + entries
+        return entries
+
+    def count(self, stream: str) -> int:
+        """Number of entries in a stream."""
+        return sum(s["count"] for s in self.segments(stream)) + count_jsonl(self.hot_path(stream))
+
+    def signature(self) -> str:
+        """Changes whenever any stream changes (for caches built from the logs)."""
+        parts = []
+        for name in ("history.jsonl", "index.jsonl", MANIFEST_FILE):
+            try:
+                st = (self.logs_dir / name).stat()
+                parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+            except OSError:
+                parts.append(f"{name}:-")
+        return "|".join(parts)
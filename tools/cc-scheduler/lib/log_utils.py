@@ -2,17 +2,19 @@
 """
 Structured logging for cc-scheduler.
 
-Writes execution logs to brain/logs/scheduler/ in Obsidian-style markdown.
-Maintains an index.jsonl for machine-readable queries.
+Writes execution logs to brain/logs/scheduler/YYYY/MM/ in Obsidian-style
+markdown. Maintains index.jsonl for machine-readable queries, rolled by
+month into compressed segments (see log_store).
 """
 
-import json
-import os
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, Union
 from dataclasses import asdict
 
+from .log_store import LogStore, run_log_path, read_jsonl, read_jsonl_tail, count_jsonl
+from .run_id import new_run_id
+
 # Import locally to avoid circular
 # from .executor import ExecutionResult
 # from .capacity import Capacity
@@ -27,8 +29,13 @@ def ensure_logs_dir():
 
 
 def generate_run_id() -> str:
-    """Generate unique run ID."""
-    return datetime.now().strftime("run-%Y-%m-%d-%H%M%S")
+    """Generate unique, time-sortable run ID (see run_id)."""
+    return new_run_id()
+
+
+def output_path_for(log_file: str) -> Path:
+    """Where the full output of a run goes, next to its markdown log."""
+    return Path(log_file).with_suffix(".output.log")
 
 
 def log_execution(
@@ -43,18 +50,21 @@ def log_execution(
     capacity_before: Optional[dict] = None,
     capacity_after: Optional[dict] = None,
     error: Optional[str] = None,
+    output_path: Optional[Path] = None,
+    log_file: Optional[str] = None,
 ) -> Path:
     """
     Write execution log as markdown with YAML frontmatter.
 
+    If the full output was streamed to output_path, output is the
+    head/tail excerpt kept in memory and the log links to the file.
+    log_file is the path announced to the task (CCQ_LOG_FILE); by default
+    it is derived from run_id (see log_store.run_log_path).
+
     Returns path to log file.
     """
-    ensure_logs_dir()
-
-    # Generate filename
-    timestamp = started_at.strftime("%Y-%m-%d-%H%M")
-    filename = f"{timestamp}-{task_name}.md"
-    log_path = LOGS_DIR / filename
+    log_path = Path(log_file) if log_file else run_log_path(run_id, task_name, LOGS_DIR)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Build frontmatter
     frontmatter = {
@@ -78,6 +88,9 @@ def log_execution(
     if error:
         frontmatter["error"] = error
 
+    if output_path:
+        frontmatter["output_file"] = Path(output_path).name
+
     # Build markdown content
     content = "---\n"
     for key, value in frontmatter.items():
@@ -93,6 +106,8 @@ def log_execution(
         content += f"## Error\n\n```\n{error}\n```\n\n"
 
     content += "## Output\n\n"
+    if output_path:
+        content += f"Full output: [{Path(output_path).name}]({Path(output_path).name})\n\n"
     content += "```\n"
     # Truncate very long outputs
     if len(output) > 50000:
@@ -114,9 +129,7 @@ def log_execution(
 
 def append_to_index(entry: dict):
     """Append entry to index.jsonl for machine queries."""
-    index_path = LOGS_DIR / "index.jsonl"
-    with open(index_path, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    LogStore(LOGS_DIR).append("index", entry)
 
 
 def classify_error(success: bool, error: Optional[str], exit_code: int) -> Optional[str]:
@@ -132,9 +145,12 @@ def classify_error(success: bool, error: Optional[str], exit_code: int) -> Optio
     return "exception"
 
 
-def estimate_tokens(output: str) -> int:
-    """Rough token estimate from output length (~4 chars per token)."""
-    return len(output) // 4
+def estimate_tokens(output: str, chars: Optional[int] = None) -> int:
+    """Rough token estimate from output length (~4 chars per token).
+
+    chars overrides len(output) when output is only an excerpt.
+    """
+    return (len(output) if chars is None else chars) // 4
 
 
 def append_to_history(
@@ -145,6 +161,10 @@ def append_to_history(
     duration_s: float,
     log_file: str,
     timestamp: Optional[str] = None,
+    features: Optional[dict] = None,
+    usage=None,
+    token_source: Optional[str] = None,
+    run_id: Optional[str] = None,
 ) -> None:
     """
     Append minimal 6-field entry to history.jsonl for feedback loop.
@@ -152,11 +172,15 @@ def append_to_history(
     This is separate from index.jsonl - history.jsonl is specifically
     designed for self-improvement analysis with minimal fields:
     - task_id, success, error_type, tokens, duration_s, log_file
-    """
-    ensure_logs_dir()
-    history_path = LOGS_DIR / "history.jsonl"
 
+    features (task metadata from cost_model.task_features) is stored too
+    when given, so the cost model can train without the task file.
+    usage (a TokenUsage) adds the input/output/cache split, and
+    token_source says where tokens came from (see accounting). run_id
+    ties the entry to its index entry and markdown log.
+    """
     entry = {
+        "run_id": run_id,
         "task_id": task_id,
         "success": success,
         "error_type": error_type,
@@ -165,24 +189,22 @@ def append_to_history(
         "log_file": log_file,
         "timestamp": timestamp or datetime.now().isoformat(),
     }
+    if features is not None:
+        entry["features"] = features
+    if usage is not None:
+        entry["input_tokens"] = usage.input_tokens
+        entry["output_tokens"] = usage.output_tokens
+        entry["cache_creation_tokens"] = usage.cache_creation_tokens
+        entry["cache_read_tokens"] = usage.cache_read_tokens
+    if token_source is not None:
+        entry["token_source"] = token_source
 
-    with open(history_path, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    LogStore(LOGS_DIR).append("history", entry)
 
 
 def get_history_stats(n: int = 100) -> dict:
     """Get feedback loop statistics from history.jsonl."""
-    history_path = LOGS_DIR / "history.jsonl"
-    if not history_path.exists():
-        return {"total": 0, "success_rate": 0, "avg_tokens": 0, "avg_duration": 0, "error_types": {}}
-
-    entries = []
-    with open(history_path) as f:
-        for line in f:
-            if line.strip():
-                entries.append(json.loads(line))
-
-    entries = entries[-n:]  # Last n entries
+    entries = LogStore(LOGS_DIR).tail("history", n)
     if not entries:
         return {"total": 0, "success_rate": 0, "avg_tokens": 0, "avg_duration": 0, "error_types": {}}
 
@@ -211,24 +233,24 @@ def get_history_stats(n: int = 100) -> dict:
 
 def get_recent_logs(n: int = 10) -> list[dict]:
     """Read recent log entries from index."""
-    index_path = LOGS_DIR / "index.jsonl"
-    if not index_path.exists():
-        return []
+    return LogStore(LOGS_DIR).tail("index", n)
 
-    entries = []
-    with open(index_path) as f:
-        for line in f:
-            if line.strip():
-                entries.append(json.loads(line))
 
-    return entries[-n:]
+def query_runs(
+    task: str = None,
+    status: str = None,
+    since: Union[str, date, datetime] = None,
+    until: Union[str, date, datetime] = None,
+) -> list[dict]:
+    """Index entries matching task, status (completed/failed) and start time range."""
+    return list(LogStore(LOGS_DIR).read("index", task=task, status=status, since=since, until=until))
 
 
 def get_stats() -> dict:
-    """Get execution statistics."""
+    """Get execution statistics (rates over the last 100 runs, runs over all)."""
     entries = get_recent_logs(100)
     if not entries:
-        return {"total": 0, "success_rate": 0, "avg_duration": 0}
+        return {"total": 0, "runs": 0, "success_rate": 0, "avg_duration": 0}
 
     total = len(entries)
     successes = sum(1 for e in entries if e.get("status") == "completed")
@@ -236,6 +258,7 @@ def get_stats() -> dict:
 
     return {
         "total": total,
+        "runs": LogStore(LOGS_DIR).count("index"),
         "successes": successes,
         "failures": total - successes,
         "success_rate": round(successes / total * 100, 1) if total else 0,
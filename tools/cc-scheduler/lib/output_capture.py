@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bounded output capture for task runs.
+
+A run's output is written to disk as it arrives. Only the first
+head_chars and the last tail_chars are kept in memory, which is what
+the markdown log and error detection need. Memory per running task
+stays the same however much a --verbose run prints.
+
+For structured streams (claude stream-json) the raw stream goes to the
+file with write_raw() and the readable rendering is kept with
+add_text(), so the excerpt is text rather than JSON.
+"""
+
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_HEAD_CHARS = 25000
+DEFAULT_TAIL_CHARS = 25000
+
+
+class OutputCapture:
+    """
+    Tee process output to a file, keeping a head buffer and a tail ring buffer.
+
+    Usage:
+        with OutputCapture(path) as capture:
+            capture.write(chunk)
+        capture.text  # head + tail excerpt
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        head_chars: int = DEFAULT_HEAD_CHARS,
+        tail_chars: int = DEFAULT_TAIL_CHARS,
+    ):
+        self.path = Path(path) if path else None
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.chars = 0  # Total characters kept or skipped in memory (the text stream)
+        self._head = []
+        self._head_len = 0
+        self._tail = deque()
+        self._tail_len = 0
+        self._file = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, chunk: str):
+        """Append a chunk of output to both the file and the excerpt."""
+        self.write_raw(chunk)
+        self.add_text(chunk)
+
+    def write_raw(self, chunk: str):
+        """Append a chunk to the file only."""
+        if chunk and self._file:
+            self._file.write(chunk)
+
+    def add_text(self, chunk: str):
+        """Append a chunk to the in-memory excerpt only."""
+        if not chunk:
+            return
+        self.chars += len(chunk)
+
+        room = self.head_chars - self._head_len
+        if room > 0:
+            self._head.append(chunk[:room])
+            self._head_len += min(room, len(chunk))
+            chunk = chunk[room:]
+            if not chunk:
+                return
+
+        self._tail.append(chunk)
+        self._tail_len += len(chunk)
+        while self._tail_len > self.tail_chars:
+            excess = self._tail_len - self.tail_chars
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_len -= len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_len -= excess
+
+    @property
+    def truncated(self) -> bool:
+        return self.chars > self._head_len + self._tail_len
+
+    @property
+    def head(self) -> str:
+        return "".join(self._head)
+
+    @property
+    def tail(self) -> str:
+        return "".join(self._tail)
+
+    @property
+    def text(self) -> str:
+        """Whole output if it fit in the buffers, else head and tail around a marker."""
+        if not self.truncated:
+            return self.head + self.tail
+        skipped = self.chars - self._head_len - self._tail_len
+        return f"{self.head}\n\n... [truncated {skipped:,} chars] ...\n\n{self.tail}"
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "OutputCapture":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Optimizing session planner for cc-scheduler.
+
+Selects the set of tasks with the highest total score that fits the
+session token budget (0/1 knapsack). Token estimates are rounded up to
+buckets to keep the DP table small, so a plan never overshoots the
+budget. If a dependency graph is given, a task is only selected together
+with its pending dependencies, and the result is returned in dependency
+order.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .tasks import Task
+from .task_graph import TaskGraph
+
+DEFAULT_BUCKET_TOKENS = 1000
+DEFAULT_TIME_LIMIT_MS = 200
+
+
+class PlannerTimeout(Exception):
+    """Raised when the knapsack solver exceeds its time limit."""
+
+
+def _solve(
+    items: List[Tuple[Task, float]],
+    capacity: int,
+    bucket: int,
+    deadline: float,
+    cost: Callable[[Task], float],
+) -> List[int]:
+    """0/1 knapsack over bucketed weights. Returns selected item indexes."""
+    weights = [-(-max(int(cost(task)), 0) // bucket) for task, _ in items]  # ceil
+    slots = capacity // bucket
+
+    best = [0.0] * (slots + 1)
+    keep = []
+    for i, (_, value) in enumerate(items):
+        if time.monotonic() > deadline:
+            raise PlannerTimeout()
+        w = weights[i]
+        row = bytearray(slots + 1)
+        if value > 0 and w <= slots:
+            for c in range(slots, w - 1, -1):
+                candidate = best[c - w] + value
+                if candidate > best[c]:
+                    best[c] = candidate
+                    row[c] = 1
+        keep.append(row)
+
+    selected = []
+    c = slots
+    for i in range(len(items) - 1, -1, -1):
+        if keep[i][c]:
+            selected.append(i)
+            c -= weights[i]
+    return sorted(selected)
+
+
+def knapsack_select(
+    ranked: List[Tuple[Task, float]],
+    available_tokens: float,
+    graph: TaskGraph = None,
+    bucket_tokens: int = DEFAULT_BUCKET_TOKENS,
+    time_limit_ms: int = DEFAULT_TIME_LIMIT_MS,
+    cost: Callable[[Task], float] = None,
+) -> Optional[List[Task]]:
+    """
+    Pick the max-score subset of ranked (task, score) pairs that fits.
+
+    cost gives each task's token weight (estimated_tokens by default).
+    Returns None if the time limit is hit, so callers can fall back to
+    greedy packing.
+    """
+    cost = cost or (lambda task: task.estimated_tokens)
+    deadline = time.monotonic() + time_limit_ms / 1000
+    bucket = max(1, int(bucket_tokens))
+    capacity = int(available_tokens)
+    candidates = list(ranked)
+
+    def pending_deps(task: Task) -> Set[str]:
+        if graph is None:
+            return set()
+        return graph.deps.get(task.name, set())
+
+    try:
+        while True:
+            chosen = [candidates[i] for i in _solve(candidates, capacity, bucket, deadline, cost)]
+            names = {task.name for task, _ in chosen}
+
+            # Drop tasks whose pending dependencies didn't make the cut, then re-solve
+            orphans = {task.name for task, _ in chosen if not pending_deps(task) <= names}
+            if not orphans:
+                break
+            candidates = [(t, s) for t, s in candidates if t.name not in orphans]
+    except PlannerTimeout:
+        return None
+
+    if graph is None:
+        return [task for task, _ in chosen]
+
+    # Dependencies first, otherwise rank order. Tasks stuck in a cycle can
+    # never run and are dropped.
+    rank = {task.name: i for i, (task, _) in enumerate(chosen)}
+    by_name: Dict[str, Task] = {task.name: task for task, _ in chosen}
+    ordered = graph.topological_order(key=lambda name: rank.get(name, len(rank)))
+    order = [by_name[name] for name in ordered if name in by_name]
+    order += [task for task, _ in chosen if task.name not in graph.nodes]
+    return order
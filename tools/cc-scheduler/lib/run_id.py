@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Run identity for cc-scheduler.
+
+Run IDs are ULIDs: 48 bits of millisecond timestamp then 80 random
+bits, as 26 Crockford base32 characters. They sort by start time as
+plain strings. Within a process they are strictly increasing: an ID in
+the same millisecond as the previous one increments its random part.
+Parallel runs started in the same second therefore never share an ID,
+and the ID alone determines the run's log path (see log_store.run_log_path).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+ULID_LENGTH = 26
+_RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, 32)
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def new_run_id() -> str:
+    """New monotonic ULID."""
+    global _last_ms, _last_random
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _last_ms:
+            # Same (or earlier, if the clock stepped back) millisecond
+            ms = _last_ms
+            rand = _last_random + 1
+            if rand >> _RANDOM_BITS:
+                ms, rand = ms + 1, int.from_bytes(os.urandom(10), "big")
+        else:
+            rand = int.from_bytes(os.urandom(10), "big")
+        _last_ms, _last_random = ms, rand
+    return _encode(ms, 10) + _encode(rand, 16)
+
+
+def is_run_id(value: str) -> bool:
+    """Whether value looks like a ULID run ID."""
+    return isinstance(value, str) and len(value) == ULID_LENGTH and all(c in ALPHABET for c in value)
+
+
+def run_id_time(run_id: str) -> datetime:
+    """Local start time encoded in a run ID."""
+    if not is_run_id(run_id):
+        raise ValueError(f"Not a run ID: {run_id!r}")
+    ms = 0
+    for c in run_id[:10]:
+        ms = ms * 32 + ALPHABET.index(c)
+    return datetime.fromtimestamp(ms / 1000)
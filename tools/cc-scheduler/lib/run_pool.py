@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Concurrent task runner for cc-scheduler.
+
+Runs a session's tasks on a thread pool (the work is waiting on claude /
+gemini subprocesses, so threads are enough). Concurrency is limited per
+backend. Before a task starts, an admission check sees how many tokens
+the tasks already in flight have reserved, so live capacity and budget
+headroom are not over-committed.
+
+Dispatch and result handling happen on the calling thread: on_result
+callbacks (budget records, logs, queue updates) never run concurrently.
+If run_all is interrupted (Ctrl-C, or SIGTERM mapped to KeyboardInterrupt),
+the stop hook ends the runs in flight; their results are still handed
+to on_result, and runs that do not wrap up in time to on_abandon.
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from .tasks import Task
+
+R = TypeVar("R")
+
+DEFAULT_CONCURRENCY = 1
+INTERRUPT_DRAIN_S = 5  # Wait this long for stopped runs to report after an interrupt
+
+
+class RunPool:
+    """
+    Run tasks concurrently with per-backend limits and admission control.
+
+    Usage:
+        pool = RunPool(run_one, concurrency={"code": 2}, admit=check, estimate=tokens,
+                       stop=terminate_running)
+        pool.run_all(tasks, on_result=finish, on_skip=report)
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Task], R],
+        concurrency: Dict[str, int] = None,
+        default_concurrency: int = DEFAULT_CONCURRENCY,
+        admit: Callable[[Task, int], Tuple[bool, str]] = None,
+        estimate: Callable[[Task], int] = None,
+        backend_of: Callable[[Task], str] = None,
+        stop: Callable[[], None] = None,
+    ):
+        self.run = run
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = max(1, default_concurrency)
+        self.admit = admit
+        self.estimate = estimate or (lambda task: task.estimated_tokens)
+        self.backend_of = backend_of or (lambda task: task.backend)
+        self.stop = stop
+
+    def limit(self, backend: str) -> int:
+        """Maximum concurrent tasks for a backend."""
+        return max(1, self.concurrency.get(backend, self.default_concurrency))
+
+    def max_workers(self, tasks: List[Task]) -> int:
+        """Worker threads needed for a set of tasks."""
+        backends = {self.backend_of(t) for t in tasks}
+        return max(1, min(len(tasks), sum(self.limit(b) for b in backends)))
+
+    def run_all(
+        self,
+        tasks: List[Task],
+        on_result: Callable[[Task, R], None],
+        on_skip: Callable[[Task, str], None] = None,
+        on_start: Callable[[Task], None] = None,
+        on_abandon: Callable[[Task], None] = None,
+    ):
+        """
+        Run tasks in the given order as slots and admission allow.
+
+        A task whose dependencies are in the same batch waits for them and
+        is skipped if one of them fails or is skipped. A task that is not
+        admitted while others are running is retried after the next one
+        finishes; with nothing running it is skipped.
+
+        Every started task gets exactly one on_result, on_skip (runner
+        crashed) or, after an interrupt, on_abandon call.
+        """
+        on_skip = on_skip or (lambda task, reason: None)
+        batch = {t.name for t in tasks}
+        pending = list(tasks)
+        running: Dict[Future, Tuple[Task, int]] = {}
+        in_flight: Counter = Counter()
+        reserved = 0
+        succeeded: Set[str] = set()
+        blocked: Set[str] = set()
+
+        def skip(task: Task, reason: str):
+            pending.remove(task)
+            blocked.add(task.name)
+            on_skip(task, reason)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers(tasks))
+        interrupted = False
+        try:
+            while pending or running:
+                for task in list(pending):
+                    deps = [d for d in task.depends_on if d in batch]
+                    if any(d in blocked for d in deps):
+                        skip(task, "dependency did not complete")
+                        continue
+                    if any(d not in succeeded for d in deps):
+                        continue
+
+                    backend = self.backend_of(task)
+                    if in_flight[backend] >= self.limit(backend):
+                        continue
+
+                    ok, reason = self.admit(task, reserved) if self.admit else (True, "")
+                    if not ok:
+                        if not running:
+                            skip(task, reason)
+                        continue
+
+                    tokens = self.estimate(task)
+                    pending.remove(task)
+                    in_flight[backend] += 1
+                    reserved += tokens
+                    if on_start:
+                        on_start(task)
+                    running[pool.submit(self.run, task)] = (task, tokens)
+
+                if not running:
+                    # Nothing could start and nothing will finish to change that
+                    for task in list(pending):
+                        skip(task, "could not be scheduled")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, tokens = running.pop(future)
+                    in_flight[self.backend_of(task)] -= 1
+                    reserved -= tokens
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        blocked.add(task.name)
+                        on_skip(task, f"runner crashed: {e}")
+                        continue
+                    if getattr(result, "success", True):
+                        succeeded.add(task.name)
+                    else:
+                        blocked.add(task.name)
+                    on_result(task, result)
+        except BaseException:
+            interrupted = bool(running)
+            if running:
+                # Runs are in their own sessions and did not see an interrupt
+                if self.stop:
+                    self.stop()
+                self._wind_down(running, on_result, on_abandon)
+            raise
+        finally:
+            # Don't block on abandoned runs
+            pool.shutdown(wait=not interrupted, cancel_futures=True)
+
+    @staticmethod
+    def _wind_down(running: Dict[Future, Tuple[Task, int]], on_result: Callable[[Task, R], None],
+                   on_abandon: Callable[[Task], None] = None):
+        """Report stopped runs; those that do not report in time are abandoned."""
+        done, _ = wait(running, timeout=INTERRUPT_DRAIN_S)
+        for future, (task, _) in list(running.items()):
+            del running[future]
+            if future in done and future.exception() is None:
+                on_result(task, future.result())
+            elif on_abandon:
+                on_abandon(task)
+
+
+def quota_blocks(exhausted: Optional[str], task: Task, forced_backend: Optional[str] = None) -> bool:
+    """Whether the backend whose quota ran out this session (if any) is the one a task would use."""
+    return exhausted is not None and exhausted == (forced_backend or task.backend)
+
+
+def load_concurrency(config: dict) -> Dict[str, int]:
+    """Per-backend concurrency limits from the execution config section."""
+    return dict(config.get("execution", {}).get("concurrency", {}))
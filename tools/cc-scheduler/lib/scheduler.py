@@ -4,19 +4,26 @@ Smart scheduler for cc-scheduler.
 
 Handles:
 - Priority scoring with 5 factors
-- Session and week budget planning
+- Session and week budget planning (deadline- and dependency-aware)
 - Time window enforcement (autonomous/briefing/reserved phases)
 - Confidence-based routing
 """
 
+import heapq
 from dataclasses import dataclass
-from datetime import datetime, time, date
-from typing import Optional, List, Tuple
+from datetime import datetime, time, date, timedelta
+from typing import Iterator, Optional, List, Tuple
 from pathlib import Path
 
 from .tasks import Task
 from .budget import BudgetTracker
 from .capacity import Capacity
+from .task_graph import TaskGraph
+from .planner import knapsack_select, DEFAULT_BUCKET_TOKENS, DEFAULT_TIME_LIMIT_MS
+from .week_planner import WeekPlanner, WeekPlan
+from .cost_model import CostModel, DEFAULT_MIN_SAMPLES, DEFAULT_RIDGE_LAMBDA
+from . import duration_model
+from .duration_model import DurationModel
 
 
 @dataclass
@@ -40,6 +47,25 @@ class ScheduleConfig:
     weight_cost_efficiency: float = 30.0
     weight_project_boost: float = 20.0
     weight_dependency_penalty: float = 10.0
+    weight_unblock: float = 10.0
+
+    # Session planner: "greedy" or "knapsack"
+    planner_mode: str = "greedy"
+    planner_bucket_tokens: int = DEFAULT_BUCKET_TOKENS
+    planner_time_limit_ms: int = DEFAULT_TIME_LIMIT_MS
+
+    # Learned token estimates (cost_model.py) used for packing
+    cost_model_enabled: bool = False
+    cost_quantile: str = "p50"  # p50 | p75 | p90 | p95
+    cost_min_samples: int = DEFAULT_MIN_SAMPLES
+    cost_ridge_lambda: float = DEFAULT_RIDGE_LAMBDA
+
+    # Learned runtimes (duration_model.py) for timeouts and window fitting
+    duration_model_enabled: bool = False
+    duration_min_samples: int = duration_model.DEFAULT_MIN_SAMPLES
+    timeout_margin: float = duration_model.DEFAULT_MARGIN
+    min_timeout_s: int = duration_model.DEFAULT_MIN_TIMEOUT_S
+    max_timeout_s: int = duration_model.DEFAULT_MAX_TIMEOUT_S
 
     # Confidence thresholds
     confidence_auto_proceed: int = 90
@@ -53,6 +79,9 @@ class ScheduleConfig:
         budget = data.get("budget", {})
         weights = data.get("weights", {})
         confidence = data.get("confidence", {})
+        planner = data.get("planner", {})
+        cost_model = data.get("cost_model", {})
+        durations = data.get("duration_model", {})
 
         def parse_time(s: str) -> time:
             if not s:
@@ -90,6 +119,35 @@ class ScheduleConfig:
             config.weight_project_boost = weights["project_boost"]
         if "dependency_penalty" in weights:
             config.weight_dependency_penalty = weights["dependency_penalty"]
+        if "unblock" in weights:
+            config.weight_unblock = weights["unblock"]
+
+        if "mode" in planner:
+            config.planner_mode = planner["mode"]
+        if "bucket_tokens" in planner:
+            config.planner_bucket_tokens = planner["bucket_tokens"]
+        if "time_limit_ms" in planner:
+            config.planner_time_limit_ms = planner["time_limit_ms"]
+
+        if "enabled" in cost_model:
+            config.cost_model_enabled = cost_model["enabled"]
+        if "quantile" in cost_model:
+            config.cost_quantile = cost_model["quantile"]
+        if "min_samples" in cost_model:
+            config.cost_min_samples = cost_model["min_samples"]
+        if "ridge_lambda" in cost_model:
+            config.cost_ridge_lambda = cost_model["ridge_lambda"]
+
+        if "enabled" in durations:
+            config.duration_model_enabled = durations["enabled"]
+        if "min_samples" in durations:
+            config.duration_min_samples = durations["min_samples"]
+        if "timeout_margin" in durations:
+            config.timeout_margin = durations["timeout_margin"]
+        if "min_timeout_s" in durations:
+            config.min_timeout_s = durations["min_timeout_s"]
+        if "max_timeout_s" in durations:
+            config.max_timeout_s = durations["max_timeout_s"]
 
         if "auto_proceed" in confidence:
             config.confidence_auto_proceed = confidence["auto_proceed"]
@@ -110,11 +168,53 @@ class Scheduler:
         self.config = config or ScheduleConfig()
         self.budget = budget_tracker or BudgetTracker()
         self.project_boosts = {}  # project_name -> boost value
+        self.graph: Optional[TaskGraph] = None
+        self.cost_model: Optional[CostModel] = None
+        self._estimates: dict = {}  # task name -> predicted tokens
+        self.duration_model: Optional[DurationModel] = None
 
     def set_project_boosts(self, boosts: dict):
         """Set project priority boosts from config."""
         self.project_boosts = boosts
 
+    def set_task_graph(self, graph: TaskGraph):
+        """Set the dependency graph used for the unblock bonus."""
+        self.graph = graph
+
+    def set_cost_model(self, model: CostModel):
+        """Set the learned cost model used for token estimates."""
+        self.cost_model = model
+        self._estimates = {}
+
+    def set_duration_model(self, model: DurationModel):
+        """Set the learned duration model used for timeouts and window fitting."""
+        self.duration_model = model
+
+    def timeout_for(self, task: Task) -> Optional[int]:
+        """Adaptive timeout in seconds, or None to use the task's own timeout."""
+        if self.duration_model is None:
+            return None
+        return self.duration_model.timeout_for(
+            task,
+            margin=self.config.timeout_margin,
+            min_s=self.config.min_timeout_s,
+            max_s=self.config.max_timeout_s,
+        )
+
+    def estimate_tokens(self, task: Task) -> int:
+        """
+        Token estimate used for packing and budget checks.
+
+        The cost model's configured quantile once it has enough training
+        samples, otherwise the task's declared estimated_tokens.
+        """
+        model = self.cost_model
+        if model is None or model.samples < self.config.cost_min_samples:
+            return task.estimated_tokens
+        if task.name not in self._estimates:
+            self._estimates[task.name] = model.quantile(task, self.config.cost_quantile)
+        return self._estimates[task.name]
+
     # =========================================================================
     # Time Window Management
     # =========================================================================
@@ -138,12 +238,13 @@ class Scheduler:
         if self.config.autonomous_start <= current < self.config.autonomous_end:
             return "autonomous"
 
-        # Check briefing window (2 PM - 3 PM typically)
-        briefing_end = time(
-            self.config.briefing_time.hour + 1,
-            self.config.briefing_time.minute
-        )
-        if self.config.briefing_time <= current < briefing_end:
+        # Check briefing window (2 PM - 3 PM typically; may wrap past midnight)
+        briefing_start, briefing_end = self.config.briefing_time, self._briefing_end()
+        if briefing_start <= briefing_end:
+            in_briefing = briefing_start <= current < briefing_end
+        else:
+            in_briefing = current >= briefing_start or current < briefing_end
+        if in_briefing:
             return "briefing"
 
         # Check reserved window (8 PM - 8 AM)
@@ -172,6 +273,29 @@ class Scheduler:
         else:  # reserved
             return False, "Reserved for user - no autonomous tasks"
 
+    def _briefing_end(self) -> time:
+        """Briefing lasts an hour (wrapping past midnight for a 23:xx briefing)."""
+        return (datetime.combine(date.min, self.config.briefing_time) + timedelta(hours=1)).time()
+
+    def get_phase_end(self, phase: str, now: datetime = None) -> datetime:
+        """Get when the given phase ends (next occurrence after now)."""
+        if now is None:
+            now = datetime.now()
+
+        if phase == "autonomous":
+            end = self.config.autonomous_end
+        elif phase == "briefing":
+            end = self._briefing_end()
+        elif phase == "buffer":
+            end = self.config.reserved_start
+        else:
+            end = self.config.reserved_end
+
+        end_dt = datetime.combine(now.date(), end)
+        if end_dt <= now:
+            end_dt += timedelta(days=1)
+        return end_dt
+
     def get_phase_budget(self, phase: str) -> float:
         """Get budget allocation for a phase as fraction of daily."""
         if phase == "autonomous":
@@ -185,7 +309,7 @@ class Scheduler:
     # Priority Scoring
     # =========================================================================
 
-    def score_task(self, task: Task, capacity: Capacity = None) -> float:
+    def score_task(self, task: Task, capacity: Capacity = None, now: datetime = None) -> float:
         """
         Calculate priority score for a task.
 
@@ -195,74 +319,124 @@ class Scheduler:
         3. Cost efficiency (tokens vs value)
         4. Project boost (from config)
         5. Dependency penalty (blocked tasks score lower)
+        6. Unblock bonus (critical-path length, if a task graph is set)
 
         Returns score (higher = run sooner).
         """
-        score = 0.0
-
-        # 1. User priority (inverted: priority 1 -> score 100, priority 10 -> score 10)
-        priority_score = (11 - task.priority) * 10
-        score += priority_score * (self.config.weight_user_priority / 100)
-
-        # 2. Urgency (deadline proximity)
-        if task.deadline:
-            days_until = (task.deadline - datetime.now()).days
-            if days_until <= 0:
-                urgency_score = 100  # Overdue!
-            elif days_until <= 1:
-                urgency_score = 90
-            elif days_until <= 3:
-                urgency_score = 70
-            elif days_until <= 7:
-                urgency_score = 50
+        return self.score_tasks([task], capacity, now)[0]
+
+    def score_tasks(self, tasks: List[Task], capacity: Capacity = None, now: datetime = None) -> List[float]:
+        """
+        Score a batch of tasks in one columnar pass (see score_task for factors).
+
+        All tasks are scored against a single reference time, and the
+        weights and capacity checks are resolved once per batch.
+        """
+        if not tasks:
+            return []
+        now_ts = (now or datetime.now()).timestamp()
+        cfg = self.config
+
+        w_priority = cfg.weight_user_priority / 100
+        w_urgency = cfg.weight_urgency / 100
+        w_efficiency = cfg.weight_cost_efficiency / 100
+        w_boost = cfg.weight_project_boost / 100
+        w_deps = cfg.weight_dependency_penalty / 100
+        w_unblock = cfg.weight_unblock / 100
+        capacity_tight = bool(capacity and capacity.available_percent < 30)
+
+        # Columns
+        priorities = [t.priority for t in tasks]
+        deadline_days = [
+            (t.deadline.timestamp() - now_ts) // 86400 if t.deadline else None
+            for t in tasks
+        ]
+        tokens = [t.estimated_tokens for t in tasks]
+        boosts = [
+            self.project_boosts.get((getattr(t, 'project', None) or t.tags[0]) if t.tags else None, 0)
+            for t in tasks
+        ]
+        dep_counts = [len(t.depends_on) for t in tasks]
+        chains = [self.graph.critical_path_length(t.name) for t in tasks] if self.graph else None
+
+        scores = []
+        for i in range(len(tasks)):
+            # 1. User priority (inverted: priority 1 -> score 100, priority 10 -> score 10)
+            score = (11 - priorities[i]) * 10 * w_priority
+
+            # 2. Urgency (deadline proximity)
+            days = deadline_days[i]
+            if days is None:
+                urgency = 30  # No deadline = medium urgency
+            elif days <= 0:
+                urgency = 100  # Overdue!
+            elif days <= 1:
+                urgency = 90
+            elif days <= 3:
+                urgency = 70
+            elif days <= 7:
+                urgency = 50
             else:
-                urgency_score = 20
-        else:
-            urgency_score = 30  # No deadline = medium urgency
-        score += urgency_score * (self.config.weight_urgency / 100)
-
-        # 3. Cost efficiency (prefer smaller tasks when capacity is low)
-        if capacity and capacity.available_percent < 30:
-            # Boost smaller tasks when capacity is tight
-            if task.estimated_tokens < 30000:
-                efficiency_score = 80
-            elif task.estimated_tokens < 60000:
-                efficiency_score = 50
+                urgency = 20
+            score += urgency * w_urgency
+
+            # 3. Cost efficiency (prefer smaller tasks when capacity is tight)
+            if not capacity_tight:
+                efficiency = 50  # Neutral when capacity is fine
+            elif tokens[i] < 30000:
+                efficiency = 80
+            elif tokens[i] < 60000:
+                efficiency = 50
             else:
-                efficiency_score = 20
-        else:
-            efficiency_score = 50  # Neutral when capacity is fine
-        score += efficiency_score * (self.config.weight_cost_efficiency / 100)
+                efficiency = 20
+            score += efficiency * w_efficiency
+
+            # 4. Project boost
+            score += boosts[i] * w_boost
 
-        # 4. Project boost
-        project = getattr(task, 'project', None) or task.tags[0] if task.tags else None
-        if project and project in self.project_boosts:
-            score += self.project_boosts[project] * (self.config.weight_project_boost / 100)
+            # 5. Dependency penalty
+            score -= dep_counts[i] * 10 * w_deps
 
-        # 5. Dependency penalty
-        if task.depends_on:
-            # Penalize blocked tasks
-            score -= len(task.depends_on) * 10 * (self.config.weight_dependency_penalty / 100)
+            # 6. Unblock bonus (tasks at the head of long dependency chains go first)
+            if chains:
+                score += chains[i] * 10 * w_unblock
 
-        return max(0, score)
+            scores.append(max(0, score))
+
+        return scores
 
     def rank_tasks(self, tasks: List[Task], capacity: Capacity = None) -> List[Tuple[Task, float]]:
         """Rank tasks by priority score."""
-        scored = [(t, self.score_task(t, capacity)) for t in tasks]
-        return sorted(scored, key=lambda x: x[1], reverse=True)
+        scores = self.score_tasks(tasks, capacity)
+        order = sorted(range(len(tasks)), key=lambda i: -scores[i])
+        return [(tasks[i], scores[i]) for i in order]
 
-    def select_next_task(self, tasks: List[Task], capacity: Capacity = None) -> Optional[Task]:
-        """Select the highest-priority runnable task."""
-        if not tasks:
-            return None
+    def top_tasks(self, tasks: List[Task], k: int, capacity: Capacity = None) -> List[Tuple[Task, float]]:
+        """Top k tasks by score without sorting the whole list (same order as rank_tasks)."""
+        scores = self.score_tasks(tasks, capacity)
+        top = heapq.nsmallest(k, range(len(tasks)), key=lambda i: (-scores[i], i))
+        return [(tasks[i], scores[i]) for i in top]
 
-        ranked = self.rank_tasks(tasks, capacity)
+    def iter_ranked(self, tasks: List[Task], capacity: Capacity = None) -> Iterator[Tuple[Task, float]]:
+        """
+        Yield tasks in rank order lazily.
 
-        for task, score in ranked:
-            if task.is_runnable:
-                return task
+        Heapifies once (O(n)) and pops on demand, so callers that stop
+        early pay O(k log n) instead of a full sort.
+        """
+        scores = self.score_tasks(tasks, capacity)
+        heap = [(-score, i) for i, score in enumerate(scores)]
+        heapq.heapify(heap)
+        while heap:
+            _, i = heapq.heappop(heap)
+            yield tasks[i], scores[i]
 
-        return None
+    def select_next_task(self, tasks: List[Task], capacity: Capacity = None) -> Optional[Task]:
+        """Select the highest-priority runnable task."""
+        runnable = [t for t in tasks if t.is_runnable]
+        if not runnable:
+            return None
+        return self.top_tasks(runnable, 1, capacity)[0][0]
 
     # =========================================================================
     # Session Planning
@@ -272,7 +446,8 @@ class Scheduler:
         self,
         tasks: List[Task],
         capacity: Capacity,
-        phase: str = None
+        phase: str = None,
+        now: datetime = None,
     ) -> List[Task]:
         """
         Plan which tasks to run in this session.
@@ -282,6 +457,12 @@ class Scheduler:
         - Daily budget allocation
         - Phase budget (autonomous gets more than buffer)
         - Task priority scores
+        - Token estimates (learned cost model if set, see estimate_tokens)
+        - Wall-clock time left in the phase (if a duration model is set)
+
+        With planner mode "knapsack" the selection maximizes total score
+        within the token budget (dependencies kept together), falling back
+        to greedy packing if the solver exceeds its time limit.
         """
         if phase is None:
             phase = self.get_current_phase()
@@ -296,70 +477,120 @@ class Scheduler:
             phase_budget * 5000
         )
 
-        # Rank tasks
-        ranked = self.rank_tasks(tasks, capacity)
-
-        # Select tasks that fit
+        if self.config.planner_mode == "knapsack":
+            ranked = [(t, score) for t, score in self.rank_tasks(tasks, capacity) if t.is_runnable]
+            selected = knapsack_select(
+                ranked,
+                available_tokens,
+                graph=self.graph,
+                bucket_tokens=self.config.planner_bucket_tokens,
+                time_limit_ms=self.config.planner_time_limit_ms,
+                cost=self.estimate_tokens,
+            )
+            if selected is not None:
+                return self._fit_window(selected, phase, now)
+            print("Planner: knapsack exceeded time limit, falling back to greedy")
+
+        # Select tasks that fit, in rank order; stop once nothing else can fit
         selected = []
         tokens_planned = 0
+        smallest = min((self.estimate_tokens(t) for t in tasks), default=0)
+
+        for task, score in self.iter_ranked(tasks, capacity):
+            if available_tokens - tokens_planned < smallest:
+                break
 
-        for task, score in ranked:
             if not task.is_runnable:
                 continue
 
-            if tokens_planned + task.estimated_tokens <= available_tokens:
+            tokens = self.estimate_tokens(task)
+            if tokens_planned + tokens <= available_tokens:
                 selected.append(task)
-                tokens_planned += task.estimated_tokens
+                tokens_planned += tokens
 
-        return selected
+        return self._fit_window(selected, phase, now)
 
-    def plan_week(self, tasks: List[Task]) -> dict:
+    def _fit_window(self, selected: List[Task], phase: str, now: datetime = None) -> List[Task]:
         """
-        Plan task distribution across the week.
+        Drop tasks that would run past the end of the phase.
 
-        Returns dict of {date_str: [task_names]}.
+        Tasks run one after another, so their expected (p50) durations are
+        summed in order. A task is also dropped if one of its dependencies
+        was. Tasks without a prediction count as zero.
         """
-        from datetime import timedelta
+        if self.duration_model is None or not selected:
+            return selected
 
-        # Get weekly budget
-        weekly = self.budget.load_weekly_budget()
-        today = date.today()
+        now = now or datetime.now()
+        window = (self.get_phase_end(phase, now) - now).total_seconds()
 
-        # Rank all tasks
-        ranked = self.rank_tasks(tasks)
+        kept, dropped = [], set()
+        elapsed = 0.0
+        for task in selected:
+            if dropped.intersection(task.depends_on):
+                dropped.add(task.name)
+                continue
+            estimate = self.duration_model.predict(task)
+            duration = estimate.p50 if estimate else 0.0
+            if elapsed + duration > window:
+                dropped.add(task.name)
+                continue
+            kept.append(task)
+            elapsed += duration
+        return kept
 
-        plan = {}
-        task_queue = list(ranked)  # Copy
+    def week_days(self, now: datetime = None) -> List[Tuple[date, float]]:
+        """
+        Token capacity of each remaining day in the weekly budget.
 
+        Only the autonomous share of a day is plannable. Today gets what is
+        left of its allocation, limited to the buffer share once the
+        autonomous window has passed.
+        """
+        from datetime import timedelta
+
+        now = now or datetime.now()
+        today = now.date()
+        weekly = self.budget.load_weekly_budget()
+
+        days = []
         for day_offset in range(7):
             day = today + timedelta(days=day_offset)
-            day_str = day.isoformat()
-
-            if day_str not in weekly.daily_allocations:
+            alloc = weekly.daily_allocations.get(day.isoformat())
+            if alloc is None:
                 continue
 
-            alloc = weekly.daily_allocations[day_str]
             if hasattr(alloc, 'planned_percent'):
-                day_budget = alloc.planned_percent * 5000  # tokens
+                planned, actual = alloc.planned_percent, alloc.actual_percent
+            else:
+                planned, actual = alloc.get('planned_percent', 0), alloc.get('actual_percent', 0)
+
+            if day == today:
+                share = (self.config.budget_autonomous if now.time() < self.config.autonomous_end
+                         else self.config.budget_buffer)
+                tokens = max(0.0, planned - actual) * 5000 * share
             else:
-                day_budget = alloc.get('planned_percent', 0) * 5000
+                tokens = planned * 5000 * self.config.budget_autonomous
+            days.append((day, tokens))
+        return days
 
-            day_tasks = []
-            day_tokens = 0
+    def plan_week_detailed(self, tasks: List[Task], now: datetime = None) -> WeekPlan:
+        """
+        Plan tasks across the week's days with deadlines and dependencies.
 
-            # Assign tasks to this day
-            remaining = []
-            for task, score in task_queue:
-                if day_tokens + task.estimated_tokens <= day_budget:
-                    day_tasks.append(task.name)
-                    day_tokens += task.estimated_tokens
-                else:
-                    remaining.append((task, score))
+        The returned WeekPlan can be updated with mark_completed() as tasks
+        finish instead of planning again from scratch.
+        """
+        planner = WeekPlanner(self.week_days(now), graph=self.graph, estimate=self.estimate_tokens)
+        return planner.plan(self.rank_tasks(tasks))
 
-            plan[day_str] = day_tasks
-            task_queue = remaining
+    def plan_week(self, tasks: List[Task]) -> dict:
+        """
+        Plan task distribution across the week.
 
-        return plan
+        Returns dict of {date_str: [task_names]}.
+        """
+        return self.plan_week_detailed(tasks).to_dict()
 
     # =========================================================================
     # Confidence Routing
@@ -384,14 +615,17 @@ class Scheduler:
         else:
             return "skip"
 
-    def check_budget(self, task: Task) -> Tuple[bool, str]:
+    def check_budget(self, task: Task, reserved_tokens: int = 0) -> Tuple[bool, str]:
         """
         Check if task fits in current budget.
 
+        reserved_tokens is what tasks still running have been admitted
+        with; they are not in the budget yet but will be.
+
         Returns (fits, reason).
         """
         # Estimate percent cost (rough: 50k tokens = 10%)
-        estimated_percent = task.estimated_tokens / 5000
+        estimated_percent = (self.estimate_tokens(task) + reserved_tokens) / 5000
 
         # Check session budget
         if not self.budget.check_session_budget(estimated_percent):
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Incremental parsers for claude / gemini output streams.
+
+claude runs with `--output-format stream-json`: one JSON object per line
+(system init, assistant messages with usage and tool_use blocks, tool
+results, and a final result with total usage and cost). gemini output
+is plain text; the only structure worth extracting is its quota error.
+
+Parsers take output in arbitrary chunks as it arrives and return the
+events completed so far. A running summary (usage, cost, tools, first
+error) is kept on the parser, so the executor can stop a run as soon as
+a fatal error shows up instead of grepping the output afterwards.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Claude subscription limit messages (result text or assistant text)
+CLAUDE_LIMIT_RE = re.compile(r"usage limit reached|rate_limit_error|\blimit reached\b", re.IGNORECASE)
+GEMINI_QUOTA_RE = re.compile(r"TerminalQuotaError")
+GEMINI_RESET_RE = re.compile(r"reset after (\d+h\d+m)")
+
+
+@dataclass
+class TokenUsage:
+    """Token counts for one run."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cache_read_tokens: int = 0
+
+    @property
+    def total(self) -> int:
+        """Tokens counted against capacity; cache reads are excluded since
+        they are billed at a fraction and dominate long sessions."""
+        return self.input_tokens + self.output_tokens + self.cache_creation_tokens
+
+    @classmethod
+    def from_api(cls, usage: dict) -> "TokenUsage":
+        """From an Anthropic API usage object."""
+        return cls(
+            input_tokens=usage.get("input_tokens") or 0,
+            output_tokens=usage.get("output_tokens") or 0,
+            cache_creation_tokens=usage.get("cache_creation_input_tokens") or 0,
+            cache_read_tokens=usage.get("cache_read_input_tokens") or 0,
+        )
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            self.input_tokens + other.input_tokens,
+            self.output_tokens + other.output_tokens,
+            self.cache_creation_tokens + other.cache_creation_tokens,
+            self.cache_read_tokens + other.cache_read_tokens,
+        )
+
+
+@dataclass
+class StreamEvent:
+    """One thing that happened in a run."""
+    kind: str  # init | text | tool | usage | result | error
+    text: str = ""
+    tool: Optional[str] = None
+    usage: Optional[TokenUsage] = None
+    cost_usd: Optional[float] = None
+    session_id: Optional[str] = None
+    fatal: bool = False  # Error that should stop this run and further tasks
+
+
+@dataclass
+class StreamSummary:
+    """What the parser has seen so far."""
+    usage: Optional[TokenUsage] = None
+    cost_usd: Optional[float] = None
+    session_id: Optional[str] = None
+    num_turns: Optional[int] = None
+    tools: Counter = field(default_factory=Counter)
+    result_text: Optional[str] = None
+    error: Optional[str] = None
+    fatal: bool = False
+
+
+class LineParser(ABC):
+    """Splits chunks into lines; subclasses turn lines into events."""
+
+    def __init__(self):
+        self.summary = StreamSummary()
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """Parse a chunk of output; returns events for completed lines."""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._events(lines)
+
+    def close(self) -> List[StreamEvent]:
+        """Parse whatever is left after the stream ends."""
+        rest, self._buffer = self._buffer, ""
+        return self._events([rest] if rest else [])
+
+    def _events(self, lines: List[str]) -> List[StreamEvent]:
+        events = []
+        for line in lines:
+            for event in self.parse_line(line):
+                self._record(event)
+                events.append(event)
+        return events
+
+    def _record(self, event: StreamEvent):
+        s = self.summary
+        if event.session_id:
+            s.session_id = event.session_id
+        if event.kind == "tool":
+            s.tools[event.tool] += 1
+        elif event.kind == "error" and s.error is None:
+            s.error = event.text
+        if event.fatal:
+            s.fatal = True
+
+    @abstractmethod
+    def parse_line(self, line: str) -> List[StreamEvent]:
+        """Events for one complete line of output."""
+
+
+class ClaudeStreamParser(LineParser):
+    """Parser for `claude -p --output-format stream-json --verbose`."""
+
+    def __init__(self):
+        super().__init__()
+        # Assistant messages are split into one line per content block,
+        # each repeating the message usage, so keep the last per message
+        self._message_usage = {}
+
+    def parse_line(self, line: str) -> List[StreamEvent]:
+        line = line.strip()
+        if not line:
+            return []
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            # stderr is merged into stdout
+            return [StreamEvent("text", text=line)]
+        if not isinstance(obj, dict):
+            return [StreamEvent("text", text=line)]
+
+        kind = obj.get("type")
+        session_id = obj.get("session_id")
+        if kind == "system" and obj.get("subtype") == "init":
+            return [StreamEvent("init", text=obj.get("model", ""), session_id=session_id)]
+        if kind == "assistant":
+            return self._assistant(obj.get("message") or {}, session_id)
+        if kind == "result":
+            return self._result(obj, session_id)
+        return []
+
+    def _assistant(self, message: dict, session_id: Optional[str]) -> List[StreamEvent]:
+        events = []
+        for block in message.get("content") or []:
+            if block.get("type") == "text" and block.get("text"):
+                events.append(StreamEvent("text", text=block["text"], session_id=session_id))
+            elif block.get("type") == "tool_use":
+                events.append(StreamEvent("tool", tool=block.get("name"), session_id=session_id))
+
+        if message.get("usage"):
+            self._message_usage[message.get("id")] = TokenUsage.from_api(message["usage"])
+            usage = sum(self._message_usage.values(), TokenUsage())
+            self.summary.usage = usage
+            events.append(StreamEvent("usage", usage=usage, session_id=session_id))
+        return events
+
+    def _result(self, obj: dict, session_id: Optional[str]) -> List[StreamEvent]:
+        s = self.summary
+        if obj.get("usage"):
+            s.usage = TokenUsage.from_api(obj["usage"])
+        s.cost_usd = obj.get("total_cost_usd", obj.get("cost_usd"))
+        s.num_turns = obj.get("num_turns")
+        s.result_text = obj.get("result")
+
+        events = [StreamEvent("result", text=s.result_text or "", usage=s.usage,
+                              cost_usd=s.cost_usd, session_id=session_id)]
+        if obj.get("is_error") or obj.get("subtype", "success") != "success":
+            message = s.result_text or obj.get("subtype", "error")
+            events.append(StreamEvent("error", text=message, session_id=session_id,
+                                      fatal=bool(CLAUDE_LIMIT_RE.search(message))))
+        return events
+
+
+class GeminiStreamParser(LineParser):
+    """Parser for gemini's plain-text output."""
+
+    def parse_line(self, line: str) -> List[StreamEvent]:
+        events = [StreamEvent("text", text=line)]
+        if GEMINI_QUOTA_RE.search(line):
+            reset = GEMINI_RESET_RE.search(line)
+            reset_time = reset.group(1) if reset else "unknown"
+            events.append(StreamEvent(
+                "error", text=f"Gemini quota exhausted. Resets in {reset_time}", fatal=True
+            ))
+        return events
+
+
+def parser_for(backend: str) -> LineParser:
+    """Stream parser for the output of a backend."""
+    return GeminiStreamParser() if backend == "desktop" else ClaudeStreamParser()
+
+
+def format_event(event: StreamEvent) -> Optional[str]:
+    """Terminal rendering of an event, or None for events not worth showing."""
+    if event.kind == "text":
+        return event.text
+    if event.kind == "tool":
+        return f"[tool] {event.tool}"
+    if event.kind == "error":
+        return f"[error] {event.text}"
+    return None
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Persistent parsed-task cache for cc-scheduler.
+
+Stores parsed Task records in a SQLite file under .omc/state/, keyed by
+path + mtime_ns + size. A directory scan only stats files; task files are
+read and parsed again only when they are new or have changed on disk.
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import Executor
+from pathlib import Path
+from datetime import datetime
+from dataclasses import fields
+from typing import Dict, List, Optional, Tuple
+
+from .tasks import Task, parse_task_file, BRAIN_ROOT
+
+CACHE_FILE = BRAIN_ROOT / ".omc" / "state" / "task-cache.db"
+
+# Bump when the Task layout or parser output changes to drop stale rows
+SCHEMA_VERSION = 3
+
+
+# (path, stat) pairs from a directory scan
+DirEntries = List[Tuple[Path, os.stat_result]]
+
+
+def scan_task_dir(directory: Path) -> DirEntries:
+    """Stat every *.md file in a directory, sorted by filename."""
+    try:
+        it = os.scandir(directory)
+    except FileNotFoundError:
+        return []
+    with it:
+        entries = [
+            (Path(entry.path), entry.stat())
+            for entry in it
+            if entry.name.endswith(".md") and entry.is_file()
+        ]
+    return sorted(entries, key=lambda e: e[0].name)
+
+
+def _parse_collecting(path: Path) -> Tuple[Optional[Task], List[str]]:
+    messages = []
+    return parse_task_file(path, warn=messages.append), messages
+
+
+def parse_task_files(paths: List[Path], executor: Executor = None) -> List[Optional[Task]]:
+    """
+    Parse task files, optionally on a thread pool.
+
+    Results come back in input order and parse warnings are printed in
+    input order, whatever order the workers finish in.
+    """
+    if executor is None:
+        results = [_parse_collecting(p) for p in paths]
+    else:
+        results = list(executor.map(_parse_collecting, paths))
+
+    tasks = []
+    for task, messages in results:
+        for message in messages:
+            print(message)
+        tasks.append(task)
+    return tasks
+
+
+def task_to_dict(task: Task) -> dict:
+    """Convert a Task to a JSON-serializable dict."""
+    data = {}
+    for f in fields(Task):
+        value = getattr(task, f.name)
+        if isinstance(value, Path):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        data[f.name] = value
+    return data
+
+
+def task_from_dict(data: dict) -> Task:
+    """Create a Task from a dict produced by task_to_dict."""
+    data = dict(data)
+    data["path"] = Path(data["path"])
+    if data.get("deadline"):
+        data["deadline"] = datetime.fromisoformat(data["deadline"])
+    return Task(**data)
+
+
+class TaskCache:
+    """
+    SQLite-backed cache of parsed task files.
+
+    Usage:
+        cache = TaskCache()
+        tasks = cache.load_dir(pending_dir)
+        cache.close()
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = path or CACHE_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10)
+        self._init_schema()
+
+    def _init_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS tasks")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_dir ON tasks(dir)")
+        self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, path: Path) -> Optional[Task]:
+        """Load a single task file, parsing it only if the cached row is stale."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, data FROM tasks WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return task_from_dict(json.loads(row[2]))
+
+        task = parse_task_file(path)
+        if task:
+            self._store(path, st, task)
+            self._conn.commit()
+        return task
+
+    def load_dir(self, directory: Path, executor: Executor = None) -> List[Task]:
+        """
+        Load all *.md tasks in a directory, in filename order.
+
+        Only stats files; unchanged entries come straight from the cache.
+        Rows for files that no longer exist are pruned.
+        """
+        entries = scan_task_dir(directory)
+        hits, misses = self.lookup(directory, entries)
+
+        parsed = parse_task_files([path for path, _ in misses], executor)
+        self.store([(path, st, task) for (path, st), task in zip(misses, parsed) if task])
+        fresh = {path: task for (path, _), task in zip(misses, parsed) if task}
+
+        return [hits.get(path) or fresh[path] for path, _ in entries if path in hits or path in fresh]
+
+    def lookup(self, directory: Path, entries: DirEntries) -> Tuple[Dict[Path, Task], DirEntries]:
+        """
+        Split a directory scan into cache hits and entries that need parsing.
+
+        Also prunes cached rows for files that are no longer in the scan.
+        """
+        cached = {
+            row[0]: row[1:]
+            for row in self._conn.execute(
+                "SELECT path, mtime_ns, size, data FROM tasks WHERE dir = ?", (str(directory),)
+            )
+        }
+
+        hits = {}
+        misses = []
+        for path, st in entries:
+            row = cached.pop(str(path), None)
+            if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                hits[path] = task_from_dict(json.loads(row[2]))
+            else:
+                misses.append((path, st))
+
+        if cached:
+            self._conn.executemany("DELETE FROM tasks WHERE path = ?", [(p,) for p in cached])
+            self._conn.commit()
+
+        return hits, misses
+
+    def store(self, items: List[Tuple[Path, os.stat_result, Task]]):
+        """Cache freshly parsed tasks."""
+        if not items:
+            return
+        for path, st, task in items:
+            self._store(path, st, task)
+        self._conn.commit()
+
+    def _store(self, path: Path, st: os.stat_result, task: Task):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks (path, dir, mtime_ns, size, data) VALUES (?, ?, ?, ?, ?)",
+            (
+                str(path),
+                str(path.parent),
+                st.st_mtime_ns,
+                st.st_size,
+                json.dumps(task_to_dict(task)),
+            ),
+        )
+
+    def clear(self):
+        """Drop all cached entries."""
+        self._conn.execute("DELETE FROM tasks")
+        self._conn.commit()
+
+
+if __name__ == "__main__":
+    from .tasks import TASKS_DIR
+
+    with TaskCache() as cache:
+        for status in ("pending", "completed"):
+            tasks = cache.load_dir(TASKS_DIR / status)
+            print(f"{status}: {len(tasks)} tasks")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Task dependency graph for cc-scheduler.
+
+Built once per queue load. Tracks which pending tasks block which,
+detects cycles and dependencies that don't exist anywhere, keeps the
+runnable frontier up to date as tasks complete, and computes
+critical-path lengths for scoring.
+
+Dependency semantics match TaskQueue.check_dependencies:
+- a dependency on a pending task is unmet
+- a dependency on a completed task is met
+- a dependency on an unknown task is assumed external and met
+"""
+
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .tasks import Task
+
+
+class TaskGraph:
+    """
+    DAG of pending tasks keyed by task name.
+
+    Edges point from a dependency to its dependents.
+    """
+
+    def __init__(self, tasks: Iterable[Task], completed: Iterable[str] = ()):
+        tasks = list(tasks)
+        completed = set(completed)
+
+        self.nodes: Set[str] = {t.name for t in tasks}
+        self.deps: Dict[str, Set[str]] = {name: set() for name in self.nodes}
+        self.dependents: Dict[str, Set[str]] = {name: set() for name in self.nodes}
+        self.missing: Dict[str, List[str]] = {}
+
+        for task in tasks:
+            for dep in task.depends_on:
+                if dep in self.nodes:
+                    self.deps[task.name].add(dep)
+                    self.dependents[dep].add(task.name)
+                elif dep not in completed:
+                    self.missing.setdefault(task.name, []).append(dep)
+
+        self._unmet: Dict[str, int] = {name: len(d) for name, d in self.deps.items()}
+        self._frontier: Set[str] = {name for name, n in self._unmet.items() if n == 0}
+
+        self.cycles: List[List[str]] = self._find_cycles()
+        self._cyclic: Set[str] = {name for cycle in self.cycles for name in cycle}
+        self._path_lengths: Dict[str, int] = {}
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def is_runnable(self, name: str) -> bool:
+        """Check if a pending task has no unmet dependencies."""
+        return name in self._frontier
+
+    def deps_satisfied(self, task: Task) -> bool:
+        """Check a task's dependencies, including tasks not in the graph."""
+        if task.name in self._unmet:
+            return task.name in self._frontier
+        return not any(dep in self.nodes for dep in task.depends_on)
+
+    def runnable(self) -> Set[str]:
+        """Names of all tasks in the runnable frontier."""
+        return set(self._frontier)
+
+    def unmet_count(self, name: str) -> int:
+        """Number of pending dependencies still blocking a task."""
+        return self._unmet.get(name, 0)
+
+    def critical_path_length(self, name: str) -> int:
+        """
+        Length of the longest chain of pending tasks waiting on this one.
+
+        0 means nothing depends on the task. Edges inside cycles are
+        ignored since those tasks can never run.
+        """
+        if name not in self.nodes:
+            return 0
+        if name not in self._path_lengths:
+            self._compute_path_lengths()
+        return self._path_lengths.get(name, 0)
+
+    def topological_order(self, key: Callable[[str], object] = None) -> List[str]:
+        """
+        Pending tasks in dependency order (Kahn's algorithm).
+
+        Ties are broken by key (lowest first), then by name. Tasks in
+        or behind a cycle are left out.
+        """
+        key = key or (lambda name: 0)
+        unmet = dict(self._unmet)
+        heap = [(key(n), n) for n, count in unmet.items() if count == 0]
+        heapq.heapify(heap)
+
+        order = []
+        while heap:
+            _, name = heapq.heappop(heap)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                unmet[dependent] -= 1
+                if unmet[dependent] == 0:
+                    heapq.heappush(heap, (key(dependent), dependent))
+        return order
+
+    # =========================================================================
+    # Mutation
+    # =========================================================================
+
+    def mark_completed(self, name: str) -> List[str]:
+        """
+        Remove a completed task and update the frontier.
+
+        Returns names of tasks that became runnable.
+        """
+        if name not in self.nodes:
+            return []
+
+        unblocked = []
+        for dependent in self.dependents.pop(name):
+            self.deps[dependent].discard(name)
+            self._unmet[dependent] -= 1
+            if self._unmet[dependent] == 0:
+                self._frontier.add(dependent)
+                unblocked.append(dependent)
+
+        for dep in self.deps.pop(name):
+            self.dependents[dep].discard(name)
+
+        self.nodes.discard(name)
+        self._unmet.pop(name, None)
+        self._frontier.discard(name)
+        self.missing.pop(name, None)
+        self._path_lengths = {}
+
+        return sorted(unblocked)
+
+    # =========================================================================
+    # Internals
+    # =========================================================================
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Find dependency cycles with Tarjan's SCC algorithm (iterative)."""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        cycles = []
+        counter = 0
+
+        for root in sorted(self.nodes):
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.dependents[root])))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.dependents[child]))))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.deps[node]:
+                        cycles.append(sorted(component))
+
+        return cycles
+
+    def _compute_path_lengths(self):
+        """Longest downstream chain per node, in reverse topological order."""
+        lengths: Dict[str, int] = {}
+        for name in reversed(self.topological_order()):
+            lengths[name] = max(
+                (lengths.get(d, 0) + 1 for d in self.dependents[name] if d not in self._cyclic),
+                default=0,
+            )
+        self._path_lengths = lengths
+
+
+def format_graph_problems(graph: TaskGraph) -> Optional[str]:
+    """Describe cycles and missing dependencies, or None if there are none."""
+    lines = []
+    for cycle in graph.cycles:
+        lines.append(f"  Cycle: {' -> '.join(cycle)}")
+    for name, deps in sorted(graph.missing.items()):
+        lines.append(f"  {name}: unknown dependencies {', '.join(deps)} (assumed external)")
+    return "\n".join(lines) if lines else None
@@ -6,11 +6,18 @@ Loads tasks from multiple project directories, resolves dependencies,
 and provides runnable task filtering.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set
 from dataclasses import dataclass
 
 from .tasks import Task, parse_task_file, load_pending_tasks, TASKS_DIR
+from .task_cache import TaskCache, scan_task_dir, parse_task_files
+from .completed_index import read_completed_names, rebuild_completed_index
+from .task_graph import TaskGraph, format_graph_problems
+
+# Default worker threads for loading task directories
+DEFAULT_LOAD_WORKERS = 8
 
 
 @dataclass
@@ -28,41 +35,184 @@ class ProjectConfig:
 class TaskQueue:
     """
     Multi-project task queue with dependency tracking.
+
+    If a TaskCache is given, task files are only re-parsed when their
+    mtime/size changed since the last load.
+
+    Name, tag and project lookups go through hash indexes that are built
+    at load and kept in sync by add_task/remove_task.
+
+    Directory scans, completed-index reads and task parsing run on a
+    bounded thread pool (max_workers), which matters on slow mounts such
+    as WSL's /mnt/c. Results keep project order, then filename order.
     """
 
-    def __init__(self, projects: List[ProjectConfig] = None):
+    def __init__(
+        self,
+        projects: List[ProjectConfig] = None,
+        cache: TaskCache = None,
+        max_workers: int = DEFAULT_LOAD_WORKERS,
+    ):
         self.projects = projects or [ProjectConfig(path=TASKS_DIR)]
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
         self._tasks: List[Task] = []
         self._completed_names: Set[str] = set()
+        self.graph = TaskGraph([])
+        # Indexes (tag/project buckets keyed by id(task) for O(1) removal)
+        self._by_name: Dict[str, Task] = {}
+        self._by_tag: Dict[str, Dict[int, Task]] = {}
+        self._by_project: Dict[str, Dict[int, Task]] = {}
+
+    @staticmethod
+    def _project_dirs(project: ProjectConfig) -> tuple[Path, Path]:
+        """Get (pending_dir, completed_dir) for a project."""
+        if project.path.name == "pending":
+            return project.path, project.path.parent / "completed"
+        return project.path / "pending", project.path / "completed"
 
     def load_all(self) -> List[Task]:
         """Load tasks from all configured projects."""
         self._tasks = []
         self._completed_names = set()
-
-        for project in self.projects:
-            pending_dir = project.path / "pending" if project.path.name != "pending" else project.path
-            completed_dir = project.path / "completed" if project.path.name != "pending" else project.path.parent / "completed"
-
-            # Load completed task names for dependency checking
-            if completed_dir.exists():
-                for path in completed_dir.glob("*.md"):
-                    task = parse_task_file(path)
-                    if task:
-                        self._completed_names.add(task.name)
-
-            # Load pending tasks
-            if pending_dir.exists():
-                for path in pending_dir.glob("*.md"):
-                    task = parse_task_file(path)
+        dirs = [self._project_dirs(project) for project in self.projects]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Stat pending dirs and read completed indexes for all projects at once
+            scans = [pool.submit(scan_task_dir, pending_dir) for pending_dir, _ in dirs]
+            indexes = [pool.submit(read_completed_names, completed_dir) for _, completed_dir in dirs]
+
+            # Resolve cache hits first, then parse every miss in one batch
+            plans = []
+            for (pending_dir, _), scan in zip(dirs, scans):
+                entries = scan.result()
+                if self.cache:
+                    hits, misses = self.cache.lookup(pending_dir, entries)
+                else:
+                    hits, misses = {}, entries
+                plans.append((entries, hits, misses))
+
+            misses = [entry for _, _, project_misses in plans for entry in project_misses]
+            parsed = parse_task_files([path for path, _ in misses], pool)
+            fresh = {path: task for (path, _), task in zip(misses, parsed) if task}
+            if self.cache:
+                self.cache.store([(path, st, fresh[path]) for path, st in misses if path in fresh])
+
+            for project, (_, completed_dir), (entries, hits, _), index in zip(self.projects, dirs, plans, indexes):
+                # Load completed task names for dependency checking
+                names = index.result()
+                if names is None:
+                    names = rebuild_completed_index(completed_dir, self.cache)
+                self._completed_names.update(names)
+
+                # Load pending tasks
+                for path, _ in entries:
+                    task = hits.get(path) or fresh.get(path)
                     if task:
                         # Attach project info
                         task.project = project.name
                         task.project_boost = project.boost
                         self._tasks.append(task)
 
+        self._rebuild_indexes()
+        self.graph = TaskGraph(self._tasks, self._completed_names)
         return self._tasks
 
+    def load_finished_tasks(self) -> List[Task]:
+        """
+        Load completed and failed task files of all projects.
+
+        Used to join execution history back to task metadata; the pending
+        queue itself is not touched.
+        """
+        tasks = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for project in self.projects:
+                _, completed_dir = self._project_dirs(project)
+                for directory in (completed_dir, completed_dir.parent / "failed"):
+                    if self.cache:
+                        loaded = self.cache.load_dir(directory, pool)
+                    else:
+                        loaded = [t for t in parse_task_files([p for p, _ in scan_task_dir(directory)], pool) if t]
+                    for task in loaded:
+                        task.project = project.name
+                        tasks.append(task)
+        return tasks
+
+    def _rebuild_indexes(self):
+        self._by_name = {}
+        self._by_tag = {}
+        self._by_project = {}
+        for task in self._tasks:
+            self._index(task)
+
+    def _index(self, task: Task):
+        # First task with a given name wins, matching the old linear scan
+        self._by_name.setdefault(task.name, task)
+        for tag in task.tags:
+            self._by_tag.setdefault(tag, {})[id(task)] = task
+        project = getattr(task, 'project', None)
+        self._by_project.setdefault(project, {})[id(task)] = task
+
+    def _unindex(self, task: Task):
+        if self._by_name.get(task.name) is task:
+            del self._by_name[task.name]
+            for other in self._tasks:
+                if other.name == task.name:
+                    self._by_name[task.name] = other
+                    break
+        for tag in task.tags:
+            bucket = self._by_tag.get(tag, {})
+            bucket.pop(id(task), None)
+            if not bucket:
+                self._by_tag.pop(tag, None)
+        project = getattr(task, 'project', None)
+        bucket = self._by_project.get(project, {})
+        bucket.pop(id(task), None)
+        if not bucket:
+            self._by_project.pop(project, None)
+
+    def add_task(self, task: Task):
+        """Add a task to the queue and refresh indexes and the dependency graph."""
+        self._tasks.append(task)
+        self._index(task)
+        self.graph = TaskGraph(self._tasks, self._completed_names)
+
+    def remove_task(self, name: str) -> List[Task]:
+        """
+        Remove all tasks with a name from the queue and refresh indexes and
+        the dependency graph. Returns the removed tasks.
+        """
+        removed = self._remove(name)
+        if removed:
+            self.graph = TaskGraph(self._tasks, self._completed_names)
+        return removed
+
+    def _remove(self, name: str) -> List[Task]:
+        """Drop tasks with a name from the task list and indexes (not the graph)."""
+        removed = [t for t in self._tasks if t.name == name]
+        if not removed:
+            return []
+        self._tasks = [t for t in self._tasks if t.name != name]
+        for task in removed:
+            self._unindex(task)
+        return removed
+
+    def rebuild_completed_index(self) -> dict:
+        """
+        Rebuild every project's completed-name index from its directory.
+
+        Returns {project_name: completed_count}.
+        """
+        counts = {}
+        self._completed_names = set()
+        for project in self.projects:
+            _, completed_dir = self._project_dirs(project)
+            names = rebuild_completed_index(completed_dir, self.cache)
+            self._completed_names.update(names)
+            counts[project.name] = len(names)
+        return counts
+
     def check_dependencies(self, task: Task) -> bool:
         """
         Check if all dependencies are satisfied.
@@ -73,17 +223,18 @@ class TaskQueue:
         """
         if not task.depends_on:
             return True
+        return self.graph.deps_satisfied(task)
 
-        pending_names = {t.name for t in self._tasks}
-
-        for dep in task.depends_on:
-            # If dependency is in pending, it's not satisfied
-            if dep in pending_names:
-                return False
-            # If dependency is completed, it's satisfied
-            # If dependency doesn't exist anywhere, assume external and satisfied
+    def mark_completed(self, name: str) -> List[Task]:
+        """
+        Remove a completed task from the queue.
 
-        return True
+        Returns tasks that became runnable as a result.
+        """
+        # The graph is updated incrementally instead of rebuilt by remove_task
+        self._remove(name)
+        self._completed_names.add(name)
+        return [self._by_name[n] for n in self.graph.mark_completed(name) if n in self._by_name]
 
     def get_blocked_tasks(self) -> List[Task]:
         """Get tasks that are blocked by dependencies."""
@@ -110,20 +261,30 @@ class TaskQueue:
 
         return runnable
 
+    def get_plannable_tasks(self) -> List[Task]:
+        """
+        Get tasks that can be planned ahead, including blocked ones.
+
+        Tasks caught in a dependency cycle can never run and are left out.
+        """
+        cyclic = {name for cycle in self.graph.cycles for name in cycle}
+        return [t for t in self._tasks if t.name not in cyclic]
+
     def get_by_name(self, name: str) -> Optional[Task]:
         """Get a task by name."""
-        for task in self._tasks:
-            if task.name == name:
-                return task
-        return None
+        return self._by_name.get(name)
 
     def get_by_tag(self, tag: str) -> List[Task]:
         """Get all tasks with a specific tag."""
-        return [t for t in self._tasks if tag in t.tags]
+        return list(self._by_tag.get(tag, {}).values())
 
     def get_by_project(self, project: str) -> List[Task]:
         """Get all tasks for a specific project."""
-        return [t for t in self._tasks if getattr(t, 'project', None) == project]
+        return list(self._by_project.get(project, {}).values())
+
+    def get_tags(self) -> Dict[str, int]:
+        """Get {tag: task_count} across the queue."""
+        return {tag: len(bucket) for tag, bucket in self._by_tag.items()}
 
     def summary(self) -> dict:
         """Get queue summary statistics."""
@@ -134,12 +295,10 @@ class TaskQueue:
         runnable_tokens = sum(t.estimated_tokens for t in runnable)
 
         # Group by project
-        by_project = {}
-        for task in self._tasks:
-            proj = getattr(task, 'project', 'default')
-            if proj not in by_project:
-                by_project[proj] = []
-            by_project[proj].append(task.name)
+        by_project = {
+            proj if proj is not None else 'default': [t.name for t in bucket.values()]
+            for proj, bucket in self._by_project.items()
+        }
 
         return {
             "total": len(self._tasks),
@@ -149,9 +308,17 @@ class TaskQueue:
             "runnable_tokens": runnable_tokens,
             "by_project": by_project,
             "completed_count": len(self._completed_names),
+            "cycles": self.graph.cycles,
+            "missing_deps": self.graph.missing,
         }
 
 
+def load_queue_from_config(config: dict, cache: TaskCache = None) -> TaskQueue:
+    """Create a TaskQueue for the configured projects and loader settings."""
+    workers = config.get("queue", {}).get("load_workers", DEFAULT_LOAD_WORKERS)
+    return TaskQueue(load_projects_from_config(config), cache=cache, max_workers=workers)
+
+
 def load_projects_from_config(config: dict) -> List[ProjectConfig]:
     """Load project configurations from YAML config."""
     projects = []
@@ -196,6 +363,12 @@ def format_queue_status(queue: TaskQueue) -> str:
         for proj, tasks in summary['by_project'].items():
             lines.append(f"  {proj}: {len(tasks)} tasks")
 
+    problems = format_graph_problems(queue.graph)
+    if problems:
+        lines.append("")
+        lines.append("Dependency problems:")
+        lines.append(problems)
+
     return "\n".join(lines)
 
 
@@ -6,11 +6,13 @@ Reads task files from brain/tasks/pending/ with YAML frontmatter.
 """
 
 import os
-import re
+import sys
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Tuple
+from datetime import datetime, date
+
+from .frontmatter import read_header, read_body, split_frontmatter
 
 # Default paths (can be overridden)
 BRAIN_ROOT = Path.home() / "brain"
@@ -22,9 +24,20 @@ VALID_MODEL_HINTS = ["haiku", "sonnet", "opus"]
 VALID_BACKENDS = ["code", "desktop", "auto"]
 
 
-@dataclass
+def _intern_all(values) -> Tuple[str, ...]:
+    """Convert a list of names to a tuple of interned strings."""
+    return tuple(sys.intern(str(v)) for v in values)
+
+
+@dataclass(slots=True)
 class Task:
-    """A scheduled task parsed from markdown file."""
+    """
+    A scheduled task parsed from markdown file.
+
+    Slotted and body-less by default so thousands of tasks stay cheap to
+    hold while planning: tags and depends_on are tuples of interned
+    strings, and the body is read from path by load_body() when needed.
+    """
     name: str
     path: Path
     priority: int = 5  # 1-10, lower = higher priority
@@ -32,10 +45,11 @@ class Task:
     mode: str = "autonomous"  # autonomous | plan-first | read-only
     timeout: str = "30m"
     backend: str = "code"  # code | desktop | auto
-    tags: List[str] = field(default_factory=list)
-    depends_on: List[str] = field(default_factory=list)
+    tags: Tuple[str, ...] = ()
+    depends_on: Tuple[str, ...] = ()
     deadline: Optional[datetime] = None
-    body: str = ""  # Task content after frontmatter
+    body: Optional[str] = None  # Task content after frontmatter, loaded on demand
+    body_chars: int = 0  # Body size in bytes, known without loading the body
     project: str = ""  # Project name (set by queue)
     project_boost: int = 0  # Priority boost from project config
     # Extended schema for routing
@@ -45,91 +59,79 @@ class Task:
     inject_capabilities: bool = False
     ce_aware: bool = False
 
+    def __post_init__(self):
+        self.tags = _intern_all(self.tags)
+        self.depends_on = _intern_all(self.depends_on)
+        self.mode = sys.intern(self.mode)
+        self.timeout = sys.intern(self.timeout)
+        self.backend = sys.intern(self.backend)
+        self.model_hint = sys.intern(self.model_hint)
+        if self.skill is not None:
+            self.skill = sys.intern(self.skill)
+
     @property
     def is_runnable(self) -> bool:
         """Check if task has no unmet dependencies."""
         # Basic check - queue.py does full dependency resolution
         return True
 
+    def load_body(self) -> str:
+        """Get the task body, reading it from the task file on first use."""
+        if self.body is None:
+            self.body = read_body(self.path)
+        return self.body
+
 
 PRIORITY_MAP = {"low": 7, "medium": 5, "high": 3, "critical": 1}
 
 def parse_frontmatter(content: str) -> tuple[dict, str]:
     """Extract YAML frontmatter and body from markdown."""
-    pattern = r'^---\s*\n(.*?)\n---\s*\n(.*)$'
-    match = re.match(pattern, content, re.DOTALL)
-
-    if not match:
-        return {}, content
-
-    frontmatter_str, body = match.groups()
-
-    # Simple YAML parsing (handles both inline and multiline lists)
-    frontmatter = {}
-    current_key = None
-    current_list = None
-
-    for line in frontmatter_str.strip().split('\n'):
-        # Check for list item continuation
-        if line.strip().startswith('- ') and current_key:
-            if current_list is None:
-                current_list = []
-            current_list.append(line.strip()[2:].strip())
-            continue
-        elif current_key and current_list is not None:
-            frontmatter[current_key] = current_list
-            current_list = None
-            current_key = None
-
-        if ':' in line and not line.strip().startswith('-'):
-            key, value = line.split(':', 1)
-            key = key.strip()
-            value = value.strip()
-
-            # Empty value might indicate multiline list follows
-            if not value:
-                current_key = key
-                current_list = []
-                continue
-
-            # Handle inline lists [a, b, c]
-            if value.startswith('[') and value.endswith(']'):
-                value = [v.strip().strip('"\'') for v in value[1:-1].split(',') if v.strip()]
-            # Handle numbers
-            elif value.isdigit():
-                value = int(value)
-            # Handle string priorities
-            elif key == 'priority' and value.lower() in PRIORITY_MAP:
-                value = PRIORITY_MAP[value.lower()]
-            # Handle booleans
-            elif value.lower() in ('true', 'false'):
-                value = value.lower() == 'true'
-            # Strip quotes
-            elif value.startswith('"') or value.startswith("'"):
-                value = value[1:-1]
-
-            frontmatter[key] = value
-
-    # Handle trailing list
-    if current_key and current_list is not None:
-        frontmatter[current_key] = current_list
-
-    return frontmatter, body.strip()
-
-
-def parse_task_file(path: Path) -> Optional[Task]:
-    """Parse a single task file."""
+    meta, body = split_frontmatter(content)
+    return _normalize_meta(meta), body
+
+
+def _normalize_meta(meta: dict) -> dict:
+    """Apply task-specific value conventions to parsed frontmatter."""
+    priority = meta.get('priority')
+    if isinstance(priority, str) and priority.lower() in PRIORITY_MAP:
+        meta['priority'] = PRIORITY_MAP[priority.lower()]
+
+    # "key:" with nothing after it parses as null; list fields expect []
+    for key in ('tags', 'depends_on', 'mcps_required'):
+        if key in meta and meta[key] is None:
+            meta[key] = []
+        elif key in meta and not isinstance(meta[key], list):
+            meta[key] = [meta[key]]
+
+    return meta
+
+
+def parse_task_file(path: Path, warn=print) -> Optional[Task]:
+    """
+    Parse a single task file.
+
+    Warnings and errors are reported through warn (print by default), so
+    concurrent loaders can collect and report them in a stable order.
+    """
     try:
-        content = path.read_text()
-        meta, body = parse_frontmatter(content)
+        meta, body_offset = read_header(path)
+        meta = _normalize_meta(meta)
 
         # Parse deadline if present
         deadline = None
-        if 'deadline' in meta:
+        value = meta.get('deadline')
+        if isinstance(value, datetime):
+            deadline = value
+        elif isinstance(value, date):
+            deadline = datetime.combine(value, datetime.min.time())
+        elif value:
             try:
-                deadline = datetime.fromisoformat(str(meta['deadline']))
+                deadline = datetime.fromisoformat(str(value))
             except ValueError:
                 pass
+        if deadline and deadline.tzinfo:
+            # Scoring compares against naive local time
+            deadline = deadline.astimezone().replace(tzinfo=None)
 
         # Extract and validate new fields
         skill = meta.get('skill')
@@ -137,7 +139,7 @@ def parse_task_file(path: Path) -> Optional[Task]:
         if skill == "null":
             skill = None
         elif skill is not None and skill not in VALID_SKILLS:
-            print(f"Warning: unrecognized skill '{skill}' in {path.name}, setting to None")
+            warn(f"Warning: unrecognized skill '{skill}' in {path.name}, setting to None")
             skill = None
 
         model_hint = meta.get('model_hint', 'sonnet')
@@ -153,25 +155,25 @@ def parse_task_file(path: Path) -> Optional[Task]:
         ce_aware = meta.get('ce_aware', False)
 
         return Task(
-            name=meta.get('name', path.stem),
+            name=str(meta.get('name', path.stem)),
             path=path,
             priority=meta.get('priority', 5),
             estimated_tokens=meta.get('estimated_tokens', 50000),
             mode=meta.get('mode', 'autonomous'),
-            timeout=meta.get('timeout', '30m'),
+            timeout=str(meta.get('timeout', '30m')),
             backend=backend,
             tags=meta.get('tags', []),
             depends_on=meta.get('depends_on', []),
             deadline=deadline,
-            body=body,
             skill=skill,
             model_hint=model_hint,
             mcps_required=mcps_required if isinstance(mcps_required, list) else [],
             inject_capabilities=inject_capabilities,
             ce_aware=ce_aware,
+            body_chars=max(0, path.stat().st_size - body_offset),
         )
     except Exception as e:
-        print(f"Error parsing {path}: {e}")
+        warn(f"Error parsing {path}: {e}")
         return None
 
 
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Multi-day week planner for cc-scheduler.
+
+Treats each remaining day of the week as a bin of tokens (from the
+weekly budget's daily allocations) and assigns tasks to days:
+- dependencies are planned on the same day as, or after, the tasks
+  they depend on
+- tasks are placed earliest-deadline-first, then by score
+- a local search moves late tasks earlier by pushing tasks with slack
+  to later days, as long as the lateness-weighted score loss drops
+
+The resulting WeekPlan can be updated incrementally when a task
+completes: freed capacity is refilled from later days and unplanned
+tasks without recomputing the whole week.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .tasks import Task
+from .task_graph import TaskGraph
+
+# Fraction of a task's score lost per day it lands after its deadline
+LATENESS_WEIGHT = 0.25
+
+
+@dataclass
+class DayBin:
+    """Token capacity and assigned tasks for one day."""
+    day: date
+    capacity_tokens: float
+    used_tokens: float = 0.0
+    tasks: List[str] = field(default_factory=list)
+
+    @property
+    def free_tokens(self) -> float:
+        return self.capacity_tokens - self.used_tokens
+
+
+class WeekPlan:
+    """Assignment of tasks to days, with incremental updates."""
+
+    def __init__(self, bins: List[DayBin], tasks: Dict[str, Task], scores: Dict[str, float],
+                 order: List[str], graph: TaskGraph = None, sizes: Dict[str, float] = None):
+        self.bins = bins
+        self.tasks = tasks
+        self.scores = scores
+        # Token size of each task, fixed at planning so bins stay balanced
+        self.sizes = sizes if sizes is not None else {n: t.estimated_tokens for n, t in tasks.items()}
+        self.order = order  # placement priority
+        self.graph = graph
+        self.assignments: Dict[str, int] = {}  # task name -> bin index
+        self.completed: Set[str] = set()
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    @property
+    def unplanned(self) -> List[str]:
+        """Tasks that did not fit anywhere this week, in priority order."""
+        return [n for n in self.order if n not in self.assignments and n not in self.completed]
+
+    def days_late(self, name: str) -> int:
+        """Days a planned task lands after its deadline (0 if on time)."""
+        task = self.tasks[name]
+        if name not in self.assignments or not task.deadline:
+            return 0
+        day = self.bins[self.assignments[name]].day
+        return max(0, (day - task.deadline.date()).days)
+
+    def loss(self) -> float:
+        """Lateness-weighted score loss: unplanned tasks lose their full score."""
+        total = 0.0
+        for name in self.order:
+            if name in self.completed:
+                continue
+            score = self.scores.get(name, 0.0)
+            if name not in self.assignments:
+                total += score
+            else:
+                total += min(score, score * LATENESS_WEIGHT * self.days_late(name))
+        return total
+
+    def day_tasks(self, day: date) -> List[str]:
+        """Tasks planned for a day, in run order."""
+        return next((list(b.tasks) for b in self.bins if b.day == day), [])
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """{date_str: [task_names]} in run order."""
+        return {b.day.isoformat(): list(b.tasks) for b in self.bins}
+
+    # =========================================================================
+    # Placement
+    # =========================================================================
+
+    def _pending_deps(self, name: str) -> Set[str]:
+        if self.graph is None:
+            return set()
+        return {d for d in self.graph.deps.get(name, set()) if d not in self.completed}
+
+    def _pending_dependents(self, name: str) -> Set[str]:
+        if self.graph is None:
+            return set()
+        return {d for d in self.graph.dependents.get(name, set()) if d not in self.completed}
+
+    def _earliest_bin(self, name: str) -> Optional[int]:
+        """Earliest bin allowed by dependencies, or None if a dependency is unplanned."""
+        earliest = 0
+        for dep in self._pending_deps(name):
+            if dep not in self.assignments:
+                return None
+            earliest = max(earliest, self.assignments[dep])
+        return earliest
+
+    def _latest_bin(self, name: str) -> int:
+        """Latest bin allowed by already planned dependents."""
+        latest = len(self.bins) - 1
+        for dependent in self._pending_dependents(name):
+            if dependent in self.assignments:
+                latest = min(latest, self.assignments[dependent])
+        return latest
+
+    def _assign(self, name: str, index: int):
+        bin_ = self.bins[index]
+        bin_.used_tokens += self.sizes[name]
+        # Keep dependencies ahead of dependents within a day
+        position = len(bin_.tasks)
+        for i, other in enumerate(bin_.tasks):
+            if other in self._pending_dependents(name):
+                position = i
+                break
+        bin_.tasks.insert(position, name)
+        self.assignments[name] = index
+
+    def _unassign(self, name: str) -> int:
+        index = self.assignments.pop(name)
+        bin_ = self.bins[index]
+        bin_.used_tokens -= self.sizes[name]
+        bin_.tasks.remove(name)
+        return index
+
+    def _fits(self, name: str, index: int) -> bool:
+        return self.sizes[name] <= self.bins[index].free_tokens + 1e-9
+
+    def place(self, name: str) -> bool:
+        """Put a task on the earliest day its dependencies and capacity allow."""
+        earliest = self._earliest_bin(name)
+        if earliest is None:
+            return False
+        for index in range(earliest, self._latest_bin(name) + 1):
+            if self._fits(name, index):
+                self._assign(name, index)
+                return True
+        return False
+
+    def improve(self, max_rounds: int = 3):
+        """
+        Move late tasks earlier by pushing other tasks to later days.
+
+        A move is kept only if it lowers the total loss.
+        """
+        for _ in range(max_rounds):
+            changed = False
+            late = sorted(
+                (n for n in self.assignments if self.days_late(n) > 0),
+                key=lambda n: -self.scores.get(n, 0.0),
+            )
+            late += [n for n in self.unplanned if self.tasks[n].deadline]
+            for name in late:
+                if self._pull_earlier(name):
+                    changed = True
+            if not changed:
+                return
+
+    def _pull_earlier(self, name: str) -> bool:
+        task = self.tasks[name]
+        current = self.assignments.get(name, len(self.bins))
+        earliest = self._earliest_bin(name)
+        if earliest is None:
+            return False
+
+        target_last = min(current - 1, self._latest_bin(name))
+        deps = self._pending_deps(name)
+        for index in range(earliest, target_last + 1):
+            before = self.loss()
+            saved = dict(self.assignments), [list(b.tasks) for b in self.bins], [b.used_tokens for b in self.bins]
+
+            if name in self.assignments:
+                self._unassign(name)
+            # Evict lowest-value tasks until it fits. Only tasks nothing
+            # planned depends on can move, so no dependent is left behind.
+            victims = sorted(
+                (v for v in self.bins[index].tasks
+                 if v not in deps
+                 and not any(d in self.assignments for d in self._pending_dependents(v))),
+                key=lambda v: self.scores.get(v, 0.0),
+            )
+            moved = []
+            for victim in victims:
+                if self._fits(name, index):
+                    break
+                self._unassign(victim)
+                moved.append(victim)
+            if self._fits(name, index):
+                self._assign(name, index)
+                for victim in moved:
+                    self._place_after(victim, index)
+                if self.loss() < before - 1e-9:
+                    return True
+
+            # Revert
+            self.assignments = saved[0]
+            for b, tasks, used in zip(self.bins, saved[1], saved[2]):
+                b.tasks = tasks
+                b.used_tokens = used
+        return False
+
+    def _place_after(self, name: str, index: int) -> bool:
+        earliest = self._earliest_bin(name)
+        if earliest is None:
+            return False
+        for i in range(max(earliest, index + 1), self._latest_bin(name) + 1):
+            if self._fits(name, i):
+                self._assign(name, i)
+                return True
+        return False
+
+    # =========================================================================
+    # Incremental updates
+    # =========================================================================
+
+    def mark_completed(self, name: str, tokens_used: float = None, on: date = None) -> List[str]:
+        """
+        Record a completed task and refill freed capacity.
+
+        The actual token usage is charged to the day it ran on (defaults
+        to the day it was planned for). Only that day and later days are
+        re-packed. Returns names of tasks that moved or became planned.
+        """
+        if name in self.completed or name not in self.tasks:
+            return []
+
+        planned_index = self.assignments.get(name)
+        if planned_index is not None:
+            self._unassign(name)
+        self.completed.add(name)
+
+        index = planned_index if planned_index is not None else 0
+        if on is not None:
+            for i, b in enumerate(self.bins):
+                if b.day == on:
+                    index = i
+                    break
+        if tokens_used is not None:
+            self.bins[index].used_tokens += tokens_used
+
+        return self.refill(index)
+
+    def refill(self, from_index: int = 0) -> List[str]:
+        """Pull later or unplanned tasks into free capacity from a day onward."""
+        changed = []
+        for name in self.order:
+            if name in self.completed:
+                continue
+            current = self.assignments.get(name)
+            if current is not None and current <= from_index:
+                continue
+            earliest = self._earliest_bin(name)
+            if earliest is None:
+                continue
+            limit = (current - 1) if current is not None else self._latest_bin(name)
+            for index in range(max(earliest, from_index), limit + 1):
+                if self._fits(name, index):
+                    if current is not None:
+                        self._unassign(name)
+                    self._assign(name, index)
+                    changed.append(name)
+                    break
+        return changed
+
+
+class WeekPlanner:
+    """
+    Builds WeekPlans from day capacities and ranked tasks.
+
+    estimate sizes tasks in tokens (the scheduler's estimate_tokens, so
+    the week plan and session admission agree); defaults to the declared
+    estimated_tokens.
+    """
+
+    def __init__(self, days: List[Tuple[date, float]], graph: TaskGraph = None,
+                 estimate: Callable[[Task], float] = None):
+        self.days = days
+        self.graph = graph
+        self.estimate = estimate or (lambda task: task.estimated_tokens)
+
+    def plan(self, ranked: List[Tuple[Task, float]]) -> WeekPlan:
+        """Plan ranked (task, score) pairs across the configured days."""
+        tasks = {t.name: t for t, _ in ranked}
+        scores = {t.name: s for t, s in ranked}
+        rank = {t.name: i for i, (t, _) in enumerate(ranked)}
+
+        # A dependency is due as early as anything waiting on it
+        due = {n: t.deadline.timestamp() if t.deadline else float("inf") for n, t in tasks.items()}
+        if self.graph is not None:
+            for name in reversed(self.graph.topological_order()):
+                for dependent in self.graph.dependents.get(name, ()):
+                    if name in due and dependent in due:
+                        due[name] = min(due[name], due[dependent])
+
+        def priority(name: str):
+            return (due[name], rank[name])
+
+        # Earliest-deadline-first within dependency order
+        if self.graph is not None:
+            order = [n for n in self.graph.topological_order(
+                key=lambda n: priority(n) if n in tasks else (float("inf"), len(rank))
+            ) if n in tasks]
+            order += sorted((n for n in tasks if n not in set(order) and n not in self.graph.nodes), key=priority)
+        else:
+            order = sorted(tasks, key=priority)
+
+        bins = [DayBin(day=d, capacity_tokens=capacity) for d, capacity in self.days]
+        sizes = {n: self.estimate(t) for n, t in tasks.items()}
+        plan = WeekPlan(bins, tasks, scores, order, self.graph, sizes)
+        for name in order:
+            plan.place(name)
+        plan.improve()
+        return plan
@@ -0,0 +1,62 @@
+"""Tests for per-run token accounting."""
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.accounting import account_run, transcript_usage
+from lib.executor import ExecutionResult
+from lib.stream_events import TokenUsage
+
+
+def make_result(**kwargs) -> ExecutionResult:
+    now = datetime.now()
+    fields = dict(task_name="t", success=True, exit_code=0, output="x" * 400,
+                  started_at=now, ended_at=now, duration_seconds=1.0)
+    fields.update(kwargs)
+    return ExecutionResult(**fields)
+
+
+def write_transcript(projects_dir: Path, session_id: str):
+    path = projects_dir / "-home-user-brain" / f"{session_id}.jsonl"
+    path.parent.mkdir(parents=True)
+    usage = {"input_tokens": 100, "output_tokens": 50, "cache_read_input_tokens": 9000}
+    lines = [
+        {"type": "user", "message": {"content": "do it"}},
+        # Two content blocks of one message repeat its usage
+        {"type": "assistant", "message": {"id": "m1", "usage": usage}},
+        {"type": "assistant", "message": {"id": "m1", "usage": usage}},
+        {"type": "assistant", "message": {"id": "m2", "usage": {"input_tokens": 10, "output_tokens": 5}}},
+    ]
+    path.write_text("".join(json.dumps(l) + "\n" for l in lines))
+
+
+class TestAccounting:
+    """Test source priority and transcript parsing."""
+
+    def test_stream_usage_wins(self):
+        account = account_run(make_result(usage=TokenUsage(1000, 200)), capacity_tokens=50000)
+        assert account.source == "stream" and account.tokens == 1200 and account.exact
+
+    def test_transcript_by_session_id(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            projects = Path(tmpdir)
+            write_transcript(projects, "sess-1")
+            assert transcript_usage("sess-1", projects) == TokenUsage(110, 55, 0, 9000)
+
+            account = account_run(make_result(session_id="sess-1"), capacity_tokens=50000, projects_dir=projects)
+            assert account.source == "transcript" and account.tokens == 165
+            assert transcript_usage("missing", projects) is None
+
+    def test_capacity_then_estimate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            projects = Path(tmpdir)
+            account = account_run(make_result(), capacity_tokens=5000, projects_dir=projects)
+            assert account.source == "capacity" and not account.exact
+
+            # Window reset mid-run gives a negative delta
+            account = account_run(make_result(output_chars=4000), capacity_tokens=-20000, projects_dir=projects)
+            assert account.source == "estimate" and account.tokens == 1000
@@ -0,0 +1,90 @@
+"""Tests for run-history analytics."""
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.analytics import RunAnalytics
+from lib.log_store import LogStore
+
+
+def entry(task: str, ts: str, success=True, tokens=1000, duration=60, backend="code", error_type=None) -> dict:
+    return {
+        "task_id": task, "success": success, "error_type": error_type, "tokens": tokens,
+        "duration_s": duration, "log_file": f"{task}.md", "timestamp": ts,
+        "features": {"backend": backend, "model_hint": "sonnet"},
+    }
+
+
+class TestRunAnalytics:
+    """Test incremental loading, grouping and trends."""
+
+    def test_incremental_load_across_rotation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir) / "logs"
+            store = LogStore(logs_dir)
+            store.append("history", entry("a", "2026-01-05T10:00:00"), now=datetime(2026, 1, 5))
+            store.append("history", entry("b", "2026-01-06T10:00:00"), now=datetime(2026, 1, 6))
+
+            with RunAnalytics(Path(tmpdir) / "a.db", logs_dir) as analytics:
+                assert analytics.refresh() == 2
+                assert analytics.refresh() == 0
+
+                # New month: a and b move to a segment, c lands in the new hot file
+                store.append("history", entry("c", "2026-02-01T10:00:00"), now=datetime(2026, 2, 1))
+                assert analytics.refresh() == 1
+                assert analytics.count() == 3
+
+    def test_summary_groups_and_percentiles(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir) / "logs"
+            store = LogStore(logs_dir)
+            now = datetime(2026, 3, 10)
+            for i, duration in enumerate([10, 20, 30, 40, 50]):
+                store.append("history", entry(f"c{i}", f"2026-03-0{i + 1}T10:00:00", duration=duration,
+                                              tokens=1000 * (i + 1)), now=now)
+            store.append("history", entry("d", "2026-03-09T10:00:00", success=False, backend="desktop",
+                                          error_type="timeout"), now=now)
+
+            with RunAnalytics(Path(tmpdir) / "a.db", logs_dir) as analytics:
+                analytics.refresh()
+                code, desktop = analytics.summary("backend")
+                assert (code.key, code.runs, code.success_rate) == ("code", 5, 100.0)
+                assert code.duration_p50 == 30 and code.duration_p90 == 46
+                assert code.tokens_total == 15000
+                assert (desktop.key, desktop.success_rate) == ("desktop", 0.0)
+
+                errors = {s.key: s.runs for s in analytics.summary("error_type")}
+                assert errors == {"-": 5, "timeout": 1}
+
+                recent = analytics.summary("task", since=date(2026, 3, 5))
+                assert sorted(s.key for s in recent) == ["c4", "d"]
+
+    def test_weekly_trend_keyed_by_monday(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir) / "logs"
+            store = LogStore(logs_dir)
+            # 2026-03-02 is a Monday
+            for day in ("2026-03-02", "2026-03-08", "2026-03-09"):
+                store.append("history", entry(f"t{day}", f"{day}T12:00:00"), now=datetime(2026, 3, 9))
+
+            with RunAnalytics(Path(tmpdir) / "a.db", logs_dir) as analytics:
+                analytics.refresh()
+                assert [(s.key, s.runs) for s in analytics.trend("week")] == [("2026-03-02", 2), ("2026-03-09", 1)]
+                assert [s.key for s in analytics.trend("month")] == ["2026-03"]
+
+    def test_runs_keyed_by_run_id(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir) / "logs"
+            store = LogStore(logs_dir)
+            now = datetime(2026, 3, 10)
+            # Two runs of one task started in the same second, and a legacy entry (no run_id) seen twice
+            store.append("history", {**entry("a", "2026-03-09T10:00:00"), "run_id": "01"}, now=now)
+            store.append("history", {**entry("a", "2026-03-09T10:00:00"), "run_id": "02"}, now=now)
+            store.append("history", entry("b", "2026-03-09T11:00:00"), now=now)
+            store.append("history", entry("b", "2026-03-09T11:00:00"), now=now)
+
+            with RunAnalytics(Path(tmpdir) / "a.db", logs_dir) as analytics:
+                assert analytics.refresh() == 3
@@ -0,0 +1,151 @@
+"""Tests for the budget tracker."""
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.budget import BudgetTracker
+from lib.ledger import week_start_of
+
+
+def make_tracker(state_dir: Path) -> BudgetTracker:
+    return BudgetTracker({}, state_dir=state_dir)
+
+
+class TestBudgetTracker:
+    """Test in-memory plan queries, plan writes and the ledger."""
+
+    def test_queries_read_files_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            make_tracker(Path(tmpdir)).load_weekly_budget()  # Week file already exists
+            tracker = make_tracker(Path(tmpdir))
+            with patch.object(tracker, "_read_weekly", wraps=tracker._read_weekly) as read:
+                tracker.get_remaining_today()
+                tracker.get_remaining_week()
+                tracker.get_today_allocation()
+                tracker.check_session_budget(1.0)
+                assert read.call_count == 1
+
+    def test_ledger_actuals_are_cached_until_usage_changes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tracker, other = make_tracker(Path(tmpdir)), make_tracker(Path(tmpdir))
+            with patch.object(tracker.ledger, "daily_percents", wraps=tracker.ledger.daily_percents) as read:
+                before = tracker.get_remaining_today()
+                tracker.get_remaining_week()
+                tracker.get_week_summary()
+                tracker.check_session_budget(1.0)
+                assert read.call_count == 1
+
+                tracker.record_usage("brain-task", 5000, 1.0)
+                assert tracker.get_remaining_today() == before - 1.0
+                # Usage recorded by another process is picked up too
+                other.record_usage("brain-task", 5000, 2.0)
+                assert tracker.get_remaining_today() == before - 3.0
+                assert read.call_count == 3
+
+    def test_plan_changes_are_written_through(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_dir = Path(tmpdir)
+            tracker = make_tracker(state_dir)
+            days = list(tracker.load_weekly_budget().daily_allocations)
+            assert (state_dir / "weekly-budget.json").exists()
+
+            tracker._update_plan({d: 1.0 for d in days})
+            assert tracker.get_today_allocation() == 1.0
+            data = json.loads((state_dir / "weekly-budget.json").read_text())
+            assert {a["planned_percent"] for a in data["daily_allocations"].values()} == {1.0}
+            assert not list(state_dir.glob("*.tmp"))
+
+    def test_plan_changes_keep_other_processes_updates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_dir = Path(tmpdir)
+            first, second = make_tracker(state_dir), make_tracker(state_dir)
+            days = list(first.load_weekly_budget().daily_allocations)
+            second.load_weekly_budget()
+
+            first._update_plan({days[0]: 1.0})
+            second._update_plan({days[1]: 2.0})
+            planned = make_tracker(state_dir).load_weekly_budget().daily_allocations
+            assert (planned[days[0]].planned_percent, planned[days[1]].planned_percent) == (1.0, 2.0)
+
+    def test_usage_goes_to_ledger(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_dir = Path(tmpdir)
+            tracker = make_tracker(state_dir)
+            before = tracker.get_remaining_today()
+
+            tracker.record_usage("brain-task", 5000, 1.0)
+            tracker.record_usage("brain-task", 10000, 2.0)
+            assert tracker.get_remaining_today() == before - 3.0
+            assert tracker.get_estimated_cost("brain-other") == int(0.7 * 5000 + 0.3 * 10000)
+            assert tracker.ledger.task_usage("brain-task")["runs"] == 2
+
+            # Actuals are not duplicated into the weekly JSON
+            data = json.loads((state_dir / "weekly-budget.json").read_text())
+            assert all("actual_percent" not in a for a in data["daily_allocations"].values())
+
+    def test_estimated_usage_counts_toward_totals_only(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tracker = make_tracker(Path(tmpdir))
+            before_today, before_week = tracker.get_remaining_today(), tracker.get_remaining_week()
+
+            tracker.record_usage("brain-task", 2000, 0.5, update_model=False, source="estimate")
+            assert tracker.get_remaining_today() == before_today - 0.5
+            assert tracker.get_remaining_week() == before_week - 0.5
+            assert tracker.ledger.task_usage("brain-task") is None
+            assert tracker.get_estimated_cost("brain-task") == 50000
+
+    def test_concurrent_trackers_keep_both_updates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_dir = Path(tmpdir)
+            first = make_tracker(state_dir)
+            second = make_tracker(state_dir)
+            start = first.get_remaining_week()
+            second.get_remaining_week()
+
+            first.record_user_directed(2.0)
+            second.record_user_directed(3.0)
+
+            assert make_tracker(state_dir).get_remaining_week() == start - 5.0
+            assert second.get_remaining_week() == start - 5.0
+
+    def test_sessions_track_usage(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tracker = make_tracker(Path(tmpdir))
+            session = tracker.start_session()
+            tracker.update_session("task", 2.5)
+
+            loaded = tracker.load_session()
+            assert loaded.session_id == session.session_id
+            assert loaded.used_percent == 2.5
+            assert tracker.check_session_budget(loaded.daily_allocation - 2.5)
+            assert not tracker.check_session_budget(loaded.daily_allocation)
+
+    def test_legacy_json_is_imported(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state_dir = Path(tmpdir)
+            week = week_start_of(date.today())
+            (state_dir / "weekly-budget.json").write_text(json.dumps({
+                "week_start": week,
+                "user_directed_used": 4.0,
+                "daily_allocations": {week: {
+                    "planned_percent": 15.0,
+                    "actual_percent": 3.0,
+                    "tasks_completed": [{"name": "a", "tokens": 5000, "percent": 1.0, "timestamp": f"{week}T09:00:00"}],
+                }},
+            }))
+            (state_dir / "cost-models.json").write_text(json.dumps({"a": {"avg_tokens": 5000, "samples": 1}}))
+
+            tracker = make_tracker(state_dir)
+            weekly = tracker.load_weekly_budget()
+            assert weekly.daily_allocations[week].actual_percent == 3.0
+            assert weekly.user_directed_used == 4.0
+            assert tracker.get_estimated_cost("a") == 5000
+
+            # Importing happens once
+            tracker.ledger.close()
+            assert make_tracker(state_dir).load_weekly_budget().daily_allocations[week].actual_percent == 3.0
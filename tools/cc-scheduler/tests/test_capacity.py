@@ -0,0 +1,83 @@
+"""Tests for the capacity cache."""
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.capacity import Capacity, CapacityCache
+
+
+class FakeApi:
+    """Counts calls and returns increasing usage."""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        return Capacity(five_hour_percent=10 * calls, weekly_percent=5, sampled_at=datetime.now(timezone.utc))
+
+
+class TestCapacityCache:
+    """Test TTL, sharing, coalescing and extrapolation."""
+
+    def test_serves_cached_sample_within_ttl(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            api = FakeApi()
+            cache = CapacityCache(Path(tmpdir) / "capacity.json", ttl_s=60, fetch=api)
+            assert cache.get().five_hour_percent == 10
+            assert cache.get().five_hour_percent == 10
+            assert api.calls == 1
+            assert cache.get(max_age_s=0).five_hour_percent == 20
+
+    def test_shared_through_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "capacity.json"
+            api = FakeApi()
+            CapacityCache(path, fetch=api).get()
+            other = CapacityCache(path, fetch=api)
+            assert other.get().five_hour_percent == 10
+            assert api.calls == 1
+
+    def test_concurrent_refreshes_coalesce(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            api = FakeApi(delay=0.1)
+            cache = CapacityCache(Path(tmpdir) / "capacity.json", fetch=api)
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert api.calls == 1
+            assert {r.five_hour_percent for r in results} == {10}
+
+    def test_stale_sample_when_api_down(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "capacity.json"
+            CapacityCache(path, fetch=FakeApi()).get()
+            down = CapacityCache(path, ttl_s=0, fetch=lambda: None)
+            assert down.get(max_age_s=0).five_hour_percent == 10
+
+    def test_extrapolates_past_reset(self):
+        now = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+        cap = Capacity(
+            five_hour_percent=80, weekly_percent=40,
+            five_hour_resets_at=now - timedelta(hours=1),
+            weekly_resets_at=now + timedelta(days=2),
+            sampled_at=now - timedelta(hours=2),
+        )
+        later = cap.extrapolated(now)
+        assert later.five_hour_percent == 0
+        assert later.five_hour_resets_at == now + timedelta(hours=4)
+        assert later.weekly_percent == 40
+        assert Capacity.from_dict(cap.to_dict()) == cap
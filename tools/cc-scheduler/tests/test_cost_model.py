@@ -0,0 +1,101 @@
+"""Tests for the learned token cost model."""
+import json
+import tempfile
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.cost_model import CostModel, encode, load_cost_model, load_training_samples
+from lib.tasks import Task
+
+
+def write_history(logs_dir: Path, entries: list):
+    with open(logs_dir / "history.jsonl", "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def run(name: str, tokens: int, tags: list, timestamp: str = None) -> dict:
+    return {
+        "task_id": name,
+        "tokens": tokens,
+        "timestamp": timestamp or f"2026-03-01T{len(name):02d}:00:00",
+        "features": {"tags": tags, "model_hint": "sonnet", "mode": "autonomous", "body_chars": 800},
+    }
+
+
+class TestCostModel:
+    """Test fitting, prediction and caching."""
+
+    def test_features_separate_task_classes(self):
+        samples = []
+        for i in range(10):
+            samples.append((encode(f"brain-quick-{i}", {"tags": ["quick"]}), 4000 + 100 * i))
+            samples.append((encode(f"brain-research-{i}", {"tags": ["research"]}), 90000 + 1000 * i))
+        model = CostModel().fit(samples)
+
+        quick = model.predict("brain-quick-x", {"tags": ["quick"]})
+        research = model.predict("brain-research-x", {"tags": ["research"]})
+        assert quick.p50 < 10000 < 50000 < research.p50
+        assert quick.p90 > quick.p50
+        assert model.samples == 20
+
+    def test_non_positive_tokens_are_ignored(self):
+        model = CostModel().fit([(encode("a", None), 0), (encode("a", None), -500), (encode("a", None), 1000)])
+        assert model.samples == 1
+        assert model.predict("a", None).p50 == 1000
+
+    def test_index_fills_runs_missing_from_history(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            write_history(logs_dir, [run("a", 5000, ["x"], "2026-03-01T10:00:00")])
+            with open(logs_dir / "index.jsonl", "w") as f:
+                # Same run as the history entry, and one that only made it to the index
+                f.write(json.dumps({"task": "a", "started": "2026-03-01T10:00:00",
+                                    "capacity_before_5h": 10, "capacity_after_5h": 11}) + "\n")
+                f.write(json.dumps({"task": "b", "started": "2026-03-01T11:00:00",
+                                    "capacity_before_5h": 10, "capacity_after_5h": 12}) + "\n")
+
+            tokens = sorted(t for _, t in load_training_samples(logs_dir))
+            assert tokens == [5000, 10000]
+
+    def test_prefers_exact_token_sources(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            noisy = [dict(run("a", 1000, ["x"]), token_source="capacity"),
+                     dict(run("b", 2000, ["x"]), token_source="estimate")]
+            write_history(logs_dir, noisy)
+            assert [t for _, t in load_training_samples(logs_dir)] == [1000]
+
+            exact = [dict(run(f"e{i}", 7000 + i, ["x"]), token_source="stream") for i in range(5)]
+            write_history(logs_dir, noisy + exact)
+            assert sorted(t for _, t in load_training_samples(logs_dir)) == [7000, 7001, 7002, 7003, 7004]
+
+    def test_history_joins_task_files_without_features(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            write_history(logs_dir, [{"task_id": "old", "tokens": 3000, "timestamp": "t"}])
+            task = Task(name="old", path=logs_dir / "missing.md", tags=["legacy"])
+
+            (x, _), = load_training_samples(logs_dir, {"old": task})
+            assert x["tag=legacy"] == 1.0
+
+    def test_model_is_cached_until_logs_change(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            model_file = logs_dir / "cost-model.json"
+            write_history(logs_dir, [run(f"t{i}", 5000, ["x"]) for i in range(3)])
+
+            calls = []
+
+            def load_tasks():
+                calls.append(1)
+                return []
+
+            assert load_cost_model(logs_dir, load_tasks, model_file=model_file).samples == 3
+            assert load_cost_model(logs_dir, load_tasks, model_file=model_file).samples == 3
+            assert len(calls) == 1
+
+            write_history(logs_dir, [run(f"t{i}", 5000, ["x"]) for i in range(5)])
+            assert load_cost_model(logs_dir, load_tasks, model_file=model_file).samples == 5
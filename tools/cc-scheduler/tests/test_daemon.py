@@ -0,0 +1,101 @@
+"""Tests for daemon task watching and the status socket."""
+import tempfile
+import threading
+import time
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.daemon import (
+    InotifyWatcher, PollingWatcher, StatusServer, _load_libc, format_daemon_status, query_status,
+)
+
+HAS_INOTIFY = _load_libc() is not None
+
+
+def touch_later(path: Path, delay: float = 0.1):
+    timer = threading.Timer(delay, path.write_text, args=("---\nname: t\n---\n",))
+    timer.start()
+    return timer
+
+
+class TestWatchers:
+    """Test change detection with and without inotify."""
+
+    def test_polling_detects_new_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            watcher = PollingWatcher([Path(tmpdir)], interval_s=0.05)
+            assert watcher.wait(0.1) is False
+            touch_later(Path(tmpdir) / "a.md")
+            assert watcher.wait(2) is True
+            assert watcher.wait(0.1) is False
+
+    @pytest.mark.skipif(not HAS_INOTIFY, reason="inotify not available")
+    def test_inotify_detects_new_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            watcher = InotifyWatcher([Path(tmpdir)])
+            try:
+                assert watcher.wait(0.1) is False
+                touch_later(Path(tmpdir) / "a.md")
+                start = time.monotonic()
+                assert watcher.wait(5) is True
+                assert time.monotonic() - start < 2
+                assert watcher.wait(0.1) is False
+            finally:
+                watcher.close()
+
+    @pytest.mark.skipif(not HAS_INOTIFY, reason="inotify not available")
+    def test_inotify_picks_up_directory_created_later(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pending = Path(tmpdir) / "pending"
+            watcher = InotifyWatcher([pending])
+            try:
+                assert watcher.wait(0.1) is False
+                pending.mkdir()
+                assert watcher.wait(0.1) is True
+                touch_later(pending / "a.md")
+                assert watcher.wait(2) is True
+            finally:
+                watcher.close()
+
+
+class TestStatusSocket:
+    """Test serving and querying snapshots."""
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "ccq.sock"
+            server = StatusServer(path, lambda: {"pid": 1, "phase": "autonomous", "running": ["a"]})
+            try:
+                assert query_status(path) == {"pid": 1, "phase": "autonomous", "running": ["a"]}
+            finally:
+                server.close()
+            assert not path.exists()
+            assert query_status(path) is None
+
+    def test_stale_socket_replaced(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "ccq.sock"
+            path.write_text("")
+            assert query_status(path) is None
+            server = StatusServer(path, lambda: {"pid": 2})
+            try:
+                assert query_status(path) == {"pid": 2}
+            finally:
+                server.close()
+
+    def test_format_snapshot(self):
+        text = format_daemon_status({
+            "pid": 7, "phase": "buffer", "can_run": True, "reason": "Buffer window",
+            "capacity": {"text": "5h: 10%", "available_tokens": 400000, "five_hour_resets": "13:00"},
+            "queue": {"total": 2, "runnable": 1, "blocked": 1, "cycles": []},
+            "top_tasks": [{"priority": 5, "name": "sync", "score": 12.5, "tokens": 1000}],
+            "running": ["sync"], "watcher": "inotify", "next_check": "12:00:00",
+        })
+        assert "daemon pid 7" in text
+        assert "Queue: 2 pending, 1 runnable, 1 blocked" in text
+        assert "[5] sync (score: 12.5, 1,000 tokens)" in text
+        assert "Running: sync" in text
@@ -0,0 +1,74 @@
+"""Tests for the duration model and adaptive timeouts."""
+import json
+import tempfile
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.duration_model import DurationModel, percentile
+from lib.tasks import Task
+
+
+def make_task(name: str, **kwargs) -> Task:
+    return Task(name=name, path=Path(f"/tmp/{name}.md"), **kwargs)
+
+
+class TestDurationModel:
+    """Test quantiles, class backoff and timeouts."""
+
+    def test_percentile_interpolates(self):
+        assert percentile([10, 20, 30, 40, 50], 50) == 30
+        assert percentile([10, 20], 50) == 15
+        assert percentile([7], 95) == 7
+
+    def test_backs_off_to_broader_class(self):
+        model = DurationModel(min_samples=3)
+        for i in range(3):
+            model.add(f"research-{i}", {"tags": ["research"], "model_hint": "opus"}, 1000 + i)
+        for _ in range(3):
+            model.add("quick-check", {"tags": ["quick"], "model_hint": "haiku"}, 30)
+
+        est = model.predict(make_task("research-new", tags=["research"], model_hint="opus"))
+        assert est.level == "class" and est.p50 == 1001
+
+        est = model.predict(make_task("quick-check", tags=["quick"], model_hint="haiku"))
+        assert est.level == "task" and est.p95 == 30
+
+        est = model.predict(make_task("other", model_hint="sonnet"))
+        assert est.level == "global" and est.samples == 6
+
+        assert DurationModel().predict(make_task("x")) is None
+
+    def test_timeout_is_clamped(self):
+        model = DurationModel(min_samples=1)
+        model.add("fast", None, 20)
+        model.add("slow", None, 20000)
+
+        assert model.timeout_for(make_task("fast"), margin=2, min_s=300, max_s=3600) == 300
+        assert model.timeout_for(make_task("slow"), margin=2, min_s=300, max_s=3600) == 3600
+        assert DurationModel(min_samples=5).timeout_for(make_task("fast")) is None
+
+    def test_timeout_ignores_unrelated_runs(self):
+        model = DurationModel(min_samples=3)
+        for i in range(3):
+            model.add(f"quick-{i}", {"tags": ["quick"], "model_hint": "haiku"}, 30)
+
+        # Only global history matches: keep the declared timeout
+        assert model.timeout_for(make_task("migration", timeout="2h", model_hint="opus")) is None
+        assert model.timeout_for(make_task("quick-new", tags=["quick"], model_hint="haiku")) == 300
+
+    def test_history_skips_crashed_runs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            with open(logs_dir / "history.jsonl", "w") as f:
+                for entry in [
+                    {"task_id": "a", "success": True, "duration_s": 100},
+                    {"task_id": "a", "success": False, "error_type": "timeout", "duration_s": 1800},
+                    {"task_id": "a", "success": False, "error_type": "exit_error", "duration_s": 3},
+                ]:
+                    f.write(json.dumps(entry) + "\n")
+
+            model = DurationModel.from_history(logs_dir, min_samples=1)
+            assert model.samples == 2
+            assert model.predict(make_task("a")).p50 == 950
@@ -1,10 +1,29 @@
+import asyncio
+import os
+import threading
+import time
 import unittest
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
-from lib.executor import move_task
+from lib.executor import move_task, execute_task, execute_tasks_async, interrupted_result, terminate_running
 from lib.tasks import Task
+from lib.completed_index import read_completed_names
+from lib.run_id import new_run_id
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process exists and is not a zombie."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    stat = Path(f"/proc/{pid}/stat")
+    try:
+        return not stat.read_text().rsplit(") ", 1)[1].startswith("Z")
+    except (OSError, IndexError):
+        return True
 
 
 class TestMoveTask(unittest.TestCase):
@@ -53,6 +72,39 @@ class TestMoveTask(unittest.TestCase):
             assert result == dest_file
             assert dest_file.exists()
 
+    def test_move_task_to_completed_records_name(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            from_dir = tmpdir / "active"
+            from_dir.mkdir(parents=True, exist_ok=True)
+
+            task_file = from_dir / "test_task.md"
+            task_file.write_text("---\nname: renamed-task\n---\n# Test Task")
+
+            task = Task(name="renamed-task", path=task_file)
+
+            with patch("lib.executor.TASKS_DIR", tmpdir):
+                move_task(task, "active", "completed")
+
+            assert read_completed_names(tmpdir / "completed") == {"renamed-task"}
+
+    def test_move_task_to_completed_without_index_keeps_old_names(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            completed_dir = tmpdir / "completed"
+            completed_dir.mkdir(parents=True)
+            for name in ("old-a", "old-b"):
+                (completed_dir / f"{name}.md").write_text(f"---\nname: {name}\n---\nDone")
+            from_dir = tmpdir / "active"
+            from_dir.mkdir()
+            task_file = from_dir / "new-task.md"
+            task_file.write_text("---\nname: new-task\n---\nBody")
+
+            with patch("lib.executor.TASKS_DIR", tmpdir):
+                move_task(Task(name="new-task", path=task_file), "active", "completed")
+
+            assert read_completed_names(completed_dir) == {"old-a", "old-b", "new-task"}
+
     def test_move_task_missing_both(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             tmpdir = Path(tmpdir)
@@ -70,5 +122,140 @@ class TestMoveTask(unittest.TestCase):
                     move_task(task, "pending", "active")
 
 
+class TestExecuteTask(unittest.TestCase):
+    """Run real shell commands in place of claude."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmp.name)
+        (self.tmpdir / "pending").mkdir()
+        patches = [
+            patch("lib.executor.TASKS_DIR", self.tmpdir),
+            patch("lib.executor.WORKING_DIR", self.tmpdir),
+            patch("lib.executor.KILL_GRACE_S", 0.5),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def make_task(self, name: str) -> Task:
+        path = self.tmpdir / "pending" / f"{name}.md"
+        path.write_text(f"# {name}")
+        return Task(name=name, path=path)
+
+    def run_shell(self, script: str, **kwargs):
+        with patch("lib.executor.build_command", return_value=["sh", "-c", script]):
+            return execute_task(self.make_task("shell"), stream_output=False, **kwargs)
+
+    def test_success_captures_output(self):
+        result = self.run_shell("echo hello; echo oops >&2")
+        assert result.success and result.exit_code == 0
+        assert "hello" in result.output and "oops" in result.output
+        assert (self.tmpdir / "completed" / "shell.md").exists()
+
+    def test_streams_output_to_file(self):
+        output_path = self.tmpdir / "run.output.log"
+        result = self.run_shell("seq 1 20000", output_path=output_path)
+        expected = "".join(f"{i}\n" for i in range(1, 20001))
+        assert output_path.read_text() == expected
+        assert result.output_path == output_path
+        assert result.output_chars == len(expected)
+        assert result.output.startswith("1\n2\n") and result.output.endswith("20000\n")
+        assert "truncated" in result.output and len(result.output) < len(expected)
+
+    def test_parses_stream_events(self):
+        events = []
+        result_line = ('{"type":"result","subtype":"success","is_error":false,"session_id":"s-9",'
+                       '"total_cost_usd":0.5,"usage":{"input_tokens":7,"output_tokens":3}}')
+        with patch("lib.executor.build_command", return_value=["sh", "-c", f"echo '{result_line}'"]):
+            result = execute_task(self.make_task("shell"), stream_output=False, on_event=events.append)
+        assert result.success
+        assert result.usage.input_tokens == 7 and result.usage.output_tokens == 3
+        assert result.cost_usd == 0.5 and result.session_id == "s-9"
+        assert [e.kind for e in events] == ["result"]
+
+    def test_log_excerpt_is_rendered_text(self):
+        output_path = self.tmpdir / "run.output.log"
+        assistant = ('{"type":"assistant","message":{"id":"m1","content":['
+                     '{"type":"text","text":"Done with it"},{"type":"tool_use","name":"Read"}]}}')
+        result = self.run_shell(f"echo '{assistant}'", output_path=output_path)
+        assert result.output == "Done with it\n[tool] Read\n"
+        assert result.output_chars == len(result.output)
+        assert output_path.read_text() == assistant + "\n"
+
+    def test_quota_error_stops_run_early(self):
+        started = time.monotonic()
+        result = self.run_shell(
+            """echo '{"type":"result","is_error":true,"result":"Claude AI usage limit reached"}'; sleep 30"""
+        )
+        assert time.monotonic() - started < 10
+        assert not result.success and result.quota_exhausted
+        assert result.error == "Claude AI usage limit reached"
+
+    def test_failure_moves_to_failed(self):
+        result = self.run_shell("exit 3")
+        assert not result.success and result.exit_code == 3
+        assert (self.tmpdir / "failed" / "shell.md").exists()
+
+    def test_timeout_kills_process_group(self):
+        started = time.monotonic()
+        result = self.run_shell("echo before; sleep 30 & wait", timeout_s=1)
+        assert time.monotonic() - started < 10
+        assert not result.success
+        assert result.error == "Task timed out after 1s"
+        assert "before" in result.output
+
+    def test_timeout_escalates_to_sigkill(self):
+        started = time.monotonic()
+        result = self.run_shell("trap '' TERM; sleep 30", timeout_s=1)
+        assert time.monotonic() - started < 10
+        assert "timed out" in result.error
+
+    def test_terminate_running_kills_task_processes(self):
+        pid_file = self.tmpdir / "child.pid"
+        results = []
+        runner = threading.Thread(target=lambda: results.append(
+            self.run_shell(f"sleep 60 & echo $! > {pid_file}; wait")
+        ))
+        runner.start()
+        deadline = time.monotonic() + 10
+        while not (pid_file.exists() and pid_file.read_text().strip()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        child = int(pid_file.read_text())
+        assert process_alive(child)
+
+        terminate_running()
+        runner.join(10)
+        assert not runner.is_alive()
+        assert not process_alive(child)
+        result, = results
+        assert not result.success and result.error == "Interrupted"
+        assert (self.tmpdir / "failed" / "shell.md").exists()
+
+    def test_interrupted_result_moves_task_to_failed(self):
+        pending = self.make_task("never-started")
+        (self.tmpdir / "active").mkdir()
+        active_path = self.tmpdir / "active" / "was-running.md"
+        active_path.write_text("# was-running")
+        running = Task(name="was-running", path=self.tmpdir / "pending" / "was-running.md")
+
+        for task in (pending, running):
+            result = interrupted_result(task, new_run_id())
+            assert not result.success and result.error == "Interrupted"
+            assert result.duration_seconds >= 0
+            assert (self.tmpdir / "failed" / f"{task.name}.md").exists()
+        assert not active_path.exists()
+
+    def test_runs_tasks_in_one_loop(self):
+        tasks = [self.make_task(f"t{i}") for i in range(3)]
+        started = time.monotonic()
+        with patch("lib.executor.build_command", return_value=["sh", "-c", "sleep 1; echo done"]):
+            results = asyncio.run(execute_tasks_async(tasks, stream_output=False))
+        assert time.monotonic() - started < 2.5
+        assert [r.task_name for r in results] == ["t0", "t1", "t2"]
+        assert all(r.success and "done" in r.output for r in results)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the frontmatter parser."""
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.frontmatter import parse_yaml, read_header, read_body
+from lib.tasks import parse_task_file
+
+
+class TestYamlSubset:
+    """Test the supported YAML subset."""
+
+    def test_scalars(self):
+        meta = parse_yaml(
+            "count: 3\n"
+            "ratio: 0.75\n"
+            "exp: 1e3\n"
+            "flag: true\n"
+            "nothing: ~\n"
+            "day: 2026-03-01\n"
+            "stamp: 2026-03-01T10:30:00\n"
+            "plain: fix it: now  # trailing comment\n"
+            "quoted: \"a \\\"b\\\" # not a comment\"\n"
+            "single: 'it''s'\n"
+        )
+        assert meta == {
+            "count": 3,
+            "ratio": 0.75,
+            "exp": 1000.0,
+            "flag": True,
+            "nothing": None,
+            "day": date(2026, 3, 1),
+            "stamp": datetime(2026, 3, 1, 10, 30),
+            "plain": "fix it: now",
+            "quoted": 'a "b" # not a comment',
+            "single": "it's",
+        }
+
+    def test_flow_collections(self):
+        meta = parse_yaml('tags: [a, "b, c", \'d\']\nlimits: {tokens: 100, model: opus}\n')
+        assert meta["tags"] == ["a", "b, c", "d"]
+        assert meta["limits"] == {"tokens": 100, "model": "opus"}
+
+    def test_block_lists_and_nested_maps(self):
+        meta = parse_yaml(
+            "depends_on:\n"
+            "  - first\n"
+            "  - \"second\"\n"
+            "same_indent:\n"
+            "- x\n"
+            "routing:\n"
+            "  backend: desktop\n"
+            "  retry:\n"
+            "    attempts: 2\n"
+            "steps:\n"
+            "  - name: one\n"
+            "    tokens: 10\n"
+            "  - name: two\n"
+            "empty:\n"
+            "after: ok\n"
+        )
+        assert meta["depends_on"] == ["first", "second"]
+        assert meta["same_indent"] == ["x"]
+        assert meta["routing"] == {"backend": "desktop", "retry": {"attempts": 2}}
+        assert meta["steps"] == [{"name": "one", "tokens": 10}, {"name": "two"}]
+        assert meta["empty"] is None
+        assert meta["after"] == "ok"
+
+    def test_block_scalars(self):
+        meta = parse_yaml("literal: |\n  line one\n  line two\nfolded: >-\n  a\n  b\nnext: 1\n")
+        assert meta["literal"] == "line one\nline two\n"
+        assert meta["folded"] == "a b"
+        assert meta["next"] == 1
+
+
+class TestHeaderReading:
+    """Test header-only reads and lazy bodies."""
+
+    def test_reads_header_and_body_separately(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "task.md"
+            path.write_text("---\nname: lazy\ndeadline: 2026-03-01\n---\n\nThe body\n---\nmore\n")
+
+            meta, offset = read_header(path)
+            assert meta == {"name": "lazy", "deadline": date(2026, 3, 1)}
+            assert path.read_bytes()[offset:].startswith(b"\nThe body")
+            assert read_body(path) == "The body\n---\nmore"
+
+    def test_task_body_loads_on_demand(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "task.md"
+            path.write_text("---\nname: lazy\npriority: high\ndeadline: 2026-03-01\n---\nDo the thing\n")
+
+            task = parse_task_file(path)
+            assert task.body is None
+            assert task.priority == 3
+            assert task.deadline == datetime(2026, 3, 1)
+            assert task.load_body() == "Do the thing"
+
+    def test_no_frontmatter(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "plain.md"
+            path.write_text("Just text\n")
+            assert read_header(path) == ({}, 0)
+            assert read_body(path) == "Just text"
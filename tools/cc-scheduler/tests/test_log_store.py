@@ -0,0 +1,128 @@
+"""Tests for scheduler log storage."""
+import json
+import gzip
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import log_store
+from lib.log_store import LogStore, count_jsonl, read_jsonl, read_jsonl_tail, run_log_path
+from lib.run_id import new_run_id, run_id_time
+
+
+def write_entries(path: Path, entries: list, mode: str = "w"):
+    with open(path, mode) as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+class TestTailReader:
+    """Test reverse block reads and the count sidecar."""
+
+    def test_tail_matches_full_read(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "index.jsonl"
+            write_entries(path, [{"i": i, "pad": "x" * (i % 37)} for i in range(500)])
+            # Small blocks so lines straddle block boundaries
+            with patch("lib.log_store.TAIL_BLOCK", 100):
+                for n in (1, 7, 100, 500, 1000):
+                    assert read_jsonl_tail(path, n) == list(read_jsonl(path))[-n:]
+
+    def test_tail_skips_blank_and_corrupt_lines(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "history.jsonl"
+            path.write_text('{"i": 0}\n\n{"i": 1\n{"i": 2}\n')
+            assert read_jsonl_tail(path, 5) == [{"i": 0}, {"i": 2}]
+            assert read_jsonl_tail(Path(tmpdir) / "missing.jsonl", 5) == []
+
+    def test_tail_reads_first_line_without_trailing_newline(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "history.jsonl"
+            path.write_text('{"i": 0, "pad": "' + "x" * 150 + '"}\n{"i": 1}')
+            with patch("lib.log_store.TAIL_BLOCK", 64):
+                assert [e["i"] for e in read_jsonl_tail(path, 5)] == [0, 1]
+
+    def test_count_catches_up_on_appends(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "index.jsonl"
+            write_entries(path, [{"i": i} for i in range(10)])
+            assert count_jsonl(path) == 10
+            assert (Path(tmpdir) / "index.jsonl.offsets").exists()
+
+            write_entries(path, [{"i": i} for i in range(5)], mode="a")
+            with patch("lib.log_store.parse_jsonl_line", wraps=log_store.parse_jsonl_line) as parse:
+                assert count_jsonl(path) == 15
+                assert parse.call_count == 5  # Only the appended lines
+
+            # Rewritten (smaller) file is recounted
+            write_entries(path, [{"i": 0}])
+            assert count_jsonl(path) == 1
+
+
+def run(task: str, started: str, status: str = "completed") -> dict:
+    return {"task": task, "started": started, "status": status}
+
+
+class TestLogStore:
+    """Test monthly rotation, segment pruning and cross-segment reads."""
+
+    def test_run_logs_partitioned_by_month(self):
+        run_id = new_run_id()
+        started = run_id_time(run_id)
+        path = run_log_path(run_id, "sync", Path("/logs"))
+        assert path == Path("/logs") / started.strftime("%Y/%m") / \
+            f"{started.strftime('%Y-%m-%d-%H%M')}-sync-{run_id}.md"
+        assert run_log_path(run_id, "sync", Path("/logs")) == path
+
+    def test_new_month_rolls_hot_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = LogStore(Path(tmpdir))
+            store.append("index", run("a", "2026-01-10T10:00:00"), now=datetime(2026, 1, 10))
+            store.append("index", run("b", "2026-01-20T10:00:00", "failed"), now=datetime(2026, 1, 20))
+            store.append("index", run("c", "2026-02-01T10:00:00"), now=datetime(2026, 2, 1))
+
+            segment = Path(tmpdir) / "segments" / "index-2026-01.jsonl.gz"
+            assert [e["task"] for e in read_jsonl(segment)] == ["a", "b"]
+            assert [e["task"] for e in read_jsonl(store.hot_path("index"))] == ["c"]
+
+            (record,) = store.segments("index")
+            assert record["count"] == 2 and record["tasks"] == ["a", "b"]
+            assert record["statuses"] == {"completed": 1, "failed": 1}
+            assert store.count("index") == 3
+            assert [e["task"] for e in store.read("index")] == ["a", "b", "c"]
+            assert [e["task"] for e in store.tail("index", 2)] == ["b", "c"]
+
+    def test_flat_legacy_file_split_by_month(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logs_dir = Path(tmpdir)
+            write_entries(logs_dir / "history.jsonl", [
+                {"task_id": "a", "timestamp": "2025-12-01T10:00:00", "success": True},
+                {"task_id": "b", "timestamp": "2026-01-01T10:00:00", "success": False},
+                {"task_id": "c", "timestamp": "2026-02-03T10:00:00", "success": True},
+            ])
+            store = LogStore(logs_dir)
+            store.append("history", {"task_id": "d", "timestamp": "2026-02-04T10:00:00", "success": True},
+                         now=datetime(2026, 2, 4))
+            assert [s["month"] for s in store.segments("history")] == ["2025-12", "2026-01"]
+            assert [e["task_id"] for e in read_jsonl(store.hot_path("history"))] == ["c", "d"]
+            assert [e["task_id"] for e in store.read("history")] == ["a", "b", "c", "d"]
+
+    def test_queries_skip_segments_that_cannot_match(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = LogStore(Path(tmpdir))
+            for month in (1, 2, 3):
+                stamp = f"2026-{month:02d}-15T10:00:00"
+                store.append("index", run(f"t{month}", stamp), now=datetime(2026, month, 15))
+            store.append("index", run("t1", "2026-04-01T10:00:00", "failed"), now=datetime(2026, 4, 1))
+
+            # Queries that fail to prune February would fail to read it
+            (Path(tmpdir) / "segments" / "index-2026-02.jsonl.gz").write_bytes(b"not gzip")
+
+            assert [e["started"][:7] for e in store.read("index", task="t1")] == ["2026-01", "2026-04"]
+            assert [e["task"] for e in store.read("index", status="failed")] == ["t1"]
+            assert [e["task"] for e in store.read("index", since=date(2026, 3, 1))] == ["t3", "t1"]
+            assert [e["task"] for e in store.read("index", since=date(2026, 3, 1), until=date(2026, 3, 15))] == ["t3"]
@@ -0,0 +1,53 @@
+"""Tests for bounded output capture."""
+import tempfile
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.output_capture import OutputCapture
+
+
+class TestOutputCapture:
+    """Test head/tail buffers and streaming to disk."""
+
+    def test_small_output_kept_whole(self):
+        capture = OutputCapture(head_chars=10, tail_chars=10)
+        capture.write("hello ")
+        capture.write("world")
+        assert capture.text == "hello world"
+        assert not capture.truncated
+
+    def test_keeps_head_and_tail_only(self):
+        capture = OutputCapture(head_chars=5, tail_chars=5)
+        for i in range(100):
+            capture.write(f"{i:03d}\n")
+        assert capture.chars == 400
+        assert capture.head == "000\n0"
+        assert capture.tail == "\n099\n"
+        assert capture.truncated
+        assert "[truncated 390 chars]" in capture.text
+
+    def test_tail_trims_partial_chunks(self):
+        capture = OutputCapture(head_chars=0, tail_chars=4)
+        capture.write("abcdef")
+        capture.write("gh")
+        assert capture.tail == "efgh"
+
+    def test_streams_everything_to_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "logs" / "run.output.log"
+            with OutputCapture(path, head_chars=3, tail_chars=3) as capture:
+                for _ in range(1000):
+                    capture.write("line\n")
+            assert path.read_text() == "line\n" * 1000
+            assert len(capture.text) < 100
+
+    def test_raw_and_text_streams_are_separate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "run.output.log"
+            with OutputCapture(path) as capture:
+                capture.write_raw('{"type":"assistant"}\n')
+                capture.add_text("hello\n")
+            assert path.read_text() == '{"type":"assistant"}\n'
+            assert capture.text == "hello\n" and capture.chars == 6
@@ -0,0 +1,51 @@
+"""Tests for run identity."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import run_id as run_id_module
+from lib.run_id import ULID_LENGTH, is_run_id, new_run_id, run_id_time
+
+
+class TestRunId:
+    """Test uniqueness, ordering and the encoded start time."""
+
+    def test_format(self):
+        run_id = new_run_id()
+        assert len(run_id) == ULID_LENGTH
+        assert is_run_id(run_id)
+        assert not is_run_id("run-2026-01-05-100000")
+
+    def test_monotonic_within_same_millisecond(self):
+        with patch.object(run_id_module.time, "time_ns", return_value=1_770_000_000_000_000_000):
+            ids = [new_run_id() for _ in range(1000)]
+        assert len(set(ids)) == 1000
+        assert ids == sorted(ids)
+        assert len({i[:10] for i in ids}) == 1  # Same timestamp part
+
+    def test_monotonic_when_clock_steps_back(self):
+        with patch.object(run_id_module.time, "time_ns", return_value=1_770_000_001_000_000_000):
+            later = new_run_id()
+        with patch.object(run_id_module.time, "time_ns", return_value=1_770_000_000_000_000_000):
+            earlier_clock = new_run_id()
+        assert earlier_clock > later
+
+    def test_unique_across_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: new_run_id(), range(2000)))
+        assert len(set(ids)) == 2000
+
+    def test_time_roundtrip(self):
+        before = datetime.now().replace(microsecond=0)
+        started = run_id_time(new_run_id())
+        assert before <= started <= datetime.now()
+
+    def test_time_rejects_other_ids(self):
+        with pytest.raises(ValueError):
+            run_id_time("run-2026-01-05-100000")
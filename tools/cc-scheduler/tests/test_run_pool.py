@@ -0,0 +1,177 @@
+"""Tests for the concurrent run pool."""
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.run_pool import RunPool, load_concurrency, quota_blocks
+from lib.tasks import Task
+
+
+def make_task(name: str, **kwargs) -> Task:
+    return Task(name=name, path=Path(f"/tmp/{name}.md"), **kwargs)
+
+
+@dataclass
+class FakeResult:
+    success: bool
+
+
+class Recorder:
+    """Fake runner tracking how many tasks overlap."""
+
+    def __init__(self, fail=(), delay=0.05):
+        self.fail = set(fail)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.started = []
+
+    def __call__(self, task):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.started.append(task.name)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return FakeResult(success=task.name not in self.fail)
+
+
+class TestRunPool:
+    """Test concurrency limits, admission and dependency ordering."""
+
+    def test_respects_backend_limits(self):
+        run = Recorder()
+        tasks = [make_task(f"t{i}") for i in range(5)]
+        finished = []
+        RunPool(run, concurrency={"code": 2}).run_all(tasks, on_result=lambda t, r: finished.append(t.name))
+        assert run.peak == 2
+        assert sorted(finished) == sorted(t.name for t in tasks)
+
+    def test_default_is_sequential(self):
+        run = Recorder(delay=0.01)
+        tasks = [make_task(f"t{i}") for i in range(3)]
+        RunPool(run).run_all(tasks, on_result=lambda t, r: None)
+        assert run.peak == 1
+        assert run.started == ["t0", "t1", "t2"]
+
+    def test_admission_sees_reserved_tokens(self):
+        run = Recorder()
+        tasks = [make_task(f"t{i}", estimated_tokens=10000) for i in range(4)]
+        seen = []
+
+        def admit(task, reserved):
+            seen.append(reserved)
+            return (reserved + task.estimated_tokens <= 20000, "Exceeds live capacity")
+
+        RunPool(run, concurrency={"code": 4}, admit=admit).run_all(tasks, on_result=lambda t, r: None)
+        assert run.peak == 2
+        assert len(run.started) == 4
+        assert max(seen) == 20000
+
+    def test_skips_when_nothing_running_and_not_admitted(self):
+        run = Recorder()
+        skipped = []
+        tasks = [make_task("big", estimated_tokens=90000), make_task("small", estimated_tokens=1000)]
+        RunPool(run, admit=lambda t, r: (t.estimated_tokens < 50000, "Exceeds budget")).run_all(
+            tasks, on_result=lambda t, r: None, on_skip=lambda t, reason: skipped.append((t.name, reason))
+        )
+        assert skipped == [("big", "Exceeds budget")]
+        assert run.started == ["small"]
+
+    def test_dependents_wait_and_skip_on_failure(self):
+        run = Recorder(fail={"a"})
+        tasks = [
+            make_task("a"),
+            make_task("b", depends_on=["a"]),
+            make_task("c", depends_on=["b"]),
+            make_task("d"),
+        ]
+        skipped = []
+        RunPool(run, concurrency={"code": 4}).run_all(
+            tasks, on_result=lambda t, r: None, on_skip=lambda t, reason: skipped.append(t.name)
+        )
+        assert sorted(run.started) == ["a", "d"]
+        assert skipped == ["b", "c"]
+
+    def test_dependency_runs_before_dependent(self):
+        run = Recorder(delay=0.01)
+        tasks = [make_task("b", depends_on=["a"]), make_task("a")]
+        RunPool(run, concurrency={"code": 2}).run_all(tasks, on_result=lambda t, r: None)
+        assert run.started == ["a", "b"]
+
+    def test_results_handled_on_calling_thread(self):
+        caller = threading.get_ident()
+        threads = set()
+        RunPool(Recorder(), concurrency={"code": 3}).run_all(
+            [make_task(f"t{i}") for i in range(3)],
+            on_result=lambda t, r: threads.add(threading.get_ident()),
+        )
+        assert threads == {caller}
+
+    def test_interrupt_stops_running_tasks(self):
+        release = threading.Event()
+
+        def run(task):
+            release.wait(10)
+            return FakeResult(success=False)
+
+        def on_start(task):
+            if task.name == "b":
+                raise KeyboardInterrupt
+
+        pool = RunPool(run, concurrency={"code": 2}, stop=release.set)
+        started = time.monotonic()
+        with pytest.raises(KeyboardInterrupt):
+            pool.run_all([make_task("a"), make_task("b")], on_result=lambda t, r: None, on_start=on_start)
+        assert release.is_set()
+        assert time.monotonic() - started < 5
+
+    def test_interrupt_reports_every_started_task_once(self):
+        release, stuck = threading.Event(), threading.Event()
+
+        def run(task):
+            (stuck if task.name == "b" else release).wait(10)
+            return FakeResult(success=False)
+
+        def on_start(task):
+            if task.name == "c":
+                raise KeyboardInterrupt
+
+        results, abandoned = [], []
+        pool = RunPool(run, concurrency={"code": 3}, stop=release.set)
+        try:
+            with patch("lib.run_pool.INTERRUPT_DRAIN_S", 0.2), pytest.raises(KeyboardInterrupt):
+                pool.run_all(
+                    [make_task("a"), make_task("b"), make_task("c")],
+                    on_result=lambda t, r: results.append(t.name),
+                    on_start=on_start,
+                    on_abandon=lambda t: abandoned.append(t.name),
+                )
+        finally:
+            stuck.set()
+        # a stopped and reported back; b did not in time
+        assert (results, abandoned) == (["a"], ["b"])
+
+    def test_quota_blocks_only_exhausted_backend(self):
+        code, desktop = make_task("a"), make_task("b", backend="desktop")
+        # No --backend and no exhausted quota: everything is admitted
+        assert not quota_blocks(None, code, None)
+        assert not quota_blocks(None, desktop, None)
+        assert quota_blocks("code", code, None)
+        assert not quota_blocks("code", desktop, None)
+        # A forced backend applies to every task
+        assert quota_blocks("desktop", code, "desktop")
+        assert not quota_blocks("code", code, "desktop")
+
+    def test_load_concurrency(self):
+        assert load_concurrency({"execution": {"concurrency": {"code": 3}}}) == {"code": 3}
+        assert load_concurrency({}) == {}
@@ -0,0 +1,265 @@
+"""Tests for scheduler scoring and planning."""
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.scheduler import Scheduler, ScheduleConfig
+from lib.capacity import Capacity
+from lib.tasks import Task
+
+
+def make_task(name: str, **kwargs) -> Task:
+    return Task(name=name, path=Path(f"/tmp/{name}.md"), **kwargs)
+
+
+def make_scheduler(remaining_today: float = 100.0) -> Scheduler:
+    budget = MagicMock()
+    budget.get_remaining_today.return_value = remaining_today
+    return Scheduler(ScheduleConfig(), budget)
+
+
+class TestBatchScoring:
+    """Test batch scoring and top-k selection."""
+
+    def test_batch_matches_single_scores(self):
+        now = datetime(2026, 3, 1, 12, 0)
+        tasks = [
+            make_task("overdue", priority=5, deadline=now - timedelta(hours=1)),
+            make_task("tomorrow", priority=3, deadline=now + timedelta(hours=30)),
+            make_task("week", priority=7, deadline=now + timedelta(days=6), estimated_tokens=20000),
+            make_task("later", priority=1, deadline=now + timedelta(days=30), depends_on=["x", "y"]),
+            make_task("none", priority=10, estimated_tokens=90000),
+        ]
+        scheduler = make_scheduler()
+        tight = Capacity(five_hour_percent=80, weekly_percent=10)
+
+        batch = scheduler.score_tasks(tasks, tight, now=now)
+        single = [scheduler.score_task(t, tight, now=now) for t in tasks]
+        assert batch == single
+
+        # priority 5 overdue: 60 + urgency 100*0.5 + efficiency 50*0.3
+        assert batch[0] == 60 + 50 + 15
+
+    def test_top_tasks_matches_rank_prefix(self):
+        tasks = [make_task(f"t{i}", priority=(i * 7) % 10 + 1) for i in range(25)]
+        scheduler = make_scheduler()
+
+        ranked = scheduler.rank_tasks(tasks)
+        assert scheduler.top_tasks(tasks, 5) == ranked[:5]
+        assert list(scheduler.iter_ranked(tasks)) == ranked
+        assert scheduler.select_next_task(tasks) is ranked[0][0]
+
+
+class TestSessionPlanning:
+    """Test greedy session planning."""
+
+    def test_plan_session_packs_by_rank(self):
+        scheduler = make_scheduler(remaining_today=100)
+        tasks = [
+            make_task("big", priority=1, estimated_tokens=150000),
+            make_task("small", priority=2, estimated_tokens=40000),
+            make_task("tiny", priority=9, estimated_tokens=5000),
+        ]
+        cap = Capacity(five_hour_percent=62, weekly_percent=0)  # 38% -> 190k tokens
+
+        planned = scheduler.plan_session(tasks, cap, phase="autonomous")
+        assert [t.name for t in planned] == ["big", "small"]
+
+
+class TestKnapsackPlanner:
+    """Test the optimizing planner mode."""
+
+    def test_knapsack_beats_greedy_on_large_blocker(self):
+        tasks = [
+            make_task("big", priority=1, estimated_tokens=150000),
+            make_task("mid-a", priority=2, estimated_tokens=90000),
+            make_task("mid-b", priority=2, estimated_tokens=90000),
+        ]
+        cap = Capacity(five_hour_percent=64, weekly_percent=0)  # 36% -> 180k tokens
+
+        greedy = make_scheduler()
+        assert [t.name for t in greedy.plan_session(tasks, cap, phase="autonomous")] == ["big"]
+
+        optimal = make_scheduler()
+        optimal.config.planner_mode = "knapsack"
+        assert [t.name for t in optimal.plan_session(tasks, cap, phase="autonomous")] == ["mid-a", "mid-b"]
+
+    def test_dependencies_selected_together_and_ordered(self):
+        from lib.task_graph import TaskGraph
+        from lib.planner import knapsack_select
+
+        parent = make_task("parent", estimated_tokens=60000)
+        child = make_task("child", estimated_tokens=10000, depends_on=["parent"])
+        other = make_task("other", estimated_tokens=50000)
+        graph = TaskGraph([parent, child, other])
+
+        # child alone is worth the most but cannot run without parent
+        ranked = [(child, 100.0), (other, 60.0), (parent, 10.0)]
+        selected = knapsack_select(ranked, 65000, graph=graph)
+        assert [t.name for t in selected] == ["other"]
+
+        selected = knapsack_select(ranked, 120000, graph=graph)
+        assert [t.name for t in selected] == ["other", "parent", "child"]
+
+    def test_time_limit_falls_back_to_greedy(self):
+        from unittest.mock import patch
+        from lib.planner import PlannerTimeout
+
+        tasks = [make_task("a", estimated_tokens=1000)]
+        scheduler = make_scheduler()
+        scheduler.config.planner_mode = "knapsack"
+        cap = Capacity(five_hour_percent=0, weekly_percent=0)
+
+        with patch("lib.planner._solve", side_effect=PlannerTimeout()):
+            assert [t.name for t in scheduler.plan_session(tasks, cap, phase="autonomous")] == ["a"]
+
+
+class TestWeekPlanner:
+    """Test multi-day week planning."""
+
+    DAYS = [(datetime(2026, 3, 2).date() + timedelta(days=i), 100000) for i in range(3)]
+
+    def test_deadline_task_lands_before_deadline(self):
+        from lib.week_planner import WeekPlanner
+
+        big = [make_task(f"big{i}", estimated_tokens=100000) for i in range(2)]
+        due = make_task("due", estimated_tokens=40000, deadline=datetime(2026, 3, 2, 18, 0))
+        ranked = [(big[0], 200.0), (big[1], 190.0), (due, 50.0)]
+
+        plan = WeekPlanner(self.DAYS).plan(ranked)
+        assert plan.to_dict() == {"2026-03-02": ["due"], "2026-03-03": ["big0"], "2026-03-04": ["big1"]}
+        assert plan.days_late("due") == 0
+        assert plan.unplanned == []
+
+    def test_dependencies_planned_first(self):
+        from lib.task_graph import TaskGraph
+        from lib.week_planner import WeekPlanner
+
+        parent = make_task("parent", estimated_tokens=80000)
+        child = make_task("child", estimated_tokens=30000, depends_on=["parent"])
+        graph = TaskGraph([parent, child])
+
+        plan = WeekPlanner(self.DAYS, graph=graph).plan([(child, 100.0), (parent, 10.0)])
+        assert plan.to_dict() == {"2026-03-02": ["parent"], "2026-03-03": ["child"], "2026-03-04": []}
+
+    def test_dependency_inherits_dependent_deadline(self):
+        from lib.task_graph import TaskGraph
+        from lib.week_planner import WeekPlanner
+
+        filler = make_task("filler", estimated_tokens=100000)
+        parent = make_task("parent", estimated_tokens=50000)
+        due = make_task("due", estimated_tokens=40000, depends_on=["parent"],
+                        deadline=datetime(2026, 3, 2, 18, 0))
+        graph = TaskGraph([filler, parent, due])
+
+        plan = WeekPlanner(self.DAYS, graph=graph).plan([(filler, 300.0), (due, 50.0), (parent, 10.0)])
+        assert plan.to_dict()["2026-03-02"] == ["parent", "due"]
+        assert plan.loss() == 0
+
+    def test_bins_use_the_estimator(self):
+        from lib.week_planner import WeekPlanner
+
+        # Declared small, but the estimator (e.g. the cost model) says each fills a day
+        tasks = [make_task(f"t{i}", estimated_tokens=1000) for i in range(2)]
+        plan = WeekPlanner(self.DAYS, estimate=lambda t: 90000).plan([(t, 10.0 - i) for i, t in enumerate(tasks)])
+        assert plan.to_dict() == {"2026-03-02": ["t0"], "2026-03-03": ["t1"], "2026-03-04": []}
+        assert plan.bins[0].used_tokens == 90000
+
+    def test_mark_completed_refills_freed_capacity(self):
+        from lib.week_planner import WeekPlanner
+
+        tasks = [make_task(f"t{i}", estimated_tokens=60000) for i in range(3)]
+        plan = WeekPlanner(self.DAYS).plan([(t, 10.0 - i) for i, t in enumerate(tasks)])
+        assert plan.to_dict()["2026-03-02"] == ["t0"]
+
+        # t0 used far less than estimated, so t1 moves up to the same day
+        moved = plan.mark_completed("t0", tokens_used=20000)
+        assert moved == ["t1", "t2"]
+        assert plan.to_dict() == {"2026-03-02": ["t1"], "2026-03-03": ["t2"], "2026-03-04": []}
+        assert plan.day_tasks(date(2026, 3, 2)) == ["t1"]
+        assert plan.day_tasks(date(2026, 3, 9)) == []
+
+    def test_plan_week_uses_remaining_daily_allocations(self):
+        from lib.budget import WeeklyBudget, DailyAllocation
+
+        scheduler = make_scheduler()
+        scheduler.budget.load_weekly_budget.return_value = WeeklyBudget(
+            week_start="2026-03-02",
+            weekly_limit_percent=100,
+            daily_allocations={
+                "2026-03-02": DailyAllocation(planned_percent=20, actual_percent=10),
+                "2026-03-03": DailyAllocation(planned_percent=20),
+            },
+        )
+        # Morning of 03-02: 10% left today (40k autonomous), 20% tomorrow (80k)
+        days = scheduler.week_days(now=datetime(2026, 3, 2, 9, 0))
+        assert [(d.isoformat(), round(t)) for d, t in days] == [("2026-03-02", 40000), ("2026-03-03", 80000)]
+
+
+class TestCostEstimates:
+    """Test learned token estimates in session planning."""
+
+    def test_plan_session_packs_by_predicted_tokens(self):
+        from lib.cost_model import CostModel
+
+        # Declared 50k each, but the model has learned these are small
+        tasks = [make_task(f"quick-{i}") for i in range(4)]
+        model = CostModel(intercept=9.3, sigma=0.25, samples=10)  # exp(9.3) ~ 11k
+        cap = Capacity(five_hour_percent=0, weekly_percent=0)
+
+        scheduler = make_scheduler(remaining_today=10)  # autonomous: 8% -> 40k tokens
+        assert len(scheduler.plan_session(tasks, cap, phase="autonomous")) == 0
+
+        scheduler.set_cost_model(model)
+        assert 10000 < scheduler.estimate_tokens(tasks[0]) < 12000
+        assert len(scheduler.plan_session(tasks, cap, phase="autonomous")) == 3
+
+        # Too few samples: fall back to declared estimates
+        scheduler.set_cost_model(CostModel(intercept=9.3, samples=2))
+        assert scheduler.estimate_tokens(tasks[0]) == 50000
+
+
+class TestDurationWindow:
+    """Test wall-clock fitting of session plans."""
+
+    def test_plan_session_fits_remaining_window(self):
+        from lib.duration_model import DurationModel
+
+        model = DurationModel(min_samples=1)
+        model.add("long", None, 3600)
+        model.add("short", None, 600)
+        tasks = [
+            make_task("long", priority=1, estimated_tokens=1000),
+            make_task("short", priority=2, estimated_tokens=1000),
+            make_task("after-long", priority=3, estimated_tokens=1000, depends_on=["long"]),
+        ]
+        cap = Capacity(five_hour_percent=0, weekly_percent=0)
+        scheduler = make_scheduler()
+        scheduler.set_duration_model(model)
+
+        # 30 minutes before the end of the autonomous window
+        end = scheduler.config.autonomous_end
+        now = datetime.combine(datetime(2026, 3, 2).date(), end) - timedelta(minutes=30)
+        planned = scheduler.plan_session(tasks, cap, phase="autonomous", now=now)
+        assert [t.name for t in planned] == ["short"]
+
+        assert scheduler.timeout_for(tasks[1]) == 600 * scheduler.config.timeout_margin
+
+
+class TestPhases:
+    """Test schedule phase windows."""
+
+    def test_late_briefing_wraps_past_midnight(self):
+        from datetime import time
+
+        scheduler = Scheduler(ScheduleConfig(
+            autonomous_start=time(3, 30), autonomous_end=time(10, 30), briefing_time=time(23, 30),
+            reserved_start=time(11, 0), reserved_end=time(3, 30),
+        ))
+        assert scheduler.get_current_phase(datetime(2026, 3, 2, 23, 45)) == "briefing"
+        assert scheduler.get_current_phase(datetime(2026, 3, 3, 0, 15)) == "briefing"
+        assert scheduler.get_current_phase(datetime(2026, 3, 3, 0, 45)) == "reserved"
+        assert scheduler.get_phase_end("briefing", datetime(2026, 3, 2, 23, 45)) == datetime(2026, 3, 3, 0, 30)
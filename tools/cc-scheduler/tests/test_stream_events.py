@@ -0,0 +1,85 @@
+"""Tests for claude / gemini stream parsing."""
+import json
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.stream_events import ClaudeStreamParser, GeminiStreamParser, TokenUsage, parser_for
+
+
+def line(obj: dict) -> str:
+    return json.dumps(obj) + "\n"
+
+
+USAGE = {"input_tokens": 10, "output_tokens": 5, "cache_creation_input_tokens": 100, "cache_read_input_tokens": 2000}
+
+CLAUDE_STREAM = (
+    line({"type": "system", "subtype": "init", "session_id": "s-1", "model": "claude-sonnet"})
+    + line({"type": "assistant", "session_id": "s-1", "message": {
+        "id": "m1", "content": [{"type": "text", "text": "Looking"}], "usage": USAGE}})
+    + line({"type": "assistant", "session_id": "s-1", "message": {
+        "id": "m1", "content": [{"type": "tool_use", "name": "Bash", "input": {}}], "usage": USAGE}})
+    + line({"type": "user", "session_id": "s-1", "message": {"content": [{"type": "tool_result"}]}})
+    + line({"type": "result", "subtype": "success", "is_error": False, "session_id": "s-1",
+            "result": "Done", "num_turns": 2, "total_cost_usd": 0.12,
+            "usage": {"input_tokens": 30, "output_tokens": 20, "cache_creation_input_tokens": 100,
+                      "cache_read_input_tokens": 4000}})
+)
+
+
+class TestClaudeStreamParser:
+    """Test stream-json parsing."""
+
+    def test_events_from_arbitrary_chunks(self):
+        parser = ClaudeStreamParser()
+        events = []
+        for i in range(0, len(CLAUDE_STREAM), 7):
+            events += parser.feed(CLAUDE_STREAM[i:i + 7])
+        events += parser.close()
+
+        kinds = [e.kind for e in events]
+        assert kinds == ["init", "text", "usage", "tool", "usage", "result"]
+        assert events[3].tool == "Bash"
+
+    def test_usage_not_double_counted_per_message(self):
+        parser = ClaudeStreamParser()
+        parser.feed(CLAUDE_STREAM.split("\n", 3)[0] + "\n")
+        for chunk in CLAUDE_STREAM.splitlines(keepends=True)[1:3]:
+            parser.feed(chunk)
+        assert parser.summary.usage == TokenUsage.from_api(USAGE)
+
+    def test_summary_from_result(self):
+        parser = ClaudeStreamParser()
+        parser.feed(CLAUDE_STREAM)
+        s = parser.summary
+        assert s.session_id == "s-1"
+        assert s.usage == TokenUsage(30, 20, 100, 4000)
+        assert s.usage.total == 150
+        assert s.cost_usd == 0.12 and s.num_turns == 2
+        assert s.tools == {"Bash": 1}
+        assert s.error is None and not s.fatal
+
+    def test_limit_error_is_fatal(self):
+        parser = ClaudeStreamParser()
+        events = parser.feed(line({"type": "result", "subtype": "success", "is_error": True,
+                                   "result": "Claude AI usage limit reached|1760000000"}))
+        assert events[-1].kind == "error" and events[-1].fatal
+        assert parser.summary.fatal
+
+    def test_non_json_lines_are_text(self):
+        parser = ClaudeStreamParser()
+        events = parser.feed("Error: something on stderr\n")
+        assert events[0].kind == "text" and events[0].text == "Error: something on stderr"
+
+
+class TestGeminiStreamParser:
+    """Test gemini quota detection."""
+
+    def test_quota_error(self):
+        parser = parser_for("desktop")
+        assert isinstance(parser, GeminiStreamParser)
+        parser.feed("working...\nTerminalQuotaError: quota will reset after 3h12m")
+        events = parser.close()
+        assert events[-1].fatal
+        assert parser.summary.error == "Gemini quota exhausted. Resets in 3h12m"
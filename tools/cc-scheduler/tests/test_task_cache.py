@@ -0,0 +1,81 @@
+"""Tests for the persistent parsed-task cache."""
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.task_cache import TaskCache
+
+
+TASK = '''---
+name: {name}
+priority: {priority}
+tags: [a, b]
+deadline: 2026-03-01
+---
+Body for {name}
+'''
+
+
+def write_task(directory: Path, name: str, priority: int = 5) -> Path:
+    path = directory / f"{name}.md"
+    path.write_text(TASK.format(name=name, priority=priority))
+    return path
+
+
+class TestTaskCache:
+    """Test cache hits, invalidation and pruning."""
+
+    def test_load_dir_parses_and_caches(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            pending = tmpdir / "pending"
+            pending.mkdir()
+            write_task(pending, "one")
+            write_task(pending, "two")
+
+            with TaskCache(tmpdir / "cache.db") as cache:
+                tasks = cache.load_dir(pending)
+                assert sorted(t.name for t in tasks) == ["one", "two"]
+
+                # Second load must not re-parse anything
+                with patch("lib.task_cache.parse_task_file") as parse:
+                    tasks = cache.load_dir(pending)
+                    parse.assert_not_called()
+
+            by_name = {t.name: t for t in tasks}
+            assert by_name["one"].tags == ("a", "b")
+            assert by_name["one"].deadline.year == 2026
+
+    def test_changed_file_is_reparsed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            pending = tmpdir / "pending"
+            pending.mkdir()
+            path = write_task(pending, "one", priority=5)
+
+            with TaskCache(tmpdir / "cache.db") as cache:
+                assert cache.load_dir(pending)[0].priority == 5
+
+                path.write_text(TASK.format(name="one", priority=2))
+                st = path.stat()
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+                assert cache.load_dir(pending)[0].priority == 2
+
+    def test_removed_file_is_pruned(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            pending = tmpdir / "pending"
+            pending.mkdir()
+            write_task(pending, "one")
+            gone = write_task(pending, "two")
+
+            with TaskCache(tmpdir / "cache.db") as cache:
+                assert len(cache.load_dir(pending)) == 2
+                gone.unlink()
+                assert [t.name for t in cache.load_dir(pending)] == ["one"]
+                assert cache.load(gone) is None
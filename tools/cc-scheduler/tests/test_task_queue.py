@@ -0,0 +1,172 @@
+"""Tests for the multi-project task queue."""
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.task_queue import TaskQueue, ProjectConfig
+from lib.tasks import Task
+from lib.task_cache import TaskCache
+from lib.completed_index import append_completed_name, read_completed_names
+
+
+def write_task(directory: Path, name: str, depends_on: list = None) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.md"
+    deps = f"depends_on: [{', '.join(depends_on)}]\n" if depends_on else ""
+    path.write_text(f"---\nname: {name}\n{deps}---\nBody\n")
+    return path
+
+
+class TestCompletedIndex:
+    """Test completed-name index usage in TaskQueue."""
+
+    def test_load_all_reads_index_without_parsing_completed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_dir = Path(tmpdir) / "tasks"
+            write_task(tasks_dir / "completed", "done-a")
+            write_task(tasks_dir / "pending", "next", depends_on=["done-a"])
+            append_completed_name(tasks_dir / "completed", "done-a")
+
+            queue = TaskQueue([ProjectConfig(path=tasks_dir)])
+            with patch("lib.task_queue.rebuild_completed_index") as rebuild:
+                queue.load_all()
+                rebuild.assert_not_called()
+
+            assert queue.summary()["completed_count"] == 1
+
+    def test_missing_index_is_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_dir = Path(tmpdir) / "tasks"
+            write_task(tasks_dir / "completed", "done-a")
+            write_task(tasks_dir / "completed", "done-b")
+
+            queue = TaskQueue([ProjectConfig(path=tasks_dir)])
+            queue.load_all()
+
+            assert read_completed_names(tasks_dir / "completed") == {"done-a", "done-b"}
+            assert queue.summary()["completed_count"] == 2
+
+    def test_rebuild_fixes_drift(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_dir = Path(tmpdir) / "tasks"
+            write_task(tasks_dir / "completed", "done-a")
+            append_completed_name(tasks_dir / "completed", "stale")
+
+            queue = TaskQueue([ProjectConfig(path=tasks_dir, name="brain")])
+            assert queue.rebuild_completed_index() == {"brain": 1}
+            assert read_completed_names(tasks_dir / "completed") == {"done-a"}
+
+
+class TestDependencyGraph:
+    """Test DAG-based dependency resolution."""
+
+    def make_queue(self, tmpdir: Path, specs: dict) -> TaskQueue:
+        tasks_dir = tmpdir / "tasks"
+        for name, deps in specs.items():
+            write_task(tasks_dir / "pending", name, depends_on=deps)
+        queue = TaskQueue([ProjectConfig(path=tasks_dir)])
+        queue.load_all()
+        return queue
+
+    def test_runnable_and_blocked(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = self.make_queue(Path(tmpdir), {
+                "a": None,
+                "b": ["a"],
+                "c": ["b", "external-thing"],
+            })
+            assert [t.name for t in queue.get_runnable_tasks()] == ["a"]
+            assert sorted(t.name for t in queue.get_blocked_tasks()) == ["b", "c"]
+            assert queue.summary()["missing_deps"] == {"c": ["external-thing"]}
+
+    def test_mark_completed_unblocks_incrementally(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = self.make_queue(Path(tmpdir), {"a": None, "b": ["a"], "c": ["b"]})
+
+            assert [t.name for t in queue.mark_completed("a")] == ["b"]
+            assert [t.name for t in queue.get_runnable_tasks()] == ["b"]
+            assert queue.summary()["completed_count"] == 1
+
+    def test_cycles_are_detected_and_never_runnable(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = self.make_queue(Path(tmpdir), {"a": ["b"], "b": ["a"], "c": None})
+
+            assert queue.summary()["cycles"] == [["a", "b"]]
+            assert [t.name for t in queue.get_runnable_tasks()] == ["c"]
+
+    def test_critical_path_length(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = self.make_queue(Path(tmpdir), {
+                "root": None,
+                "mid": ["root"],
+                "leaf": ["mid"],
+                "side": ["root"],
+                "lonely": None,
+            })
+            graph = queue.graph
+            assert graph.critical_path_length("root") == 2
+            assert graph.critical_path_length("mid") == 1
+            assert graph.critical_path_length("lonely") == 0
+            assert graph.topological_order() == ["lonely", "root", "mid", "leaf", "side"]
+
+
+class TestIndexes:
+    """Test name/tag/project indexes stay in sync with mutations."""
+
+    def test_lookups_follow_mutations(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tasks_dir = Path(tmpdir) / "tasks"
+            pending = tasks_dir / "pending"
+            pending.mkdir(parents=True)
+            (pending / "a.md").write_text("---\nname: a\ntags: [x, y]\n---\nBody\n")
+            (pending / "b.md").write_text("---\nname: b\ntags: [y]\n---\nBody\n")
+
+            queue = TaskQueue([ProjectConfig(path=tasks_dir, name="brain")])
+            queue.load_all()
+
+            assert queue.get_by_name("a").tags == ("x", "y")
+            assert sorted(t.name for t in queue.get_by_tag("y")) == ["a", "b"]
+            assert len(queue.get_by_project("brain")) == 2
+
+            queue.remove_task("a")
+            assert queue.get_by_name("a") is None
+            assert "a" not in queue.graph.nodes
+            assert [t.name for t in queue.get_by_tag("y")] == ["b"]
+            assert queue.get_by_tag("x") == []
+            assert queue.get_tags() == {"y": 1}
+
+            added = Task(name="c", path=pending / "c.md", tags=("z",), project="brain")
+            queue.add_task(added)
+            assert queue.get_by_name("c") is added
+            assert queue.get_by_tag("z") == [added]
+            assert queue.summary()["by_project"] == {"brain": ["b", "c"]}
+
+
+class TestParallelLoading:
+    """Test concurrent multi-project loading keeps a stable order."""
+
+    def test_order_and_errors_are_deterministic(self, capsys):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            projects = []
+            for proj in ("alpha", "beta"):
+                tasks_dir = tmpdir / proj / "tasks"
+                for name in ("c", "a", "b"):
+                    write_task(tasks_dir / "pending", f"{proj}-{name}")
+                (tasks_dir / "pending" / "zz-bad.md").write_text("---\nname: bad\nbackend: cloud\n---\n")
+                projects.append(ProjectConfig(path=tasks_dir, name=proj))
+
+            queue = TaskQueue(projects, cache=TaskCache(tmpdir / "cache.db"), max_workers=4)
+            names = [t.name for t in queue.load_all()]
+
+            assert names == ["alpha-a", "alpha-b", "alpha-c", "beta-a", "beta-b", "beta-c"]
+            errors = [line for line in capsys.readouterr().out.splitlines() if "Error parsing" in line]
+            assert len(errors) == 2
+            assert "alpha" in errors[0] and "beta" in errors[1]
+
+            # Second load is served from the cache with the same result
+            assert [t.name for t in queue.load_all()] == names
+            assert [t.project for t in queue.get_by_project("beta")] == ["beta"] * 3
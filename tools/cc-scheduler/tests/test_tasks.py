@@ -179,3 +179,39 @@ Body
             task = parse_task_file(Path(f.name))
 
         assert task is None
+
+
+class TestCompactTask:
+    """Test the compact task representation."""
+
+    def test_task_is_slotted_with_interned_tuples(self):
+        content = '''---
+name: test-task
+tags: [research, brain]
+depends_on: [other-task]
+---
+Body
+'''
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+            f.write(content)
+            f.flush()
+            task = parse_task_file(Path(f.name))
+            twin = parse_task_file(Path(f.name))
+
+        assert not hasattr(task, '__dict__')
+        assert task.tags == ("research", "brain")
+        assert task.depends_on == ("other-task",)
+        assert task.tags[0] is twin.tags[0]
+        assert task.body is None
+        assert task.body_chars == len("Body\n")
+
+    def test_features_do_not_load_body(self):
+        from lib.cost_model import task_features
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
+            f.write("---\nname: t\n---\n" + "x" * 500 + "\n")
+            f.flush()
+            task = parse_task_file(Path(f.name))
+
+        assert task_features(task)["body_chars"] == 501
+        assert task.body is None